@@ -0,0 +1,170 @@
+# background_save.py
+
+"""
+Background saving for the character management system.
+
+This module defines the BackgroundSave class which writes a snapshot
+of the character list to a CSV or JSON Lines file, chosen by its
+extension, on a worker thread, so the console menu keeps accepting
+commands while a large roster is being saved.
+"""
+
+import os
+import tempfile
+import threading
+from file_manager import character_writer
+
+
+class BackgroundSave:
+    """
+    Save a snapshot of the character list on a worker thread.
+    The roster is snapshotted when the save starts, so characters added
+    afterwards are not part of the file and cannot corrupt it. Rows are
+    written to a temporary file which only replaces the target file once
+    every row has been written, so a cancelled or failed save never
+    leaves a partial file behind.
+    """
+
+    RUNNING = 'Running'
+    COMPLETED = 'Completed'
+    CANCELLED = 'Cancelled'
+    FAILED = 'Failed'
+
+    def __init__(self, characters, filename):
+        """
+        Initialize a BackgroundSave and snapshot the characters to save.
+        :param characters: list, list of Character objects to save to file
+        :param filename: str, path of the CSV file to create
+        """
+        # A tuple copy only holds references, so it is cheap to take
+        self._snapshot = tuple(characters)
+        self._filename = filename
+        self._written = 0
+        self._state = None
+        self._error = None
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def get_filename(self):
+        """
+        Get the file the snapshot is being saved to.
+        :return: str, path of the CSV file
+        """
+        return self._filename
+
+    def get_total(self):
+        """
+        Get the number of characters in the snapshot.
+        :return: int, total number of characters to save
+        """
+        return len(self._snapshot)
+
+    def get_written(self):
+        """
+        Get the number of characters written so far.
+        :return: int, number of characters written
+        """
+        return self._written
+
+    def get_state(self):
+        """
+        Get the current state of the save.
+        :return: str, one of Running, Completed, Cancelled or Failed,
+        or None if the save has not been started
+        """
+        return self._state
+
+    def get_error(self):
+        """
+        Get the error that stopped a failed save.
+        :return: Exception or None, the error if the save failed
+        """
+        return self._error
+
+    def is_running(self):
+        """
+        Check whether the save is still in progress.
+        :return: bool, True if the worker thread is still writing
+        """
+        return self._state == self.RUNNING
+
+    def start(self):
+        """
+        Start writing the snapshot on the worker thread.
+        :return: None
+        """
+        self._state = self.RUNNING
+        self._thread.start()
+
+    def cancel(self):
+        """
+        Ask the worker thread to stop; the target file is left untouched.
+        :return: None
+        """
+        self._cancel_event.set()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the worker thread to finish.
+        :param timeout: float or None, maximum number of seconds to wait
+        :return: bool, True if the save has finished
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _characters(self):
+        """
+        Hand out the snapshot's characters to the writer, counting each
+        one written and stopping early if the save is cancelled.
+        :return: generator, yields Character objects
+        """
+        for character in self._snapshot:
+            if self._cancel_event.is_set():
+                return
+            yield character
+            self._written += 1
+
+    def _run(self):
+        """
+        Worker thread body which writes the snapshot to the file.
+        :return: None
+        """
+        directory = os.path.dirname(os.path.abspath(self._filename))
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(
+                suffix='.tmp', prefix='.save-', dir=directory)
+            os.close(fd)
+            # The format follows the target's extension, not the
+            # temporary file's
+            character_writer(self._filename)(self._characters(),
+                                             temp_path)
+
+            if self._cancel_event.is_set():
+                os.remove(temp_path)
+                self._state = self.CANCELLED
+            else:
+                # mkstemp creates owner-only files; match a normal save
+                os.chmod(temp_path, 0o644)
+                os.replace(temp_path, self._filename)
+                self._state = self.COMPLETED
+        except Exception as e:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            self._error = e
+            self._state = self.FAILED
+
+    def __str__(self):
+        """
+        String representation of the save status.
+        :return: str, formatted string containing the save progress
+        """
+        total = self.get_total()
+        percent = (self._written / total * 100) if total else 100.0
+        status = (f"File           : {self._filename}\n"
+                  f"Status         : {self._state}\n"
+                  f"Progress       : {self._written:,} / {total:,} "
+                  f"characters ({percent:.1f}%)")
+        if self._error is not None:
+            status += f"\nError          : {self._error}"
+        return status
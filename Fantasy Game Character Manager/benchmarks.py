@@ -0,0 +1,982 @@
+# benchmarks.py
+
+"""
+Performance benchmarks for the character management system.
+
+This module generates synthetic rosters and times the roster, file and
+query components. Run it from the command line with the name of a
+benchmark, for example:
+
+    python benchmarks.py roster-readers --size 200000
+"""
+
+import argparse
+import bisect
+import copy
+import http.client
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from warrior import Warrior
+from mage import Mage
+from roster import Roster
+from name_index import NameIndex
+from file_manager import (
+    character_to_dict, write_characters, iter_characters,
+    save_partitioned_characters, load_partitioned_characters,
+    read_partition_manifest, iter_rows)
+from server import CharacterServer
+from roster_sketch import sketch_file, REPORT_QUANTILES
+from roster_scan import scan_file
+from roster_cache import RosterCache
+from load_errors import LoadErrors
+from roster_diff import diff_files, merge_files, DiffSummary
+from external_sort import sort_file
+from shared_roster import SharedRoster
+from combat import simulate
+from matchmaking import Matchmaker, OBJECTIVES
+from ledger import Batch, Ledger, replay_log
+
+
+# Syllables combined to build synthetic letter-only names
+NAME_SYLLABLES = [
+    'an', 'bel', 'cor', 'dor', 'el', 'fin', 'gal', 'har', 'is', 'jor',
+    'kel', 'lor', 'mir', 'nor', 'or', 'pel', 'quin', 'ros', 'sil', 'tor',
+    'ul', 'val', 'wen', 'xan', 'yr', 'zor'
+    ]
+
+
+def make_synthetic_name(rng):
+    """
+    Build a random letter-only character name.
+    :param rng: random.Random, the random number generator to use
+    :return: str, a capitalized name of two to four syllables
+    """
+    count = rng.randint(2, 4)
+    return ''.join(rng.choice(NAME_SYLLABLES) for _ in range(count))
+
+
+def make_synthetic_characters(count, seed=0):
+    """
+    Build a reproducible list of random Warriors and Mages.
+    :param count: int, number of characters to create
+    :param seed: int, seed for the random number generator
+    :return: list, list of Character objects
+    """
+    rng = random.Random(seed)
+    characters = []
+    for _ in range(count):
+        name = make_synthetic_name(rng)
+        race = rng.choice(['Elf', 'Dwarf', 'Human'])
+        skill_level = rng.randint(1, 5)
+        wealth = rng.randint(0, 100000)
+        if rng.random() < 0.5:
+            character = Warrior(
+                name, race, skill_level, wealth,
+                rng.choice(['Sword', 'Axe']),
+                rng.choice(['Chainmail', 'Plate']))
+        else:
+            character = Mage(
+                name, race, skill_level, wealth,
+                rng.choice(['Fireball', 'Lightning']),
+                rng.randint(0, 100))
+        characters.append(character)
+    return characters
+
+
+def benchmark_roster_readers(size, thread_counts, duration):
+    """
+    Stress test the Roster with concurrent readers and one writer.
+    For each reader thread count, the readers alternate name searches
+    and wealth totals while a writer keeps appending characters, and
+    the combined number of completed queries per second is reported.
+    Because queries are pure Python, the GIL limits how far throughput
+    can scale with threads; the test mainly shows that readers run
+    alongside the writer without errors or lost updates.
+    :param size: int, number of characters in the roster
+    :param thread_counts: list, reader thread counts to test
+    :param duration: float, seconds to run each thread count
+    :return: None
+    """
+    print(f"Building roster of {size:,} characters...")
+    base = make_synthetic_characters(size)
+    extra = make_synthetic_characters(1000, seed=1)
+
+    for thread_count in thread_counts:
+        roster = Roster(base)
+        stop = threading.Event()
+        counts = [0] * thread_count
+        writes = [0]
+
+        def reader(index):
+            while not stop.is_set():
+                roster.search_by_name('dor')
+                roster.wealth_statistics()
+                counts[index] += 2
+
+        def writer():
+            while not stop.is_set():
+                for character in extra:
+                    if stop.is_set():
+                        break
+                    roster.append(character)
+                    writes[0] += 1
+                time.sleep(0.001)
+
+        threads = [threading.Thread(target=reader, args=(i,))
+                   for i in range(thread_count)]
+        threads.append(threading.Thread(target=writer))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        assert len(roster) == size + writes[0]
+        print(f"{thread_count:>3} reader(s): "
+              f"{sum(counts) / elapsed:>10,.1f} queries/s, "
+              f"{writes[0] / elapsed:>10,.1f} writes/s")
+
+
+def benchmark_server(size, clients, requests_per_client, batch_size):
+    """
+    Measure requests per second of the HTTP service on localhost.
+    Each client thread holds one keep-alive connection and sends the
+    same number of requests of each kind.
+    :param size: int, number of characters preloaded into the roster
+    :param clients: int, number of concurrent client threads
+    :param requests_per_client: int, requests per client per endpoint
+    :param batch_size: int, characters per bulk-create request
+    :return: None
+    """
+    print(f"Building roster of {size:,} characters...")
+    roster = Roster(make_synthetic_characters(size))
+    server = CharacterServer(('127.0.0.1', 0), roster)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_port
+
+    new_rows = [character_to_dict(char)
+                for char in make_synthetic_characters(batch_size, seed=1)]
+    single_body = json.dumps(new_rows[0])
+    bulk_body = json.dumps(new_rows)
+    headers = {'Content-Type': 'application/json'}
+    endpoints = [
+        ('search', 'GET', '/characters/search?name=dorel', None),
+        ('wealth', 'GET', '/characters/wealth', None),
+        ('create', 'POST', '/characters', single_body),
+        ('bulk create', 'POST', '/characters/bulk', bulk_body),
+    ]
+
+    for label, method, path, body in endpoints:
+        def client():
+            connection = http.client.HTTPConnection('127.0.0.1', port)
+            for _ in range(requests_per_client):
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                response.read()
+                assert response.status < 300, response.status
+            connection.close()
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        start = time.perf_counter()
+        for client_thread in threads:
+            client_thread.start()
+        for client_thread in threads:
+            client_thread.join()
+        elapsed = time.perf_counter() - start
+        total = clients * requests_per_client
+        print(f"{label:<12}: {total / elapsed:>10,.1f} requests/s")
+
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    start = time.perf_counter()
+    connection.request('GET', '/characters/export')
+    response = connection.getresponse()
+    exported = len(json.loads(response.read()))
+    elapsed = time.perf_counter() - start
+    connection.close()
+    print(f"{'export':<12}: {exported:,} characters streamed in "
+          f"{elapsed:.2f}s")
+
+    server.shutdown()
+    server.server_close()
+
+
+def make_typo(name, rng, typos):
+    """
+    Introduce random substitution, insertion or deletion typos to a name.
+    :param name: str, the name to change
+    :param rng: random.Random, the random number generator to use
+    :param typos: int, number of typos to introduce
+    :return: str, the changed name
+    """
+    letters = list(name)
+    for _ in range(typos):
+        position = rng.randrange(len(letters))
+        kind = rng.choice(['substitute', 'insert', 'delete'])
+        if kind == 'delete' and len(letters) > 1:
+            del letters[position]
+        elif kind == 'insert':
+            letters.insert(position, rng.choice('abcdefghijklmnopqrstuvwxyz'))
+        else:
+            letters[position] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+    return ''.join(letters)
+
+
+def benchmark_fuzzy_search(size, queries):
+    """
+    Measure fuzzy name search latency over a large NameIndex.
+    Names are indexed directly, without building characters, and
+    queried with one and two random typos.
+    :param size: int, number of names to index
+    :param queries: int, number of queries per typo count
+    :return: None
+    """
+    rng = random.Random(0)
+    print(f"Indexing {size:,} names...")
+    names = [make_synthetic_name(rng) for _ in range(size)]
+    index = NameIndex()
+    start = time.perf_counter()
+    index.add_many((name, i) for i, name in enumerate(names))
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {len(index):,} distinct names in {elapsed:.2f}s")
+
+    for typos in (1, 2):
+        latencies = []
+        for _ in range(queries):
+            query = make_typo(rng.choice(names), rng, typos)
+            start = time.perf_counter()
+            index.fuzzy_search(query)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        median = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000
+        print(f"{typos} typo(s): median {median:.2f} ms, "
+              f"95th percentile {p95:.2f} ms")
+
+
+def benchmark_autocomplete(size, queries):
+    """
+    Measure prefix completion latency over a large NameIndex.
+    :param size: int, number of names to index
+    :param queries: int, number of prefix queries to time
+    :return: None
+    """
+    rng = random.Random(0)
+    print(f"Indexing {size:,} names...")
+    index = NameIndex()
+    names = [make_synthetic_name(rng) for _ in range(size)]
+    start = time.perf_counter()
+    index.add_many((name, i) for i, name in enumerate(names))
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {len(index):,} distinct names in {elapsed:.2f}s")
+
+    for length in (1, 3, 5):
+        latencies = []
+        for _ in range(queries):
+            prefix = rng.choice(names)[:length]
+            start = time.perf_counter()
+            index.complete(prefix, 10)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        median = latencies[len(latencies) // 2] * 1000
+        worst = latencies[-1] * 1000
+        print(f"{length}-letter prefix: median {median:.4f} ms, "
+              f"worst {worst:.4f} ms")
+
+
+def benchmark_file_formats(size):
+    """
+    Compare saving and loading a roster as CSV and as JSON Lines.
+    :param size: int, number of synthetic characters to save and load
+    :return: None
+    """
+    characters = make_synthetic_characters(size)
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in ('.csv', '.jsonl'):
+            filename = os.path.join(directory, 'roster' + extension)
+            start = time.perf_counter()
+            write_characters(characters, filename)
+            write_time = time.perf_counter() - start
+            start = time.perf_counter()
+            loaded = sum(1 for _ in iter_characters(filename))
+            read_time = time.perf_counter() - start
+            file_size = os.path.getsize(filename) / 1e6
+            print(f"{extension}: {file_size:.1f} MB, "
+                  f"write {size / write_time:,.0f} rows/s, "
+                  f"read {loaded / read_time:,.0f} rows/s")
+
+
+def benchmark_wealth_index(size, queries):
+    """
+    Compare Roster wealth ranking queries with sorting the roster.
+    :param size: int, number of synthetic characters in the roster
+    :param queries: int, number of each query to time
+    :return: None
+    """
+    characters = make_synthetic_characters(size)
+    start = time.perf_counter()
+    roster = Roster(characters)
+    elapsed = time.perf_counter() - start
+    print(f"Built a roster of {size:,} characters in {elapsed:.2f}s")
+
+    start = time.perf_counter()
+    sorted(characters, key=lambda character: character.get_wealth())
+    sort_time = (time.perf_counter() - start) * 1000
+    print(f"Full sort by wealth: {sort_time:.1f} ms")
+
+    rng = random.Random(0)
+    timed_queries = [
+        ('richest 100', lambda: roster.richest(100)),
+        ('median', lambda: roster.wealth_percentile(50)),
+        ('percentile', lambda: roster.wealth_percentile(
+            rng.uniform(0, 100))),
+        ('rank', lambda: roster.wealth_rank(rng.randint(0, 100000))),
+        ('set_wealth', lambda: rng.choice(characters).set_wealth(
+            str(rng.randint(0, 100000)))),
+    ]
+    for label, query in timed_queries:
+        start = time.perf_counter()
+        for _ in range(queries):
+            query()
+        elapsed = (time.perf_counter() - start) / queries * 1000
+        print(f"{label}: {elapsed:.4f} ms per call")
+
+
+def benchmark_sketches(size, workers):
+    """
+    Time one-pass sketching of a roster file, sequentially and in
+    parallel, and compare the wealth quantiles with exact values.
+    :param size: int, number of synthetic characters in the file
+    :param workers: int, number of worker processes for the parallel run
+    :return: None
+    """
+    characters = make_synthetic_characters(size)
+    wealth = sorted(character.get_wealth() for character in characters)
+    distinct = len({character.get_name().lower()
+                    for character in characters})
+    del characters
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'roster.csv')
+        write_characters(make_synthetic_characters(size), filename)
+        for worker_count in (1, workers):
+            start = time.perf_counter()
+            sketch = sketch_file(filename, worker_count, seed=0)
+            elapsed = time.perf_counter() - start
+            print(f"{worker_count} worker(s): {elapsed:.2f}s, "
+                  f"{size / elapsed:,.0f} rows/s, "
+                  f"{sketch.wealth.retained()} wealth values kept")
+
+    worst = max(
+        abs(bisect.bisect_left(wealth, value) / size - fraction)
+        for fraction, value in zip(
+            REPORT_QUANTILES, sketch.wealth.quantiles(REPORT_QUANTILES)))
+    print(f"Worst wealth quantile rank error: {worst:.2%}")
+    estimate = sketch.names.estimate()
+    print(f"Distinct names: {estimate:,} estimated, {distinct:,} exact "
+          f"({abs(estimate - distinct) / distinct:.2%} error)")
+
+
+def benchmark_partitions(size):
+    """
+    Compare loading a whole roster file with loading one partition of a
+    partitioned save, and with totalling from the manifest alone.
+    :param size: int, number of synthetic characters to save
+    :return: None
+    """
+    characters = make_synthetic_characters(size)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'roster.csv')
+        partitioned = os.path.join(directory, 'partitioned')
+        write_characters(characters, filename)
+        save_partitioned_characters(characters, partitioned)
+        del characters
+
+        start = time.perf_counter()
+        loaded = [character for character in iter_characters(filename)
+                  if character.get_race() == 'Elf'
+                  and character.get_role() == 'Mage']
+        print(f"Whole file, filtered to Elf Mages: {len(loaded):,} in "
+              f"{time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        loaded = load_partitioned_characters(partitioned, ['Elf'], ['Mage'])
+        print(f"Elf Mage partition: {len(loaded):,} in "
+              f"{time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        partitions = read_partition_manifest(partitioned, ['Elf'], ['Mage'])
+        total = sum(partition['total_wealth'] for partition in partitions)
+        print(f"Elf Mage wealth {total:,} from the manifest in "
+              f"{(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+def benchmark_pushdown(size):
+    """
+    Compare selective loads with and without filtering rows and
+    choosing columns before validation.
+    :param size: int, number of synthetic characters in the file
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'roster.csv')
+        write_characters(make_synthetic_characters(size), filename)
+        where = {'role': 'Warrior', 'skill_level': 5}
+        runs = [
+            ("Load all, then filter", lambda: [
+                character for character in iter_characters(filename)
+                if character.get_role() == 'Warrior'
+                and character.get_skill_level() == '5']),
+            ("Load with filter", lambda: list(
+                iter_characters(filename, where))),
+            ("Name and wealth, all rows", lambda: list(
+                iter_rows(filename, ['name', 'wealth']))),
+            ("Name and wealth, with filter", lambda: list(
+                iter_rows(filename, ['name', 'wealth'], where))),
+        ]
+        for label, run in runs:
+            start = time.perf_counter()
+            rows = run()
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {len(rows):,} rows in {elapsed:.2f}s")
+
+
+def benchmark_scan(size):
+    """
+    Compare totalling wealth by loading characters with scanning the
+    file directly, with and without grouping.
+    :param size: int, number of synthetic characters in the file
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'roster.csv')
+        write_characters(make_synthetic_characters(size), filename)
+        megabytes = os.path.getsize(filename) / 1e6
+        runs = [
+            ("Load characters", lambda: sum(
+                character.get_wealth()
+                for character in iter_characters(filename))),
+            ("Scan", lambda: scan_file(filename)),
+            ("Scan by race and role", lambda: scan_file(
+                filename, ['race', 'role'])),
+        ]
+        for label, run in runs:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {elapsed:.2f}s, {megabytes / elapsed:.1f} MB/s")
+
+
+def benchmark_cache(size):
+    """
+    Compare parsing a roster file with loading it from the cache.
+    :param size: int, number of synthetic characters in the file
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'roster.csv')
+        write_characters(make_synthetic_characters(size), filename)
+        cache = RosterCache(os.path.join(directory, 'cache'))
+        for label in ("Parse and store (miss)", "Cached (hit)",
+                      "Cached again (hit)"):
+            start = time.perf_counter()
+            characters = cache.load(filename, iter_characters)
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {len(characters):,} characters in "
+                  f"{elapsed:.2f}s")
+            del characters
+        with open(filename, 'a') as file:
+            file.write("Newcomer,Elf,Mage,3,50,,,Fireball,30\n")
+        start = time.perf_counter()
+        characters = cache.load(filename, iter_characters)
+        print(f"After the file changed (miss): {len(characters):,} "
+              f"characters in {time.perf_counter() - start:.2f}s")
+
+
+def benchmark_load_errors(size, bad_fraction):
+    """
+    Compare loading a clean roster file with loading one where a share
+    of the rows fail validation, with errors collected quietly and with
+    the rejected rows written to a file.
+    :param size: int, number of synthetic characters in the file
+    :param bad_fraction: float, share of the rows to break
+    :return: None
+    """
+    rng = random.Random(0)
+    characters = make_synthetic_characters(size)
+    with tempfile.TemporaryDirectory() as directory:
+        clean = os.path.join(directory, 'clean.csv')
+        bad = os.path.join(directory, 'bad.csv')
+        write_characters(characters, clean)
+        with open(clean) as source, open(bad, 'w') as target:
+            target.write(next(source))
+            for line in source:
+                if rng.random() < bad_fraction:
+                    # Break the wealth field or the name field
+                    fields = line.split(',')
+                    if rng.random() < 0.5:
+                        fields[4] = 'lots'
+                    else:
+                        fields[0] += '1'
+                    line = ','.join(fields)
+                target.write(line)
+
+        runs = [("Clean file", clean, None),
+                (f"{bad_fraction:.0%} bad rows", bad, None),
+                (f"{bad_fraction:.0%} bad rows, rejects saved", bad,
+                 os.path.join(directory, 'rejected.csv'))]
+        for label, filename, rejected in runs:
+            errors = LoadErrors(max_printed=0, rejected_filename=rejected,
+                                fieldnames=list(character_to_dict(
+                                    characters[0])))
+            start = time.perf_counter()
+            loaded = sum(1 for _ in iter_characters(filename,
+                                                    errors=errors))
+            errors.close()
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {loaded:,} loaded, {len(errors):,} rejected "
+                  f"in {elapsed:.2f}s")
+            for (field, code), count in errors.counts():
+                print(f"    {field}: {code} x {count:,}")
+
+
+def benchmark_undo(size, loaded):
+    """
+    Time undoing and redoing a large load into a roster, and the first
+    query after the undo, which brings the indexes up to date.
+    :param size: int, number of characters already in the roster
+    :param loaded: int, number of characters in the load being undone
+    :return: None
+    """
+    characters = make_synthetic_characters(size + loaded)
+    roster = Roster(characters[:size])
+
+    start = time.perf_counter()
+    roster.extend(characters[size:], "load")
+    print(f"Load {loaded:,} into {size:,}: "
+          f"{time.perf_counter() - start:.2f}s")
+    for label, action in (
+            ("Undo", roster.undo),
+            ("Redo before any query", roster.redo),
+            ("Undo again", roster.undo),
+            ("First query after undo", roster.wealth_statistics),
+            ("Redo", roster.redo)):
+        start = time.perf_counter()
+        action()
+        print(f"{label}: {time.perf_counter() - start:.3f}s")
+
+
+def _letter_suffix(number, width):
+    """
+    Spell a number in lowercase letters, so it can end a character name.
+    :param number: int, the number, below 26 ** width
+    :param width: int, the number of letters
+    :return: str, the letters
+    """
+    letters = []
+    for _ in range(width):
+        number, digit = divmod(number, 26)
+        letters.append(chr(ord('a') + digit))
+    return ''.join(letters)
+
+
+def benchmark_diff(size, changed):
+    """
+    Time diffing and merging two versions of a roster file, in memory
+    and partitioned on disk. Characters get unique names, as in a real
+    roster; the new file drops and changes random characters and adds
+    new ones.
+    :param size: int, number of synthetic characters in the old file
+    :param changed: float, share of the characters changed, removed and
+    added in the new file, each
+    :return: None
+    """
+    rng = random.Random(0)
+    count = int(size * changed)
+    old = make_synthetic_characters(size + count)
+    width = 1
+    while 26 ** width < len(old):
+        width += 1
+    for number, character in enumerate(old):
+        character.set_name(character.get_name() +
+                           _letter_suffix(number, width))
+    added = old[size:]
+    del old[size:]
+    removed = set(rng.sample(range(size), count))
+    new = [character for number, character in enumerate(old)
+           if number not in removed]
+    for number in rng.sample(range(len(new)), count):
+        character = copy.copy(new[number])
+        character.set_wealth(character.get_wealth() + 1)
+        new[number] = character
+    new += added
+    with tempfile.TemporaryDirectory() as directory:
+        old_file = os.path.join(directory, 'old.csv')
+        new_file = os.path.join(directory, 'new.csv')
+        write_characters(old, old_file)
+        write_characters(new, new_file)
+        memory_limits = [("in memory", os.path.getsize(old_file)),
+                         ("partitioned", os.path.getsize(old_file) // 8)]
+        for label, memory_bytes in memory_limits:
+            summary = DiffSummary()
+            start = time.perf_counter()
+            for _ in diff_files(old_file, new_file,
+                                memory_bytes=memory_bytes,
+                                summary=summary):
+                pass
+            print(f"Diff {label}: {time.perf_counter() - start:.2f}s "
+                  f"{summary.counts}")
+        start = time.perf_counter()
+        merge_files(old_file, new_file,
+                    os.path.join(directory, 'merged.csv'))
+        print(f"Merge in memory: {time.perf_counter() - start:.2f}s")
+
+
+def benchmark_sort(size, memory_mb):
+    """
+    Time sorting a roster file by wealth and by name, within a memory
+    budget and with the whole file in memory.
+    :param size: int, number of synthetic characters in the file
+    :param memory_mb: list, memory budgets in megabytes to sort within
+    :return: None
+    """
+    characters = make_synthetic_characters(size)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'roster.csv')
+        output = os.path.join(directory, 'sorted.csv')
+        write_characters(characters, filename)
+        del characters
+        for key_fields in (['wealth'], ['name']):
+            for budget in memory_mb:
+                start = time.perf_counter()
+                sort_file(filename, output, key_fields,
+                          memory_bytes=budget * 2 ** 20)
+                print(f"Sort by {', '.join(key_fields)} in {budget} MB: "
+                      f"{time.perf_counter() - start:.2f}s")
+
+
+def benchmark_shared_roster(size, workers, repeats):
+    """
+    Time name searches and wealth aggregates over a roster in shared
+    memory with different numbers of worker processes, against the
+    single-threaded Roster search.
+    :param size: int, number of synthetic characters
+    :param workers: list, worker process counts to try
+    :param repeats: int, number of times each query is run
+    :return: None
+    """
+    roster = Roster(make_synthetic_characters(size))
+    start = time.perf_counter()
+    for _ in range(repeats):
+        expected = roster.search_by_name('an')
+    baseline = (time.perf_counter() - start) / repeats
+    print(f"Roster search: {baseline * 1000:.1f} ms "
+          f"({len(expected):,} found)")
+
+    for count in workers:
+        start = time.perf_counter()
+        with SharedRoster(roster.snapshot(), count) as shared:
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(repeats):
+                found = shared.search_by_name('an')
+            search = (time.perf_counter() - start) / repeats
+            start = time.perf_counter()
+            for _ in range(repeats):
+                shared.aggregate(('race', 'role'))
+            aggregate = (time.perf_counter() - start) / repeats
+        assert found == expected
+        print(f"{count} worker(s): build {build:.2f}s, "
+              f"search {search * 1000:.1f} ms "
+              f"({baseline / search:.1f}x Roster), "
+              f"aggregate {aggregate * 1000:.1f} ms")
+
+
+def benchmark_combat(size, encounters, party_sizes):
+    """
+    Time simulated encounters between the warriors and the mages of a
+    synthetic roster, for different party sizes.
+    :param size: int, number of synthetic characters
+    :param encounters: int, number of encounters per party size
+    :param party_sizes: list, party sizes to try
+    :return: None
+    """
+    characters = make_synthetic_characters(size)
+    warriors = [character for character in characters
+                if isinstance(character, Warrior)]
+    mages = [character for character in characters
+             if isinstance(character, Mage)]
+    for party_size in party_sizes:
+        start = time.perf_counter()
+        report = simulate(warriors, mages, encounters, party_size, seed=1)
+        elapsed = time.perf_counter() - start
+        print(f"Party size {party_size}: {encounters:,} encounters in "
+              f"{elapsed:.2f}s ({encounters / elapsed:,.0f}/s), "
+              f"warriors won {report.wins[0] / encounters:.1%}")
+
+
+def benchmark_matchmaking(size, arrivals, same_race):
+    """
+    Time forming parties from a full queue with each balancing objective,
+    then feed a Matchmaker a steady stream of arrivals and measure how
+    long characters wait for a party.
+    :param size: int, number of synthetic characters
+    :param arrivals: int, characters joining the queue per tick
+    :param same_race: bool, whether parties must be of one race
+    :return: None
+    """
+    characters = make_synthetic_characters(size)
+    for objective in sorted(OBJECTIVES):
+        matchmaker = Matchmaker(same_race=same_race, objective=objective)
+        start = time.perf_counter()
+        for character in characters:
+            matchmaker.enqueue(character, 0)
+        queued = time.perf_counter() - start
+        start = time.perf_counter()
+        parties = matchmaker.form_parties(0)
+        formed = time.perf_counter() - start
+        spread = sum(party.skill_spread() for party in parties)
+        print(f"{objective}: enqueue {size / queued:,.0f}/s, "
+              f"{len(parties):,} parties in {formed:.2f}s "
+              f"({len(parties) / formed:,.0f}/s), "
+              f"mean skill spread {spread / max(len(parties), 1):.2f}")
+
+    matchmaker = Matchmaker(same_race=same_race)
+    waits = []
+    start = time.perf_counter()
+    for tick, first in enumerate(range(0, size, arrivals)):
+        for character in characters[first:first + arrivals]:
+            matchmaker.enqueue(character, tick)
+        for party in matchmaker.form_parties(tick):
+            waits.extend(party.waits)
+    elapsed = time.perf_counter() - start
+    waits.sort()
+    if waits:
+        print(f"Stream of {arrivals:,} per tick: {len(waits):,} placed in "
+              f"{elapsed:.2f}s ({len(waits) / elapsed:,.0f}/s), "
+              f"{len(matchmaker):,} left waiting")
+        print(f"Wait in ticks: mean {sum(waits) / len(waits):.2f}, "
+              f"median {waits[len(waits) // 2]}, "
+              f"95th percentile {waits[len(waits) * 95 // 100]}, "
+              f"max {waits[-1]}")
+
+
+def benchmark_ledger(size, batch_size, batches, sync):
+    """
+    Time batches of random transfers, rewards and charges applied to a
+    roster through a logging Ledger, then replay the log onto a fresh
+    copy of the roster and check both end up with the same wealth.
+    :param size: int, number of synthetic characters
+    :param batch_size: int, transactions per batch
+    :param batches: int, number of batches
+    :param sync: bool, whether to sync the log to disk after each batch
+    :return: None
+    """
+    roster = Roster(make_synthetic_characters(size))
+    rng = random.Random(2)
+    work = []
+    for _ in range(batches):
+        batch = Batch()
+        for _ in range(batch_size):
+            kind = rng.random()
+            amount = rng.randint(1, 10)
+            if kind < 0.8:
+                batch.transfer(rng.randrange(size), rng.randrange(size),
+                               amount)
+            elif kind < 0.9:
+                batch.reward(rng.randrange(size), amount)
+            else:
+                batch.charge(rng.randrange(size), amount)
+        work.append(batch)
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = os.path.join(directory, 'ledger.jsonl')
+        rejected = 0
+        with Ledger(roster.snapshot(), log, sync) as ledger:
+            start = time.perf_counter()
+            for batch in work:
+                try:
+                    ledger.apply(batch)
+                except ValueError:
+                    rejected += 1
+            elapsed = time.perf_counter() - start
+        print(f"Applied {ledger.transactions:,} transactions in "
+              f"{ledger.batches:,} batches of {batch_size:,} to "
+              f"{size:,} characters in {elapsed:.2f}s "
+              f"({ledger.transactions / elapsed:,.0f}/s), "
+              f"{rejected:,} batches rejected")
+
+        characters = make_synthetic_characters(size)
+        start = time.perf_counter()
+        replayed = replay_log(log, characters)
+        elapsed = time.perf_counter() - start
+        print(f"Replayed {replayed.transactions:,} transactions in "
+              f"{elapsed:.2f}s ({replayed.transactions / elapsed:,.0f}/s)")
+    assert [character.get_wealth() for character in characters] == \
+        [character.get_wealth() for character in roster]
+    assert roster.wealth_statistics()[1] == \
+        sum(character.get_wealth() for character in characters)
+
+
+def main():
+    """
+    Parse command line arguments and run the chosen benchmark.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Character manager performance benchmarks.")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    readers = subparsers.add_parser(
+        'roster-readers', help="Concurrent Roster readers and a writer.")
+    readers.add_argument('--size', type=int, default=100000)
+    readers.add_argument(
+        '--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    readers.add_argument('--duration', type=float, default=2.0)
+
+    http_server = subparsers.add_parser(
+        'server', help="Requests per second of the HTTP service.")
+    http_server.add_argument('--size', type=int, default=10000)
+    http_server.add_argument('--clients', type=int, default=4)
+    http_server.add_argument('--requests', type=int, default=250)
+    http_server.add_argument('--batch-size', type=int, default=100)
+
+    fuzzy = subparsers.add_parser(
+        'fuzzy-search', help="Fuzzy name search latency.")
+    fuzzy.add_argument('--size', type=int, default=1000000)
+    fuzzy.add_argument('--queries', type=int, default=500)
+
+    autocomplete = subparsers.add_parser(
+        'autocomplete', help="Name prefix completion latency.")
+    autocomplete.add_argument('--size', type=int, default=1000000)
+    autocomplete.add_argument('--queries', type=int, default=1000)
+
+    file_formats = subparsers.add_parser(
+        'file-formats', help="CSV and JSON Lines save and load speed.")
+    file_formats.add_argument('--size', type=int, default=200000)
+
+    wealth = subparsers.add_parser(
+        'wealth-index', help="Wealth ranking query latency.")
+    wealth.add_argument('--size', type=int, default=1000000)
+    wealth.add_argument('--queries', type=int, default=1000)
+
+    sketches = subparsers.add_parser(
+        'sketches', help="One-pass streaming statistics of a file.")
+    sketches.add_argument('--size', type=int, default=1000000)
+    sketches.add_argument('--workers', type=int, default=4)
+
+    partitions = subparsers.add_parser(
+        'partitions', help="Partition-filtered loads and totals.")
+    partitions.add_argument('--size', type=int, default=300000)
+
+    pushdown = subparsers.add_parser(
+        'pushdown', help="Filtered and projected file loads.")
+    pushdown.add_argument('--size', type=int, default=300000)
+
+    scan = subparsers.add_parser(
+        'scan', help="Aggregate scans straight over a file.")
+    scan.add_argument('--size', type=int, default=1000000)
+
+    cache = subparsers.add_parser(
+        'cache', help="Loading a roster file from the parsed cache.")
+    cache.add_argument('--size', type=int, default=1000000)
+
+    load_errors = subparsers.add_parser(
+        'load-errors', help="Loading files with many invalid rows.")
+    load_errors.add_argument('--size', type=int, default=300000)
+    load_errors.add_argument('--bad-fraction', type=float, default=0.2)
+
+    undo = subparsers.add_parser(
+        'undo', help="Undoing and redoing a large load.")
+    undo.add_argument('--size', type=int, default=10000)
+    undo.add_argument('--loaded', type=int, default=1000000)
+
+    diff = subparsers.add_parser(
+        'diff', help="Diffing and merging two roster files.")
+    diff.add_argument('--size', type=int, default=1000000)
+    diff.add_argument('--changed', type=float, default=0.05)
+
+    shared = subparsers.add_parser(
+        'shared-roster', help="Parallel queries over shared memory.")
+    shared.add_argument('--size', type=int, default=1000000)
+    shared.add_argument(
+        '--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    shared.add_argument('--repeats', type=int, default=10)
+
+    sort = subparsers.add_parser(
+        'sort', help="Sorting a roster file within a memory budget.")
+    sort.add_argument('--size', type=int, default=1000000)
+    sort.add_argument(
+        '--memory-mb', type=int, nargs='+', default=[16, 64, 1024])
+
+    combat = subparsers.add_parser(
+        'combat', help="Simulated warrior and mage encounters.")
+    combat.add_argument('--size', type=int, default=100000)
+    combat.add_argument('--encounters', type=int, default=5000000)
+    combat.add_argument(
+        '--party-sizes', type=int, nargs='+', default=[1, 3])
+
+    matchmaking = subparsers.add_parser(
+        'matchmaking', help="Forming skill-balanced parties.")
+    matchmaking.add_argument('--size', type=int, default=100000)
+    matchmaking.add_argument('--arrivals', type=int, default=100)
+    matchmaking.add_argument('--same-race', action='store_true')
+
+    ledger = subparsers.add_parser(
+        'ledger', help="Wealth transactions through a logging ledger.")
+    ledger.add_argument('--size', type=int, default=1000000)
+    ledger.add_argument('--batch-size', type=int, default=1000)
+    ledger.add_argument('--batches', type=int, default=500)
+    ledger.add_argument('--sync', action='store_true')
+
+    args = parser.parse_args()
+    if args.benchmark == 'roster-readers':
+        benchmark_roster_readers(args.size, args.threads, args.duration)
+    elif args.benchmark == 'server':
+        benchmark_server(
+            args.size, args.clients, args.requests, args.batch_size)
+    elif args.benchmark == 'fuzzy-search':
+        benchmark_fuzzy_search(args.size, args.queries)
+    elif args.benchmark == 'autocomplete':
+        benchmark_autocomplete(args.size, args.queries)
+    elif args.benchmark == 'file-formats':
+        benchmark_file_formats(args.size)
+    elif args.benchmark == 'wealth-index':
+        benchmark_wealth_index(args.size, args.queries)
+    elif args.benchmark == 'sketches':
+        benchmark_sketches(args.size, args.workers)
+    elif args.benchmark == 'partitions':
+        benchmark_partitions(args.size)
+    elif args.benchmark == 'pushdown':
+        benchmark_pushdown(args.size)
+    elif args.benchmark == 'scan':
+        benchmark_scan(args.size)
+    elif args.benchmark == 'cache':
+        benchmark_cache(args.size)
+    elif args.benchmark == 'load-errors':
+        benchmark_load_errors(args.size, args.bad_fraction)
+    elif args.benchmark == 'undo':
+        benchmark_undo(args.size, args.loaded)
+    elif args.benchmark == 'diff':
+        benchmark_diff(args.size, args.changed)
+    elif args.benchmark == 'shared-roster':
+        benchmark_shared_roster(args.size, args.workers, args.repeats)
+    elif args.benchmark == 'sort':
+        benchmark_sort(args.size, args.memory_mb)
+    elif args.benchmark == 'combat':
+        benchmark_combat(args.size, args.encounters, args.party_sizes)
+    elif args.benchmark == 'matchmaking':
+        benchmark_matchmaking(args.size, args.arrivals, args.same_race)
+    elif args.benchmark == 'ledger':
+        benchmark_ledger(args.size, args.batch_size, args.batches,
+                         args.sync)
+
+
+if __name__ == "__main__":
+    main()
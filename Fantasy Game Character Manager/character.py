@@ -6,6 +6,8 @@ This module defines the Character class which serves as the base class
 for all character types in the game.
 """
 
+import weakref
+from character_registry import register_character_class
 from validators import (
     validate_name, validate_race, validate_role,
     validate_skill_level, validate_wealth
@@ -20,6 +22,14 @@ class Character:
     All character attributes are validated upon creation and modification.
     """
 
+    # Weak references to the objects told about this character's wealth
+    # changes through their wealth_changed(character, old_wealth,
+    # new_wealth) method, such as the rosters holding it, so indexes
+    # keyed on wealth stay up to date. An observer needs no unregistering
+    # when it is discarded. The class default covers characters made
+    # without __init__, such as those read from the roster cache.
+    _wealth_observers = ()
+
     def __init__(self, name, race, role, skill_level, wealth):
         """
         Initialize a Character object with validated attributes.
@@ -35,6 +45,7 @@ class Character:
         self._role = None
         self._skill_level = None
         self._wealth = None
+        self._wealth_observers = ()
 
         # Use setters for validation
         self.set_name(name)
@@ -119,7 +130,85 @@ class Character:
         the character's wealth in gold coins (positive number)
         :return: None
         """
+        old_wealth = self._wealth
         self._wealth = validate_wealth(wealth)
+        if old_wealth is not None:
+            for reference in self._wealth_observers:
+                observer = reference()
+                if observer is not None:
+                    observer.wealth_changed(self, old_wealth, self._wealth)
+
+    @staticmethod
+    def set_wealth_many(updates):
+        """
+        Set the wealth of many characters with validation, telling each
+        observer about all the changes of its characters in one call to
+        its wealth_changed_many(changes) method if it has one. No wealth
+        is set if any is invalid. A character given more than once takes
+        its last wealth, as if each were set in turn, and is reported
+        once.
+        :param updates: iterable, (Character, wealth) pairs
+        :return: None
+        """
+        latest = {}
+        for character, wealth in updates:
+            latest[id(character)] = (character, validate_wealth(wealth))
+        changes = [(character, character._wealth, wealth)
+                   for character, wealth in latest.values()]
+        by_observer = {}
+        for change in changes:
+            character, old_wealth, wealth = change
+            character._wealth = wealth
+            if old_wealth is None:
+                continue
+            for reference in character._wealth_observers:
+                by_observer.setdefault(reference, []).append(change)
+        for reference, observed in by_observer.items():
+            observer = reference()
+            if observer is None:
+                continue
+            changed_many = getattr(observer, 'wealth_changed_many', None)
+            if changed_many is not None:
+                changed_many(observed)
+                continue
+            for change in observed:
+                observer.wealth_changed(*change)
+
+    def add_wealth_observer(self, observer):
+        """
+        Tell an object about this character's wealth changes, through
+        its wealth_changed method. Adding an observer twice has no
+        effect. The observer is held weakly.
+        :param observer: object, the observer, such as a Roster
+        :return: None
+        """
+        reference = weakref.ref(observer)
+        if not self._wealth_observers:
+            self._wealth_observers = (reference,)
+        elif reference not in self._wealth_observers:
+            self._wealth_observers = tuple(
+                known for known in self._wealth_observers
+                if known() is not None) + (reference,)
+
+    def remove_wealth_observer(self, observer):
+        """
+        Stop telling an object about this character's wealth changes.
+        :param observer: object, an observer added before
+        :return: None
+        """
+        self._wealth_observers = tuple(
+            reference for reference in self._wealth_observers
+            if reference() not in (observer, None))
+
+    def __getstate__(self):
+        """
+        Get the attributes to copy or pickle a character with; copies
+        are not held by the original's observers.
+        :return: dict, the character's attributes
+        """
+        state = self.__dict__.copy()
+        state.pop('_wealth_observers', None)
+        return state
 
     def __str__(self):
         """
@@ -131,3 +220,9 @@ class Character:
                 f"Role           : {self._role}\n"
                 f"Skill Level    : {self._skill_level}\n"
                 f"Wealth         : {self._wealth} Gold coins")
+
+
+# Characters of roles without their own class are saved and created as
+# plain Characters
+register_character_class(
+    Character, None, ['name', 'race', 'role', 'skill_level', 'wealth'])
@@ -10,9 +10,14 @@ a graphical user interface for creating new characters in fantasy game.
 import tkinter as tk
 from tkinter import ttk, messagebox
 import re
-from character import Character
-from warrior import Warrior
-from mage import Mage
+from character_registry import codec_for_role
+
+
+# Milliseconds to wait after the last keystroke before suggesting names
+AUTOCOMPLETE_DELAY_MS = 150
+
+# Maximum number of name suggestions shown below the name entry
+AUTOCOMPLETE_LIMIT = 5
 
 
 class CharacterCreationGUI:
@@ -23,25 +28,40 @@ class CharacterCreationGUI:
     role-specific fields, and character object creation.
     """
 
-    def __init__(self):
+    def __init__(self, name_completer=None, master=None):
         """
         Initialize the character creation GUI window.
         Sets up all GUI components, binds events, and configures the window.
+        :param name_completer: callable or None, called with (prefix, limit)
+        and returning (name, count) tuples of existing names to suggest
+        :param master: tk widget or None, parent window; when given the
+        form is a reusable child window which is hidden rather than
+        destroyed when closed, otherwise it owns its own Tk root
         :return: None
         """
         self.result = None
-        self.root = tk.Tk()
+        self.results = []
+        self.name_completer = name_completer
+        self._autocomplete_job = None
+        self._suggested_names = []
+        self._owns_root = master is None
+        self.root = tk.Tk() if master is None else tk.Toplevel(master)
         self.root.title("Add New Character")
-        self.root.geometry("470x550")
+        self.root.geometry("470x600")
         self.root.resizable(False, False)
+        self._done = tk.BooleanVar(self.root, value=False)
 
         # Set up window close protocol
         self.root.protocol("WM_DELETE_WINDOW", self.cancel)
 
         # Make window modal and bring to front
-        self.root.transient()
-        self.root.grab_set()
-        self.root.focus_force()
+        if self._owns_root:
+            self.root.transient()
+            self.root.grab_set()
+            self.root.focus_force()
+        else:
+            # Stay hidden until run() is called
+            self.root.withdraw()
 
         # Bind keyboard shortcuts
         self.root.bind('<Escape>', lambda event: self.cancel())
@@ -67,6 +87,18 @@ class CharacterCreationGUI:
         self.name_entry.grid(
             row=1, column=1, sticky=tk.W, padx=(10, 0), pady=5)
 
+        # Existing-name suggestions, shown over the form below the entry
+        self.suggestion_list = tk.Listbox(
+            main_frame, height=AUTOCOMPLETE_LIMIT, exportselection=False,
+            activestyle='none')
+        self.suggestion_list.bind(
+            '<<ListboxSelect>>', self.on_suggestion_selected)
+        self.name_entry.bind('<KeyRelease>', self.on_name_typed)
+        self.name_entry.bind(
+            '<FocusOut>',
+            lambda event: self.root.after(
+                AUTOCOMPLETE_DELAY_MS, self.hide_suggestions))
+
         # Race
         ttk.Label(
             main_frame, text="Race:"
@@ -171,9 +203,106 @@ class CharacterCreationGUI:
             button_frame, text="Cancel",
             command=self.cancel).pack(side=tk.LEFT)
 
+        # Rapid entry: keep the form open after each character
+        self.another_var = tk.BooleanVar(self.root, value=False)
+        ttk.Checkbutton(
+            main_frame, text="Create another after this one",
+            variable=self.another_var).grid(row=9, column=0, columnspan=2)
+        self.status_var = tk.StringVar(self.root)
+        ttk.Label(main_frame, textvariable=self.status_var).grid(
+            row=10, column=0, columnspan=2, pady=(10, 0))
+
         # Initially hide role-specific frames
         self.hide_role_frames()
 
+    def set_name_completer(self, name_completer):
+        """
+        Replace the function used to suggest existing names.
+        :param name_completer: callable or None, called with (prefix, limit)
+        and returning (name, count) tuples of existing names
+        :return: None
+        """
+        self.name_completer = name_completer
+
+    def reset(self, keep_selections=False):
+        """
+        Clear the form so it can be used for another character.
+        :param keep_selections: bool, keep the race, role, skill level and
+        role-specific dropdown choices for rapid entry of similar
+        characters; typed fields are always cleared
+        :return: None
+        """
+        self.name_var.set('')
+        self.wealth_var.set('')
+        self.mana_var.set('')
+        self.hide_suggestions()
+        if not keep_selections:
+            for var in (self.race_var, self.role_var, self.skill_var,
+                        self.weapon_var, self.armour_var, self.spell_var):
+                var.set('')
+            self.hide_role_frames()
+            self.status_var.set('')
+        self.name_entry.focus_set()
+
+    def on_name_typed(self, event=None):
+        """
+        Schedule a suggestion update once typing pauses, so fast typing
+        only queries the existing names once.
+        :param event: tkinter event object, optional key release event
+        :return: None
+        """
+        if self._autocomplete_job is not None:
+            self.root.after_cancel(self._autocomplete_job)
+        self._autocomplete_job = self.root.after(
+            AUTOCOMPLETE_DELAY_MS, self.update_suggestions)
+
+    def update_suggestions(self):
+        """
+        Show existing names starting with the text in the name entry.
+        :return: None
+        """
+        self._autocomplete_job = None
+        prefix = self.name_var.get().strip()
+        suggestions = []
+        if self.name_completer and prefix and \
+                re.match("^[a-zA-Z]+$", prefix):
+            suggestions = self.name_completer(prefix, AUTOCOMPLETE_LIMIT)
+        if not suggestions:
+            self.hide_suggestions()
+            return
+
+        self._suggested_names = [name for name, count in suggestions]
+        self.suggestion_list.delete(0, tk.END)
+        for name, count in suggestions:
+            label = name if count == 1 else f"{name} ({count} exist)"
+            self.suggestion_list.insert(tk.END, label)
+        self.suggestion_list.configure(height=len(suggestions))
+        self.suggestion_list.place(
+            in_=self.name_entry, relx=0, rely=1, relwidth=1)
+        self.suggestion_list.lift()
+
+    def on_suggestion_selected(self, event=None):
+        """
+        Copy the chosen suggestion into the name entry.
+        :param event: tkinter event object, optional listbox event
+        :return: None
+        """
+        selection = self.suggestion_list.curselection()
+        if not selection:
+            return
+        self.name_var.set(self._suggested_names[selection[0]])
+        self.hide_suggestions()
+        self.name_entry.focus_set()
+        self.name_entry.icursor(tk.END)
+
+    def hide_suggestions(self):
+        """
+        Hide the name suggestion list.
+        :return: None
+        """
+        self.suggestion_list.selection_clear(0, tk.END)
+        self.suggestion_list.place_forget()
+
     def on_role_changed(self, event=None):
         """
         Handle role selection change to show appropriate role-specific fields.
@@ -300,24 +429,31 @@ class CharacterCreationGUI:
             skill_level = self.skill_var.get()
             wealth = self.wealth_var.get().strip()
 
-            # Create appropriate character object
-            if role.lower() == 'warrior':
-                weapon = self.weapon_var.get()
-                armour = self.armour_var.get()
-                character = Warrior(
-                    name, race, skill_level, wealth, weapon, armour)
-            elif role.lower() == 'mage':
-                spell = self.spell_var.get()
-                mana_points = int(self.mana_var.get().strip())
-                character = Mage(
-                    name, race, skill_level, wealth, spell, mana_points)
-            else:
-                character = Character(name, race, role, skill_level, wealth)
+            # Create an object of the class registered for the role,
+            # with the role-specific fields that class takes
+            codec = codec_for_role(role)
+            row = {'name': name, 'race': race, 'role': role,
+                   'skill_level': skill_level, 'wealth': wealth}
+            role_vars = {'weapon': self.weapon_var,
+                         'armour': self.armour_var,
+                         'spell': self.spell_var,
+                         'mana_points': self.mana_var}
+            for field in codec.extra_fields:
+                row[field] = role_vars[field].get().strip()
+            character = codec.create(row)
 
             self.result = character
+            self.results.append(character)
+            if self.another_var.get():
+                # Skip the dialog so entry can carry straight on
+                self.status_var.set(
+                    f"Created '{character.get_name()}' "
+                    f"({len(self.results)} this session)")
+                self.reset(keep_selections=True)
+                return
             messagebox.showinfo(
                 "Success", f"Character '{name}' created successfully!")
-            self.root.destroy()
+            self.close()
 
         except ValueError as e:
             messagebox.showerror("Character Creation Error", str(e))
@@ -325,19 +461,50 @@ class CharacterCreationGUI:
     def cancel(self):
         """
         Cancel character creation and close the window.
-        Sets result to None and destroys the GUI window.
+        Sets result to None and closes the GUI window; characters already
+        created in "create another" mode are kept in results.
         :return: None
         """
         self.result = None
-        self.root.destroy()
+        self.close()
+
+    def close(self):
+        """
+        Close the window: destroy it if it owns its root, otherwise hide
+        it so it can be shown again by the next run().
+        :return: None
+        """
+        if self._autocomplete_job is not None:
+            self.root.after_cancel(self._autocomplete_job)
+            self._autocomplete_job = None
+        if self._owns_root:
+            self.root.destroy()
+            return
+        self.root.grab_release()
+        self.root.withdraw()
+        self._done.set(True)
 
     def run(self):
         """
         Run the GUI and return the created character.
         Starts the main event loop and returns the character object or None
-        if cancelled.
+        if cancelled. Every character created in this run, including
+        those from "create another" mode, is also left in results.
         :return: Character object or None, the created character or None
         if cancelled
         """
-        self.root.mainloop()
+        self.result = None
+        self.results = []
+        if self._owns_root:
+            self.root.mainloop()
+            return self.result
+
+        self.reset()
+        self.root.deiconify()
+        self.root.lift()
+        self.root.grab_set()
+        self.root.focus_force()
+        self.name_entry.focus_set()
+        self._done.set(False)
+        self.root.wait_variable(self._done)
         return self.result
@@ -0,0 +1,224 @@
+# character_registry.py
+
+"""
+Registry of character classes for the character management system.
+
+Each character class registers a CharacterCodec describing the role it
+plays, the fields it is saved with and the order its constructor takes
+them in. File reading and writing, the console prompts and the creation
+form all find the class to build or the fields to save through the
+registry, so choosing the codec is one dictionary lookup per row and a
+new character type only has to register itself to be saved, loaded and
+created everywhere.
+
+Registered fields must be columns of the roster files (see
+file_manager.FIELDNAMES). The built-in classes are imported, and so
+registered, by the first lookup, so no other module has to import them
+for their side effect.
+"""
+
+from operator import attrgetter, itemgetter
+
+# Fields every character has, in file column order
+BASE_FIELDS = ('name', 'race', 'role', 'skill_level', 'wealth')
+
+# Codecs by class, by class name, and by lowercase role for the
+# role-specific classes
+_CLASS_CODECS = {}
+_NAMED_CODECS = {}
+_ROLE_CODECS = {}
+
+# Codec of the class used for any role without a complete specific row
+_base_codec = None
+
+# Whether the modules of the built-in classes have been imported
+_builtins_loaded = False
+
+
+def _tuple_getter(getter, count):
+    """
+    Make an itemgetter or attrgetter always return a tuple, as it
+    returns a bare value when given a single name.
+    :param getter: callable, the getter
+    :param count: int, the number of names the getter was given
+    :return: callable, returning a tuple
+    """
+    if count == 1:
+        return lambda item: (getter(item),)
+    return getter
+
+
+def _load_builtin_classes():
+    """
+    Import the modules of the built-in character classes, which register
+    the classes as they are imported.
+    :return: None
+    """
+    global _builtins_loaded
+    _builtins_loaded = True
+    import character  # noqa: F401
+    import warrior  # noqa: F401
+    import mage  # noqa: F401
+
+
+class CharacterCodec:
+    """
+    Conversion between one character class and rows of field values.
+    The attribute and argument getters are built once, when the class is
+    registered, so converting a row runs no Python-level loop over the
+    fields. Field values are read from the attributes behind the get_
+    methods, named by prefixing the field with an underscore.
+    """
+
+    def __init__(self, cls, role, arguments):
+        """
+        Initialize a CharacterCodec.
+        :param cls: type, the character class
+        :param role: str or None, the role the class is created for;
+        None for a class that accepts any role
+        :param arguments: list, the field names in the order the class's
+        constructor takes them
+        """
+        self.cls = cls
+        self.role = role
+        self.arguments = tuple(arguments)
+        self.extra_fields = tuple(field for field in self.arguments
+                                  if field not in BASE_FIELDS)
+        self.fields = BASE_FIELDS + self.extra_fields
+        self._values = _tuple_getter(
+            attrgetter(*('_' + field for field in self.fields)),
+            len(self.fields))
+        self._pick = _tuple_getter(itemgetter(*self.arguments),
+                                   len(self.arguments))
+        self._pick_extras = _tuple_getter(
+            itemgetter(*self.extra_fields), len(self.extra_fields)) \
+            if self.extra_fields else lambda row: ()
+
+    def encode(self, character):
+        """
+        Get a character's field values.
+        :param character: Character, an object of the codec's class
+        :return: tuple, the values in the order of fields
+        """
+        return self._values(character)
+
+    def create(self, row):
+        """
+        Create a character from field values.
+        Raises ValueError if any field fails validation.
+        :param row: dict, the field values keyed by field name; must
+        hold every constructor argument
+        :return: Character, an object of the codec's class
+        """
+        return self.cls(*self._pick(row))
+
+    def is_complete(self, row):
+        """
+        Check whether a row has every role-specific field filled in.
+        :param row: dict, the field values keyed by field name; must
+        hold every role-specific field
+        :return: bool, True if no role-specific field is empty
+        """
+        return all(self._pick_extras(row))
+
+
+def register_character_class(cls, role, arguments):
+    """
+    Register a character class, so it is saved, loaded and created by
+    every part of the program. Register the base class with role None.
+    :param cls: type, the character class
+    :param role: str or None, the role the class is created for
+    :param arguments: list, the field names in constructor order
+    :return: CharacterCodec, the codec of the class
+    """
+    global _base_codec
+    codec = CharacterCodec(cls, role, arguments)
+    _CLASS_CODECS[cls] = codec
+    _NAMED_CODECS[cls.__name__] = codec
+    if role is None:
+        _base_codec = codec
+    else:
+        _ROLE_CODECS[role.lower()] = codec
+    return codec
+
+
+def codec_for_character(character):
+    """
+    Get the codec of a character's class. An unregistered subclass uses
+    the codec of its nearest registered ancestor.
+    Raises TypeError if no class of the character is registered.
+    :param character: Character, the character
+    :return: CharacterCodec, the codec to save the character with
+    """
+    cls = type(character)
+    codec = _CLASS_CODECS.get(cls)
+    if codec is None:
+        for ancestor in cls.__mro__[1:]:
+            codec = _CLASS_CODECS.get(ancestor)
+            if codec is not None:
+                _CLASS_CODECS[cls] = codec
+                break
+        else:
+            raise TypeError(f"{cls.__name__} is not a registered "
+                            f"character class.")
+    return codec
+
+
+def codec_for_class_name(name):
+    """
+    Get the codec of a registered class by the class's name.
+    :param name: str, the name of the class
+    :return: CharacterCodec or None, the codec, or None if no registered
+    class has that name
+    """
+    if not _builtins_loaded:
+        _load_builtin_classes()
+    return _NAMED_CODECS.get(name)
+
+
+def codec_for_role(role):
+    """
+    Get the codec of the class created for a role.
+    :param role: str, the role name in any case
+    :return: CharacterCodec, the role's codec, or the base class codec
+    for roles without their own class
+    """
+    if not _builtins_loaded:
+        _load_builtin_classes()
+    return _ROLE_CODECS.get((role or '').lower(), _base_codec)
+
+
+def codec_for_row(row):
+    """
+    Get the codec to create a character from a row: the role's class if
+    the row fills in its role-specific fields, otherwise the base class.
+    :param row: dict, the field values keyed by field name
+    :return: CharacterCodec, the codec to create the character with
+    """
+    if not _builtins_loaded:
+        _load_builtin_classes()
+    codec = _ROLE_CODECS.get((row['role'] or '').lower())
+    if codec is not None and codec.is_complete(row):
+        return codec
+    return _base_codec
+
+
+def is_registered_role(role):
+    """
+    Check whether a role has its own character class.
+    :param role: str, the role name in any case
+    :return: bool, True if a class is registered for the role
+    """
+    if not _builtins_loaded:
+        _load_builtin_classes()
+    return role.lower() in _ROLE_CODECS
+
+
+def registered_roles():
+    """
+    Get the roles with their own character class.
+    :return: list, the role names in registration order
+    """
+    if not _builtins_loaded:
+        _load_builtin_classes()
+    return [codec.role for codec in _ROLE_CODECS.values()]
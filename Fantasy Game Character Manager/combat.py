@@ -0,0 +1,529 @@
+# combat.py
+
+"""
+Combat between characters, one fight at a time or millions at once.
+
+A character's attack power comes from its weapon or spell (bare hands
+for characters without one) plus its skill level; a mage's power also
+grows with its mana points. Armour stops part of each attack, depending
+on what it is hit with: plate turns swords well but conducts lightning.
+In a fight, each side's power after the other side's armour is
+multiplied by a random roll, and the larger result wins. In a party
+fight the members face the opposing member in the same place in the
+party, and the results of the party members are added up.
+
+fight and party_fight resolve a single fight between Character objects.
+simulate resolves many random encounters between two pools of
+characters, such as every warrior against every mage. Characters with
+the same profile (role, weapon, armour, spell and skill level) and
+power fight alike, so each pool is reduced to combat classes, and each
+batch of encounters is computed a column at a time with map over the
+operator functions, with the random pairings and rolls taken from one
+getrandbits call per column. The per-encounter work then runs in C
+rather than in a Python loop. In one-on-one encounters the chance that
+one product of power and roll beats the other is known exactly, so it
+is worked out once per pair of classes and each encounter takes a
+single roll against it; party encounters roll and add up every attack.
+Results are tallied per profile for win-rate reports.
+
+The same seed, pools and batch size always give the same results.
+"""
+
+import argparse
+import random
+import time
+from array import array
+from collections import Counter
+from itertools import repeat
+from operator import add, gt, mod, mul, not_
+from character_registry import codec_for_character
+from file_manager import load_characters_from_file
+
+# Attack power of each weapon and spell, and of bare hands (None)
+ATTACK_POWER = {
+    None: 2.0,
+    'Sword': 6.0,
+    'Axe': 7.0,
+    'Fireball': 8.0,
+    'Lightning': 7.0,
+}
+
+# Share of an attack stopped by each armour, by what the attack is made
+# with; negative when the armour makes it worse
+ARMOUR_WARD = {
+    None: {None: 0.0, 'Sword': 0.0, 'Axe': 0.0, 'Fireball': 0.0,
+           'Lightning': 0.0},
+    'Chainmail': {None: 0.2, 'Sword': 0.3, 'Axe': 0.15, 'Fireball': 0.1,
+                  'Lightning': 0.0},
+    'Plate': {None: 0.4, 'Sword': 0.45, 'Axe': 0.3, 'Fireball': 0.25,
+              'Lightning': -0.15},
+}
+
+# Attack power added per skill level
+SKILL_POWER = 1.5
+
+# A mage's power is multiplied by MANA_BASE + mana points / 100
+MANA_BASE = 0.5
+
+# Encounters computed per batch by simulate
+SIMULATION_BATCH = 100000
+
+# Most pairs of combat classes that one-on-one encounters are decided
+# from a table of win chances for; beyond it every attack is rolled
+DUEL_TABLE_PAIRS = 2 ** 20
+
+# Attributes that win rates are reported by
+REPORT_ATTRIBUTES = ('role', 'weapon', 'armour', 'spell', 'skill_level')
+
+# Codes of attacks and armours in the column arrays
+_ATTACKS = list(ATTACK_POWER)
+_ARMOURS = list(ARMOUR_WARD)
+
+# Share of an attack left after armour, by attack code * armour count +
+# armour code
+_WARD_FACTORS = [1.0 - ARMOUR_WARD[armour][attack]
+                 for attack in _ATTACKS for armour in _ARMOURS]
+
+# Bits in a random roll
+_ROLL_BITS = 32
+
+
+def _fields(character):
+    """
+    Get a character's field values, including the role-specific ones.
+    :param character: Character, the character
+    :return: dict, field name -> value for the fields of its class
+    """
+    codec = codec_for_character(character)
+    return dict(zip(codec.fields, codec.encode(character)))
+
+
+def _profile(fields):
+    """
+    Get the attributes of a character that affect combat.
+    :param fields: dict, the character's field values
+    :return: tuple, the character's values of REPORT_ATTRIBUTES, None
+    for those it does not have
+    """
+    return (fields['role'], fields.get('weapon'), fields.get('armour'),
+            fields.get('spell'), int(fields['skill_level']))
+
+
+def _power(fields):
+    """
+    Get a character's attack power before armour.
+    :param fields: dict, the character's field values
+    :return: float, the attack power
+    """
+    power = ATTACK_POWER[fields.get('weapon') or fields.get('spell')] + \
+        SKILL_POWER * int(fields['skill_level'])
+    if fields.get('mana_points') is not None:
+        power *= MANA_BASE + fields['mana_points'] / 100
+    return power
+
+
+def attack_power(character):
+    """
+    Get a character's attack power before armour.
+    :param character: Character, the character
+    :return: float, the attack power
+    """
+    return _power(_fields(character))
+
+
+def _strike(attacker, defender, roll):
+    """
+    Compute the result of one character's attack on another.
+    :param attacker: Character, the attacking character
+    :param defender: Character, the defending character
+    :param roll: int, the random roll, below 2 ** _ROLL_BITS
+    :return: float, the attack's result; larger is better
+    """
+    fields = _fields(attacker)
+    attack = fields.get('weapon') or fields.get('spell')
+    armour = _fields(defender).get('armour')
+    factor = _WARD_FACTORS[_ATTACKS.index(attack) * len(_ARMOURS) +
+                           _ARMOURS.index(armour)]
+    return _power(fields) * factor * roll
+
+
+def party_fight(first_party, second_party, rng=None):
+    """
+    Resolve a fight between two parties of equal size; each member
+    fights the member in the same place in the other party.
+    Raises ValueError if the parties are empty or of different sizes.
+    :param first_party: list, Character objects
+    :param second_party: list, Character objects
+    :param rng: random.Random or None, source of the rolls; the random
+    module's generator by default
+    :return: tuple, (the winning party, first party's result, second
+    party's result)
+    """
+    if not first_party or len(first_party) != len(second_party):
+        raise ValueError("Parties must be non-empty and of equal size.")
+    rng = rng or random
+    first_total = 0.0
+    second_total = 0.0
+    for first, second in zip(first_party, second_party):
+        first_total += _strike(first, second, rng.getrandbits(_ROLL_BITS))
+        second_total += _strike(second, first, rng.getrandbits(_ROLL_BITS))
+    winner = first_party if first_total > second_total else second_party
+    return winner, first_total, second_total
+
+
+def fight(first, second, rng=None):
+    """
+    Resolve a fight between two characters.
+    :param first: Character, the first fighter
+    :param second: Character, the second fighter
+    :param rng: random.Random or None, source of the rolls
+    :return: Character, the winner
+    """
+    return party_fight([first], [second], rng)[0][0]
+
+
+class _FighterColumns:
+    """
+    A pool of characters as columns for batch combat. Characters with
+    the same profile and attack power fight alike, so they share a
+    combat class; the pool keeps each character's class number and the
+    power, codes and profile of each class.
+    """
+
+    def __init__(self, characters):
+        """
+        Initialize _FighterColumns.
+        Raises ValueError if there are no characters.
+        :param characters: iterable, Character objects
+        """
+        self.fighters = []
+        self.power = []
+        self.attack = []
+        self.armour = []
+        self.profiles = []
+        classes = {}
+        for character in characters:
+            fields = _fields(character)
+            profile = _profile(fields)
+            power = _power(fields)
+            number = classes.get((profile, power))
+            if number is None:
+                number = classes[profile, power] = len(self.profiles)
+                self.profiles.append(profile)
+                self.power.append(power)
+                self.attack.append(
+                    _ATTACKS.index(profile[1] or profile[3]) *
+                    len(_ARMOURS))
+                self.armour.append(_ARMOURS.index(profile[2]))
+            self.fighters.append(number)
+        if not self.fighters:
+            raise ValueError("Both sides need at least one character.")
+
+    def draw(self, rng, count, numbers=None):
+        """
+        Draw a column of random characters, with replacement.
+        :param rng: random.Random, the generator
+        :param count: int, how many characters to draw
+        :param numbers: list or None, a number for each character to
+        return instead of its class number
+        :return: iterable, the numbers of the characters drawn
+        """
+        numbers = numbers or self.fighters
+        return map(numbers.__getitem__,
+                   _random_column(rng, count, len(numbers)))
+
+
+class CombatReport:
+    """
+    Tallies of simulated encounters: how often each side won, and the
+    fights and wins of each character profile on each side.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty CombatReport.
+        """
+        self.encounters = 0
+        self.wins = [0, 0]
+        self._tallies = [Counter(), Counter()]
+
+    def record(self, side, profile, won, count):
+        """
+        Add fights of one profile on one side.
+        :param side: int, 0 for the first side and 1 for the second
+        :param profile: tuple, the fighters' values of REPORT_ATTRIBUTES
+        :param won: bool, whether the fights were won
+        :param count: int, the number of fights
+        :return: None
+        """
+        self._tallies[side][profile, bool(won)] += count
+
+    def win_rates(self, side, attribute):
+        """
+        Get the win rates of one side by the value of an attribute.
+        Raises ValueError if the attribute is not in REPORT_ATTRIBUTES.
+        :param side: int, 0 for the first side and 1 for the second
+        :param attribute: str, one of REPORT_ATTRIBUTES
+        :return: dict, value -> (fights, wins, win rate), for values
+        other than None, in order of value
+        """
+        if attribute not in REPORT_ATTRIBUTES:
+            raise ValueError(f"Unknown attribute '{attribute}'.")
+        index = REPORT_ATTRIBUTES.index(attribute)
+        fights = Counter()
+        wins = Counter()
+        for (profile, won), count in self._tallies[side].items():
+            value = profile[index]
+            if value is not None:
+                fights[value] += count
+                if won:
+                    wins[value] += count
+        return {value: (fights[value], wins[value],
+                        wins[value] / fights[value])
+                for value in sorted(fights)}
+
+
+def _random_column(rng, count, below=None):
+    """
+    Draw a column of random numbers with one call to the generator.
+    :param rng: random.Random, the generator
+    :param count: int, how many numbers to draw
+    :param below: int or None, bound to reduce the numbers below, by
+    remainder; None for full _ROLL_BITS rolls
+    :return: iterable, the numbers
+    """
+    column = array('I')
+    column.frombytes(rng.getrandbits(_ROLL_BITS * count).to_bytes(
+        column.itemsize * count, 'little'))
+    if below is None:
+        return column
+    return map(mod, column, repeat(below))
+
+
+def _win_threshold(first_result, second_result):
+    """
+    Get the chance that the first of two attacks wins when each is
+    multiplied by an independent uniform roll, as a threshold for a
+    single roll: the first wins when a roll is below it.
+    :param first_result: float, the first attack's power after armour
+    :param second_result: float, the second attack's power after armour
+    :return: int, the chance scaled to 2 ** _ROLL_BITS
+    """
+    if first_result >= second_result:
+        chance = 1 - second_result / (2 * first_result)
+    else:
+        chance = first_result / (2 * second_result)
+    return round(chance * 2 ** _ROLL_BITS)
+
+
+def _duel_table(first, second):
+    """
+    Build the win thresholds of every pair of combat classes.
+    :param first: _FighterColumns, the first pool
+    :param second: _FighterColumns, the second pool
+    :return: list, thresholds by (first class * second class count +
+    second class) * 2
+    """
+    table = []
+    for power, attack, armour in zip(first.power, first.attack,
+                                     first.armour):
+        for other_power, other_attack, other_armour in zip(
+                second.power, second.attack, second.armour):
+            threshold = _win_threshold(
+                power * _WARD_FACTORS[attack + other_armour],
+                other_power * _WARD_FACTORS[other_attack + armour])
+            # Doubled, so adding a 0/1 win gives a unique tally key
+            table += (threshold, threshold)
+    return table
+
+
+def _simulate_duels(sides, table, keys, rng, count, tallies):
+    """
+    Resolve a batch of one-on-one encounters with one roll each, against
+    the win threshold of the fighters' pair of classes.
+    :param sides: tuple, the two _FighterColumns
+    :param table: list, the pools' _duel_table
+    :param keys: tuple, for each pool a list of each character's part
+    of its pair's index in the table
+    :param rng: random.Random, the generator
+    :param count: int, the number of encounters
+    :param tallies: tuple, two Counters; the first is given the
+    encounters by table index + 1 for a first side win
+    :return: int, the first side's wins
+    """
+    first, second = sides
+    pairs = list(map(add, first.draw(rng, count, keys[0]),
+                     second.draw(rng, count, keys[1])))
+    first_won = list(map(gt, map(table.__getitem__, pairs),
+                         _random_column(rng, count)))
+    tallies[0].update(map(add, pairs, first_won))
+    return sum(first_won)
+
+
+def _strike_column(attackers, first, defenders, second, rolls):
+    """
+    Compute the results of a column of attacks.
+    :param attackers: _FighterColumns, the attacking pool
+    :param first: list, the attackers' class numbers
+    :param defenders: _FighterColumns, the defending pool
+    :param second: list, the defenders' class numbers
+    :param rolls: iterable, the random rolls
+    :return: iterable, the attack results
+    """
+    factors = map(_WARD_FACTORS.__getitem__, map(
+        add, map(attackers.attack.__getitem__, first),
+        map(defenders.armour.__getitem__, second)))
+    return map(mul, map(mul, map(attackers.power.__getitem__, first),
+                        factors), rolls)
+
+
+def _simulate_parties(sides, party_size, rng, count, tallies):
+    """
+    Resolve a batch of encounters by rolling every attack and adding up
+    the results of each party.
+    :param sides: tuple, the two _FighterColumns
+    :param party_size: int, the members on each side of an encounter
+    :param rng: random.Random, the generator
+    :param count: int, the number of encounters
+    :param tallies: tuple, a Counter per side, given the fights by
+    class number * 2 + 1 for a win
+    :return: int, the first side's wins
+    """
+    members = [[list(side.draw(rng, count)) for side in sides]
+               for _ in range(party_size)]
+    totals = [None, None]
+    for first, second in members:
+        for side, (ours, theirs) in enumerate(((first, second),
+                                               (second, first))):
+            results = _strike_column(sides[side], ours, sides[1 - side],
+                                     theirs, _random_column(rng, count))
+            totals[side] = results if totals[side] is None \
+                else map(add, totals[side], results)
+    first_won = list(map(gt, *totals))
+    for party in members:
+        for side, won in ((0, first_won), (1, map(not_, first_won))):
+            tallies[side].update(map(add, map(mul, party[side], repeat(2)),
+                                     won))
+    return sum(first_won)
+
+
+def simulate(first_side, second_side, encounters, party_size=1,
+             seed=None, batch_size=SIMULATION_BATCH):
+    """
+    Simulate random encounters between two pools of characters. Each
+    encounter draws a party of party_size members from each pool (with
+    replacement) and resolves a party fight.
+    Raises ValueError if a pool is empty or party_size is below 1.
+    :param first_side: iterable, Character objects of the first side,
+    such as every warrior
+    :param second_side: iterable, Character objects of the second side
+    :param encounters: int, the number of encounters
+    :param party_size: int, the members on each side of an encounter
+    :param seed: int or None, seed of the random rolls and pairings
+    :param batch_size: int, encounters computed at a time
+    :return: CombatReport, the tallies of the encounters
+    """
+    if party_size < 1:
+        raise ValueError("Parties need at least one member.")
+    sides = (_FighterColumns(first_side), _FighterColumns(second_side))
+    table = keys = None
+    width = len(sides[1].profiles)
+    if party_size == 1 and len(sides[0].profiles) * width <= \
+            DUEL_TABLE_PAIRS:
+        table = _duel_table(*sides)
+        keys = ([number * width * 2 for number in sides[0].fighters],
+                [number * 2 for number in sides[1].fighters])
+    rng = random.Random(seed)
+    report = CombatReport()
+    tallies = (Counter(), Counter())
+    while report.encounters < encounters:
+        count = min(batch_size, encounters - report.encounters)
+        if table is not None:
+            wins = _simulate_duels(sides, table, keys, rng, count, tallies)
+        else:
+            wins = _simulate_parties(sides, party_size, rng, count,
+                                     tallies)
+        report.encounters += count
+        report.wins[0] += wins
+        report.wins[1] += count - wins
+
+    if table is not None:
+        for key, number in tallies[0].items():
+            first_class, second_class = divmod(key >> 1, width)
+            won = key & 1
+            report.record(0, sides[0].profiles[first_class], won, number)
+            report.record(1, sides[1].profiles[second_class], not won,
+                          number)
+    else:
+        for side, tally in enumerate(tallies):
+            for key, number in tally.items():
+                report.record(side, sides[side].profiles[key >> 1],
+                              key & 1, number)
+    return report
+
+
+def display_report(report, labels=('First side', 'Second side')):
+    """
+    Display the win rates of a simulation.
+    :param report: CombatReport, the tallies to display
+    :param labels: tuple, the names of the two sides
+    :return: None
+    """
+    if not report.encounters:
+        print("\nNo encounters simulated.")
+        print()
+        return
+    print(f"\n{'='*15} COMBAT SIMULATION {'='*15}")
+    print(f"Encounters            : {report.encounters:,}")
+    for side, label in enumerate(labels):
+        print(f"{label} wins: {report.wins[side]:,} "
+              f"({report.wins[side] / report.encounters:.1%})")
+    for side, label in enumerate(labels):
+        for attribute in REPORT_ATTRIBUTES[1:]:
+            rates = report.win_rates(side, attribute)
+            if not rates:
+                continue
+            print(f"{label} by {attribute.replace('_', ' ')}:")
+            for value, (fights, _, rate) in rates.items():
+                print(f"    {value!s:<10} {rate:6.1%} of {fights:,} fights")
+    print("="*50)
+    print()
+
+
+def main():
+    """
+    Parse command line arguments and simulate encounters between the
+    warriors and the mages of a roster file.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Simulate battles between warriors and mages.")
+    parser.add_argument('filename', help="the CSV or JSON Lines file")
+    parser.add_argument('--encounters', type=int, default=1000000)
+    parser.add_argument('--party-size', type=int, default=1)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    try:
+        characters = load_characters_from_file(args.filename)
+    except OSError as e:
+        print(f"Error loading characters from file: {e}")
+        return
+    warriors = [character for character in characters
+                if 'weapon' in codec_for_character(character).fields]
+    mages = [character for character in characters
+             if 'spell' in codec_for_character(character).fields]
+    try:
+        start = time.perf_counter()
+        report = simulate(warriors, mages, args.encounters,
+                          args.party_size, args.seed)
+        elapsed = time.perf_counter() - start
+    except ValueError as e:
+        print(f"Error simulating battles: {e}")
+        return
+    display_report(report, ('Warriors', 'Mages'))
+    print(f"{report.encounters / elapsed:,.0f} encounters per second")
+
+
+if __name__ == "__main__":
+    main()
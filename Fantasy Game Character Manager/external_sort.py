@@ -0,0 +1,244 @@
+# external_sort.py
+
+"""
+Sorting of roster files larger than memory.
+
+This module sorts the characters of a CSV or JSON Lines roster file by
+any of its fields and writes them to a new file, holding no more rows in
+memory than a given budget allows. Rows are read as raw text, validated
+with the same validators as a load, and sorted a run at a time; runs
+that do not fit in the budget are spilled to temporary files and merged
+back with a heap, a batch of each run in memory at a time. Runs beyond
+SORT_MERGE_WIDTH are merged in several passes, so any file size can be
+sorted with a bounded number of open files.
+
+Invalid rows are recorded and left out, so the sorted file only holds
+rows that load cleanly. The sort is stable: characters with equal keys
+keep their order from the input file.
+"""
+
+import argparse
+import heapq
+import os
+import tempfile
+from operator import itemgetter
+from file_manager import (
+    FIELDNAMES, OPTIONAL_FIELDS, iter_raw_rows, validate_raw_row
+)
+from load_errors import LoadErrors
+from roster_diff import read_batches, write_batch, write_rows
+
+# Memory used for rows being sorted, by default
+SORT_MEMORY_BYTES = 256 * 1024 * 1024
+
+# Estimated memory taken by one validated row and its sort key
+SORT_ROW_BYTES = 512
+
+# Most runs merged at once; more are merged in several passes
+SORT_MERGE_WIDTH = 64
+
+# Fields compared as numbers
+_NUMBER_FIELDS = ('skill_level',)
+
+
+def sort_key(key_fields):
+    """
+    Build a function getting the sort key of a validated row. Skill
+    levels compare as numbers, and empty role-specific fields sort after
+    filled ones (before them in reverse order).
+    Raises ValueError if a key field is not a roster column.
+    :param key_fields: tuple, the fields to sort by, most significant
+    first
+    :return: callable, taking a row tuple and returning its key
+    """
+    for field in key_fields:
+        if field not in FIELDNAMES:
+            raise ValueError(f"Unknown sort column '{field}'.")
+    indices = [FIELDNAMES.index(field) for field in key_fields]
+    plain = not any(field in OPTIONAL_FIELDS or field in _NUMBER_FIELDS
+                    for field in key_fields)
+    if plain:
+        return itemgetter(*indices)
+
+    def parts(values):
+        for field, index in zip(key_fields, indices):
+            value = values[index]
+            if field in _NUMBER_FIELDS:
+                yield int(value)
+            elif field in OPTIONAL_FIELDS:
+                yield value is None
+                yield value or 0
+            else:
+                yield value
+
+    return lambda values: tuple(parts(values))
+
+
+def _valid_rows(filename, errors):
+    """
+    Read and validate every row of a roster file.
+    Raises OSError if the file cannot be opened.
+    :param filename: str, path of the CSV or JSON Lines file
+    :param errors: LoadErrors, collector for the invalid rows
+    :return: generator, yields validated row tuples in file order
+    """
+    for values in iter_raw_rows(filename, errors):
+        try:
+            yield validate_raw_row(values)
+        except ValueError as e:
+            errors.record(None, e, dict(zip(FIELDNAMES, values)))
+
+
+def _write_run(rows, path, batch_rows):
+    """
+    Write a sorted run to a temporary file in batches.
+    :param rows: iterable, row tuples in sorted order
+    :param path: str, the run file to create
+    :param batch_rows: int, rows per batch
+    :return: str, the path
+    """
+    with open(path, 'wb') as file:
+        batch = []
+        for values in rows:
+            batch.append(values)
+            if len(batch) >= batch_rows:
+                write_batch(batch, file)
+                batch.clear()
+        if batch:
+            write_batch(batch, file)
+    return path
+
+
+def sorted_rows(filename, key_fields=('name',), reverse=False,
+                memory_bytes=SORT_MEMORY_BYTES, errors=None):
+    """
+    Stream the valid rows of a roster file in sorted order. The whole
+    file is read before the first row is returned.
+    Raises OSError if the file cannot be read and ValueError if a key
+    field is unknown.
+    :param filename: str, path of the CSV or JSON Lines file
+    :param key_fields: tuple, the fields to sort by
+    :param reverse: bool, sort in descending order
+    :param memory_bytes: int, the memory to use for rows being sorted
+    :param errors: LoadErrors or None, collector for the invalid rows;
+    by default a few are printed and a summary follows the read
+    :return: generator, yields validated row tuples in FIELDNAMES order
+    """
+    key = sort_key(tuple(key_fields))
+    report = errors is None
+    if report:
+        errors = LoadErrors(fieldnames=FIELDNAMES)
+    run_rows = max(SORT_MERGE_WIDTH, memory_bytes // SORT_ROW_BYTES)
+    batch_rows = run_rows // SORT_MERGE_WIDTH
+
+    with tempfile.TemporaryDirectory() as directory:
+        runs = []
+        run = []
+        for values in _valid_rows(filename, errors):
+            run.append(values)
+            if len(run) >= run_rows:
+                run.sort(key=key, reverse=reverse)
+                runs.append(_write_run(
+                    run, os.path.join(directory, f"{len(runs)}.run"),
+                    batch_rows))
+                run = []
+        run.sort(key=key, reverse=reverse)
+        if report:
+            errors.report()
+        if not runs:
+            yield from run
+            return
+        if run:
+            runs.append(_write_run(
+                run, os.path.join(directory, f"{len(runs)}.run"),
+                batch_rows))
+        del run
+
+        passes = 0
+        while len(runs) > SORT_MERGE_WIDTH:
+            passes += 1
+            merged = []
+            for start in range(0, len(runs), SORT_MERGE_WIDTH):
+                group = runs[start:start + SORT_MERGE_WIDTH]
+                merged.append(_write_run(
+                    heapq.merge(*map(read_batches, group), key=key,
+                                reverse=reverse),
+                    os.path.join(directory, f"{passes}.{len(merged)}.run"),
+                    batch_rows))
+                for path in group:
+                    os.remove(path)
+            runs = merged
+        yield from heapq.merge(*map(read_batches, runs), key=key,
+                               reverse=reverse)
+
+
+def sort_file(input_filename, output_filename, key_fields=('name',),
+              reverse=False, memory_bytes=SORT_MEMORY_BYTES, errors=None):
+    """
+    Sort the characters of a roster file into a CSV or JSON Lines file,
+    chosen by its extension. Invalid rows are left out. The output is
+    written to a temporary file that replaces it once complete, so it
+    may be the input file.
+    Raises OSError if a file cannot be read or written and ValueError if
+    a key field is unknown.
+    :param input_filename: str, path of the CSV or JSON Lines file
+    :param output_filename: str, path of the file to create; may be the
+    input file
+    :param key_fields: tuple, the fields to sort by
+    :param reverse: bool, sort in descending order
+    :param memory_bytes: int, the memory to use for rows being sorted
+    :param errors: LoadErrors or None, collector for the invalid rows
+    :return: int, number of characters written
+    """
+    descriptor, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(output_filename)),
+        suffix=os.path.splitext(output_filename)[1])
+    os.close(descriptor)
+    try:
+        count = write_rows(sorted_rows(input_filename, key_fields, reverse,
+                                       memory_bytes, errors), temporary)
+        # mkstemp creates owner-only files; match a normal save
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, output_filename)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    return count
+
+
+def main():
+    """
+    Parse command line arguments and sort a roster file.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Sort a roster file, even one larger than memory.")
+    parser.add_argument('input', help="the CSV or JSON Lines file to sort")
+    parser.add_argument('output', help="the CSV or JSON Lines file to "
+                                       "write")
+    parser.add_argument(
+        '--by', nargs='+', default=['name'], choices=FIELDNAMES,
+        help="fields to sort by, most significant first (default: name)")
+    parser.add_argument('--reverse', action='store_true',
+                        help="sort in descending order")
+    parser.add_argument(
+        '--memory-mb', type=int, default=SORT_MEMORY_BYTES // 2 ** 20,
+        help="memory to use for rows being sorted")
+    parser.add_argument('--rejects', metavar='FILE',
+                        help="write the rows that fail validation to FILE")
+    args = parser.parse_args()
+
+    errors = LoadErrors(rejected_filename=args.rejects,
+                        fieldnames=FIELDNAMES)
+    try:
+        count = sort_file(args.input, args.output, args.by, args.reverse,
+                          args.memory_mb * 2 ** 20, errors)
+        print(f"Sorted {count:,} character(s) into {args.output}")
+    except (OSError, ValueError) as e:
+        print(f"Error sorting file: {e}")
+    finally:
+        errors.report()
+
+
+if __name__ == "__main__":
+    main()
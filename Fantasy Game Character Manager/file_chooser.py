@@ -1,39 +1,52 @@
 # file_chooser.py
 
 from tkinter.filedialog import askopenfilename, asksaveasfilename
+from gui_session import gui_session
 
 
-def choose_open_file(message="Choose a file"):
+def choose_open_file(message="Choose a file", parent=None):
 
     """
     Display a file chooser dialog for opening files.
     :param message: str, the title text for the dialog box
+    :param parent: tk widget or None, window owning the dialog; defaults
+    to the shared GUI session root so no temporary root is created
     :return: str, the chosen file name, or empty string if "Cancel" is pressed
     """
 
     FILETYPE = (
         ('Comma Separated Values', '*.csv'),
+        ('JSON Lines', '*.jsonl'),
         ('All Files', '*.*')
     )
 
-    filename = askopenfilename(title=message, filetypes=FILETYPE)
+    if parent is None:
+        parent = gui_session.get_root()
+    filename = askopenfilename(
+        parent=parent, title=message, filetypes=FILETYPE)
     return filename
 
 
-def choose_save_file(message="Save file as"):
+def choose_save_file(message="Save file as", parent=None):
     """
     Display a file chooser dialog for saving files.
     :param message: str, the title text for the dialog box
+    :param parent: tk widget or None, window owning the dialog; defaults
+    to the shared GUI session root so no temporary root is created
     :return: str, the chosen file name for saving, or empty string
     if "Cancel" is pressed
     """
 
     FILETYPE = (
         ('Comma Separated Values', '*.csv'),
+        ('JSON Lines', '*.jsonl'),
         ('All Files', '*.*')
     )
 
+    if parent is None:
+        parent = gui_session.get_root()
     filename = asksaveasfilename(
+        parent=parent,
         title=message,
         filetypes=FILETYPE,
         defaultextension='.csv'
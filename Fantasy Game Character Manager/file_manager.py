@@ -3,22 +3,607 @@
 """
 File management utilities for character data persistence.
 
-This module handles saving and loading character data to/from CSV files.
-It provides functions to serialize character objects to CSV format and
-deserialize CSV data back to character objects.
+This module handles saving and loading character data to/from CSV files
+and JSON Lines files (one JSON object per line). It provides functions to
+serialize character objects to either format and deserialize the data
+back to character objects; the format is chosen from the file extension.
+Large rosters can also be saved partitioned: one file per race and role
+in a directory with a manifest, so a load can read only the partitions
+it needs and totals can be answered from the manifest alone.
 """
 
+import asyncio
 import csv
-from character import Character
-from warrior import Warrior
-from mage import Mage
+import json
+import os
+import threading
+from character_registry import codec_for_character, codec_for_row
+from validators import (
+    validate_name, validate_race, validate_role, validate_skill_level,
+    validate_wealth, validate_weapon, validate_armour, validate_spell,
+    validate_mana_points
+)
 from file_chooser import choose_open_file, choose_save_file
+from load_errors import LoadErrors, MALFORMED
 
 
-def save_characters_to_file(characters):
+# Column order used for every roster CSV file
+FIELDNAMES = [
+    'name',
+    'race',
+    'role',
+    'skill_level',
+    'wealth',
+    'weapon',
+    'armour',
+    'spell',
+    'mana_points'
+    ]
+
+# Validator for each column, used when rows are read as plain values
+FIELD_VALIDATORS = {
+    'name': validate_name,
+    'race': validate_race,
+    'role': validate_role,
+    'skill_level': validate_skill_level,
+    'wealth': validate_wealth,
+    'weapon': validate_weapon,
+    'armour': validate_armour,
+    'spell': validate_spell,
+    'mana_points': validate_mana_points,
+    }
+
+# Row with every column empty, filled in by character_to_dict
+EMPTY_ROW = dict.fromkeys(FIELDNAMES, '')
+
+# Role-specific columns, empty for characters of other roles
+OPTIONAL_FIELDS = ('weapon', 'armour', 'spell', 'mana_points')
+
+# Validators of each codec's columns in FIELDNAMES order, None for the
+# columns its class does not save; filled in by _row_validators
+_CODEC_ROW_VALIDATORS = {}
+
+# File extensions saved and loaded as JSON Lines rather than CSV
+JSON_LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+
+# Name of the file describing the partitions of a partitioned save
+PARTITION_MANIFEST = 'manifest.json'
+
+# Default number of rows handed between threads in the async variants
+ASYNC_BATCH_SIZE = 1000
+
+# Default number of batches allowed to wait in the async queues
+ASYNC_MAX_QUEUED_BATCHES = 4
+
+
+def character_to_dict(character):
+    """
+    Convert a Character object to a dictionary for CSV writing.
+    The fields come from the codec registered for the character's class;
+    columns the class does not have are left empty.
+    :param character: Character, the character to convert
+    :return: dict, the character's fields keyed by CSV column name
+    """
+    codec = codec_for_character(character)
+    character_dict = EMPTY_ROW.copy()
+    character_dict.update(zip(codec.fields, codec.encode(character)))
+    return character_dict
+
+
+def dict_to_character(row):
+    """
+    Create the appropriate character object from a CSV row, using the
+    class registered for its role, or Character if the role has no class
+    of its own or the row lacks the role-specific fields.
+    Numbers are passed on as text, so the validators report which field
+    failed and why.
+    Raises ValueError (a ValidationError naming the field) if any field
+    fails validation.
+    :param row: dict, the CSV row keyed by column name
+    :return: Character, Warrior or Mage object
+    """
+    return codec_for_row(row).create(row)
+
+
+def character_to_json(character):
+    """
+    Convert a Character object to a JSON-ready dictionary.
+    Numbers are kept as numbers and unused role-specific fields are left
+    out, so each record only carries what its character type has.
+    :param character: Character, the character to convert
+    :return: dict, the character's non-empty fields
+    """
+    data = character_to_dict(character)
+    data['skill_level'] = int(data['skill_level'])
+    return {field: value for field, value in data.items() if value != ''}
+
+
+def json_to_character(data):
+    """
+    Create the appropriate character object from a JSON object.
+    Raises ValueError if the object is malformed or fails validation.
+    :param data: dict, the character's fields keyed by CSV column name
+    :return: Character, Warrior or Mage object
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Each character must be a JSON object.")
+    row = {}
+    for field in FIELDNAMES:
+        value = data.get(field)
+        row[field] = '' if value is None else str(value)
+    return dict_to_character(row)
+
+
+def is_json_lines_file(filename):
+    """
+    Check whether a file should be read and written as JSON Lines.
+    :param filename: str, path of the file
+    :return: bool, True for .jsonl and .ndjson files
+    """
+    return filename.lower().endswith(JSON_LINES_EXTENSIONS)
+
+
+def write_characters_to_csv(characters, filename):
+    """
+    Write characters to a CSV file without any prompts or messages.
+    Raises OSError if the file cannot be written.
+    :param characters: iterable, Character objects to write
+    :param filename: str, path of the CSV file to create
+    :return: int, number of characters written
+    """
+    count = 0
+    with open(filename, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for character in characters:
+            writer.writerow(character_to_dict(character))
+            count += 1
+    return count
+
+
+def write_characters_to_jsonl(characters, filename):
+    """
+    Write characters to a JSON Lines file, one object per line, without
+    any prompts or messages.
+    Raises OSError if the file cannot be written.
+    :param characters: iterable, Character objects to write
+    :param filename: str, path of the JSON Lines file to create
+    :return: int, number of characters written
+    """
+    count = 0
+    encoder = json.JSONEncoder(separators=(',', ':'))
+    with open(filename, 'w') as file:
+        for character in characters:
+            file.write(encoder.encode(character_to_json(character)))
+            file.write('\n')
+            count += 1
+    return count
+
+
+def character_writer(filename):
+    """
+    Choose the writer for a file's format from its extension.
+    :param filename: str, path of the file, by which the format is chosen
+    :return: callable, write_characters_to_jsonl or
+    write_characters_to_csv
+    """
+    if is_json_lines_file(filename):
+        return write_characters_to_jsonl
+    return write_characters_to_csv
+
+
+def write_characters(characters, filename):
+    """
+    Write characters to a CSV or JSON Lines file depending on its
+    extension.
+    Raises OSError if the file cannot be written.
+    :param characters: iterable, Character objects to write
+    :param filename: str, path of the file to create
+    :return: int, number of characters written
+    """
+    return character_writer(filename)(characters, filename)
+
+
+def _own_errors(errors):
+    """
+    Get the error collector for a read, creating a default one when the
+    caller did not pass one.
+    :param errors: LoadErrors or None, the caller's collector
+    :return: tuple, (LoadErrors, True if it was created here and should
+    be reported when the read finishes)
+    """
+    if errors is None:
+        return LoadErrors(fieldnames=FIELDNAMES), True
+    return errors, False
+
+
+def _decode_json_row(decode, line):
+    """
+    Decode one JSON Lines record into a row of strings keyed by column.
+    Raises ValueError if the line is not a JSON object.
+    :param decode: callable, JSON decoding function
+    :param line: str, the line of text
+    :return: dict, the row with every column of FIELDNAMES
+    """
+    data = decode(line)
+    if not isinstance(data, dict):
+        raise ValueError("Each character must be a JSON object.")
+    return {field: '' if data.get(field) is None else str(data[field])
+            for field in FIELDNAMES}
+
+
+def _iter_json_characters(lines, errors, first_line=1):
+    """
+    Build characters from JSON Lines text, recording the lines that are
+    not valid JSON or fail validation in errors.
+    :param lines: iterable, the lines of text
+    :param errors: LoadErrors, collector for the failed lines
+    :param first_line: int or None, line number of the first line,
+    None if unknown
+    :return: generator, yields Character objects
+    """
+    decode = json.JSONDecoder().decode
+    if first_line is None:
+        numbered = ((None, line) for line in lines)
+    else:
+        numbered = enumerate(lines, first_line)
+    for line_number, line in numbered:
+        if not line.strip():
+            continue
+        try:
+            row = _decode_json_row(decode, line)
+        except ValueError as e:
+            errors.record(line_number, e, line, MALFORMED)
+            continue
+        try:
+            yield dict_to_character(row)
+        except ValueError as e:
+            errors.record(line_number, e, row)
+
+
+def iter_characters_from_jsonl(filename, errors=None):
+    """
+    Read characters from a JSON Lines file one line at a time, so memory
+    use does not grow with the file size.
+    Lines that are not valid JSON or fail validation are recorded in
+    errors and skipped; blank lines are ignored.
+    Raises OSError if the file cannot be opened.
+    :param filename: str, path of the JSON Lines file to read
+    :param errors: LoadErrors or None, collector for the failed lines;
+    by default a few are printed and a summary follows the read
+    :return: generator, yields Character objects
+    """
+    errors, report = _own_errors(errors)
+    with open(filename, 'r') as file:
+        yield from _iter_json_characters(file, errors)
+    if report:
+        errors.report()
+
+
+def iter_characters(filename, where=None, errors=None):
+    """
+    Read characters from a CSV or JSON Lines file depending on its
+    extension, optionally only those whose raw fields match a filter.
+    Rows are filtered before any validation or object construction.
+    Raises OSError if the file cannot be opened.
+    :param filename: str, path of the file to read
+    :param where: dict, callable or None, row filter; see _row_matcher
+    :param errors: LoadErrors or None, collector for the rows that fail
+    :return: generator, yields Character objects
+    """
+    if where is not None:
+        return _iter_matching_characters(filename, where, errors)
+    if is_json_lines_file(filename):
+        return iter_characters_from_jsonl(filename, errors)
+    return iter_characters_from_csv(filename, errors)
+
+
+def _raw_rows(filename, errors):
+    """
+    Read the rows of a CSV or JSON Lines file as lists of strings,
+    without validating them. The first item yielded is the header
+    naming the columns; every later item is a (line number, row) pair,
+    and JSON Lines rows follow FIELDNAMES order.
+    Lines that are not valid JSON are recorded in errors and skipped.
+    Raises OSError if the file cannot be opened.
+    :param filename: str, path of the file to read
+    :param errors: LoadErrors, collector for the malformed lines
+    :return: generator, yields the header and then one pair per row
+    """
+    if not is_json_lines_file(filename):
+        with open(filename, 'r', newline='') as file:
+            reader = csv.reader(file)
+            yield next(reader, FIELDNAMES)
+            for values in reader:
+                yield reader.line_num, values
+        return
+
+    yield FIELDNAMES
+    decode = json.JSONDecoder().decode
+    with open(filename, 'r') as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = _decode_json_row(decode, line)
+            except ValueError as e:
+                errors.record(line_number, e, line, MALFORMED)
+                continue
+            yield line_number, list(row.values())
+
+
+def _row_matcher(where, header):
+    """
+    Build a test of raw rows against a filter. The filter is either a
+    dictionary mapping column names to an allowed value or a collection
+    of allowed values, compared case-insensitively with the raw text
+    (for example {'role': 'Warrior', 'skill_level': 5}), or a function
+    taking the raw row as a dictionary of strings and returning a bool.
+    Raises ValueError if the filter names an unknown column.
+    :param where: dict or callable, the filter
+    :param header: list, the column names of the rows
+    :return: callable, taking a raw row list and returning a bool
+    """
+    if callable(where):
+        return lambda values: where(dict(zip(header, values)))
+
+    tests = []
+    for field, allowed in where.items():
+        if field not in header:
+            raise ValueError(f"Unknown column '{field}'.")
+        if isinstance(allowed, (str, int)):
+            allowed = [allowed]
+        tests.append((header.index(field),
+                      {str(value).lower() for value in allowed}))
+
+    def matches(values):
+        try:
+            for index, allowed in tests:
+                if values[index].lower() not in allowed:
+                    return False
+        except IndexError:
+            return False
+        return True
+    return matches
+
+
+def _iter_matching_characters(filename, where, errors=None):
+    """
+    Read the characters whose raw fields match a filter. Rows that do
+    not match are skipped before validation; matching rows that fail
+    validation are recorded in errors and skipped.
+    Raises OSError if the file cannot be opened and ValueError if the
+    filter names an unknown column.
+    :param filename: str, path of the CSV or JSON Lines file to read
+    :param where: dict or callable, the row filter
+    :param errors: LoadErrors or None, collector for the failed rows
+    :return: generator, yields Character objects
+    """
+    errors, report = _own_errors(errors)
+    rows = _raw_rows(filename, errors)
+    header = next(rows)
+    matches = _row_matcher(where, header)
+    for line_number, values in rows:
+        if not matches(values):
+            continue
+        row = dict.fromkeys(FIELDNAMES, '')
+        row.update(zip(header, values))
+        try:
+            yield dict_to_character(row)
+        except ValueError as e:
+            errors.record(line_number, e, row)
+    if report:
+        errors.report()
+
+
+def iter_raw_rows(filename, errors=None):
+    """
+    Read the rows of a CSV or JSON Lines file as lists of strings in
+    FIELDNAMES order, without validating them. Columns missing from the
+    file or a short row are empty strings, and blank lines are skipped.
+    Raises OSError if the file cannot be opened.
+    :param filename: str, path of the file to read
+    :param errors: LoadErrors or None, collector for the malformed lines
+    :return: generator, yields one list of strings per row
+    """
+    errors, report = _own_errors(errors)
+    rows = _raw_rows(filename, errors)
+    header = next(rows)
+    if header == FIELDNAMES:
+        for _, values in rows:
+            if len(values) == len(FIELDNAMES):
+                yield values
+            elif values:
+                yield (values + [''] * len(FIELDNAMES))[:len(FIELDNAMES)]
+    else:
+        indices = [header.index(field) if field in header else len(header)
+                   for field in FIELDNAMES]
+        for _, values in rows:
+            if values:
+                values = values[:len(header)]
+                values.extend([''] * (len(header) + 1 - len(values)))
+                yield [values[index] for index in indices]
+    if report:
+        errors.report()
+
+
+def _row_validators(codec):
+    """
+    Get the validator of each column a codec's class is created from.
+    :param codec: CharacterCodec, the codec chosen for a row
+    :return: tuple, a validator or None for each column in FIELDNAMES
+    order
+    """
+    validators = _CODEC_ROW_VALIDATORS.get(codec)
+    if validators is None:
+        validators = _CODEC_ROW_VALIDATORS[codec] = tuple(
+            FIELD_VALIDATORS[field] if field in codec.fields else None
+            for field in FIELDNAMES)
+    return validators
+
+
+def validate_raw_row(values):
+    """
+    Validate a row of raw text as read by iter_raw_rows. The columns
+    checked are those of the class the row would be loaded as, chosen
+    by codec_for_row as in dict_to_character, so a row is valid exactly
+    when it loads.
+    Raises ValueError if any field fails validation.
+    :param values: sequence, the row's strings in FIELDNAMES order
+    :return: tuple, the validated values, with wealth and mana points as
+    int and the role-specific fields the class does not save as None
+    """
+    validators = _row_validators(codec_for_row(dict(zip(FIELDNAMES,
+                                                         values))))
+    return tuple(None if validate is None else validate(value)
+                 for value, validate in zip(values, validators))
+
+
+def iter_rows(filename, columns, where=None, errors=None):
+    """
+    Read only some columns of a CSV or JSON Lines file as plain values,
+    without building Character objects. Rows are filtered on their raw
+    text first, and only the chosen columns of matching rows are
+    validated and converted (wealth and mana points to int). Empty
+    role-specific columns are returned as None. Rows that fail
+    validation are recorded in errors and skipped.
+    Raises OSError if the file cannot be opened and ValueError if a
+    column is unknown.
+    :param filename: str, path of the file to read
+    :param columns: list, the column names wanted
+    :param where: dict, callable or None, row filter; see _row_matcher
+    :param errors: LoadErrors or None, collector for the failed rows
+    :return: generator, yields one dictionary per row keyed by column
+    """
+    errors, report = _own_errors(errors)
+    rows = _raw_rows(filename, errors)
+    header = next(rows)
+    fields = []
+    for column in columns:
+        if column not in FIELD_VALIDATORS or column not in header:
+            raise ValueError(f"Unknown column '{column}'.")
+        fields.append((column, header.index(column),
+                       FIELD_VALIDATORS[column], column in OPTIONAL_FIELDS))
+    matches = None if where is None else _row_matcher(where, header)
+
+    for line_number, values in rows:
+        if matches is not None and not matches(values):
+            continue
+        row = {}
+        try:
+            for column, index, validate, optional in fields:
+                value = values[index] if index < len(values) else ''
+                row[column] = None if optional and not value \
+                    else validate(value)
+        except ValueError as e:
+            errors.record(line_number, e, dict(zip(header, values)))
+            continue
+        yield row
+    if report:
+        errors.report()
+
+
+def iter_characters_from_csv(filename, errors=None):
+    """
+    Read characters from a CSV file one row at a time.
+    Rows that fail validation are recorded in errors and skipped.
+    Raises OSError if the file cannot be opened.
+    :param filename: str, path of the CSV file to read
+    :param errors: LoadErrors or None, collector for the failed rows;
+    by default a few are printed and a summary follows the read
+    :return: generator, yields Character objects
     """
-    Save character list to CSV file using GUI file chooser.
+    errors, report = _own_errors(errors)
+    with open(filename, 'r', newline='') as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            try:
+                yield dict_to_character(row)
+            except ValueError as e:
+                errors.record(reader.line_num, e, row)
+    if report:
+        errors.report()
+
+
+def split_file(filename, chunk_count):
+    """
+    Divide a roster file into byte ranges of whole lines of about equal
+    size, so the parts can be read in parallel by separate processes.
+    The CSV header line is not part of any range.
+    Raises OSError if the file cannot be opened.
+    :param filename: str, path of the CSV or JSON Lines file
+    :param chunk_count: int, the number of ranges wanted
+    :return: list, of (start, end) byte offsets; fewer than chunk_count
+    if the file has too few lines
+    """
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as file:
+        first = 0 if is_json_lines_file(filename) else len(file.readline())
+        bounds = [first]
+        for i in range(1, chunk_count):
+            target = first + (size - first) * i // chunk_count
+            if target <= bounds[-1]:
+                continue
+            # Move the boundary to the start of the next line
+            file.seek(target - 1)
+            file.readline()
+            if file.tell() >= size:
+                break
+            if file.tell() > bounds[-1]:
+                bounds.append(file.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:])
+            if start < end]
+
+
+def iter_characters_from_range(filename, start, end, errors=None):
+    """
+    Read the characters in one byte range of a roster file, as produced
+    by split_file. Rows that fail validation are recorded in errors and
+    skipped; their row numbers are unknown, since the lines before the
+    range are not counted.
+    Raises OSError if the file cannot be opened.
+    :param filename: str, path of the CSV or JSON Lines file
+    :param start: int, offset of the first line of the range
+    :param end: int, offset just past the last line of the range
+    :param errors: LoadErrors or None, collector for the failed rows
+    :return: generator, yields Character objects
+    """
+    def read_lines(file):
+        file.seek(start)
+        position = start
+        while position < end:
+            line = file.readline()
+            if not line:
+                return
+            position += len(line)
+            yield line.decode()
+
+    errors, report = _own_errors(errors)
+    with open(filename, 'rb') as file:
+        header = None if is_json_lines_file(filename) else \
+            next(csv.reader([file.readline().decode()]))
+        lines = read_lines(file)
+        if header is None:
+            for character in _iter_json_characters(lines, errors, None):
+                yield character
+        else:
+            for row in csv.DictReader(lines, fieldnames=header):
+                try:
+                    yield dict_to_character(row)
+                except ValueError as e:
+                    errors.record(None, e, row)
+    if report:
+        errors.report()
+
+
+def save_characters_to_file(characters, filename=None):
+    """
+    Save character list to a CSV or JSON Lines file using GUI file
+    chooser.
     :param characters: list, list of Character objects to save to file
+    :param filename: str or None, file to save to; the file chooser is
+    shown when no filename is given
     :return: bool, True if save was successful, False if cancelled or failed
     """
     if not characters:
@@ -27,54 +612,15 @@ def save_characters_to_file(characters):
         return False
 
     # Use GUI file chooser
-    filename = choose_save_file("Save Characters to File")
+    if filename is None:
+        filename = choose_save_file("Save Characters to File")
     if not filename:
         print("Save cancelled.")
         print()
         return False
 
     try:
-        with open(filename, 'w', newline='') as file:
-            fieldnames = [
-                'name',
-                'race',
-                'role',
-                'skill_level',
-                'wealth',
-                'weapon',
-                'armour',
-                'spell',
-                'mana_points'
-                ]
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-
-            # Convert Character objects to dictionaries for CSV writing
-            character_dicts = []
-            for character in characters:
-                character_dict = {
-                    'name': character.get_name(),
-                    'race': character.get_race(),
-                    'role': character.get_role(),
-                    'skill_level': character.get_skill_level(),
-                    'wealth': character.get_wealth(),
-                    'weapon': '',
-                    'armour': '',
-                    'spell': '',
-                    'mana_points': ''
-                }
-
-                # Add specialized attributes based on character type
-                if isinstance(character, Warrior):
-                    character_dict['weapon'] = character.get_weapon()
-                    character_dict['armour'] = character.get_armour()
-                elif isinstance(character, Mage):
-                    character_dict['spell'] = character.get_spell()
-                    character_dict['mana_points'] = character.get_mana_points()
-
-                character_dicts.append(character_dict)
-
-            writer.writerows(character_dicts)
+        write_characters(characters, filename)
         print(f"Characters saved successfully to {filename}")
         print()
         return True
@@ -84,59 +630,46 @@ def save_characters_to_file(characters):
         return False
 
 
-def load_characters_from_file():
+def load_characters_from_file(filename=None, where=None, cache=None,
+                              rejected_filename=None):
     """
-    Load characters from CSV file using GUI file chooser.
+    Load characters from a CSV or JSON Lines file using GUI file
+    chooser. The first few rows that fail validation are printed, then a
+    count of the failures by field and error code.
+    :param filename: str or None, file to load from; the file chooser is
+    shown when no filename is given
+    :param where: dict, callable or None, only load rows matching this
+    filter, which is applied before validation; see iter_characters
+    :param cache: RosterCache or None, cache of parsed files to use for
+    unfiltered loads
+    :param rejected_filename: str or None, CSV file to write the rows
+    that fail validation to; such loads do not use the cache
     :return: list, list of loaded Character objects, empty list
     if cancelled or failed
     """
     # Use GUI file chooser
-    filename = choose_open_file("Load Characters from File")
+    if filename is None:
+        filename = choose_open_file("Load Characters from File")
     if not filename:
         print("Load cancelled.")
         print()
         return []
 
+    errors = LoadErrors(rejected_filename=rejected_filename,
+                        fieldnames=FIELDNAMES)
     try:
-        loaded_characters = []
-        with open(filename, 'r', newline='') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                try:
-                    # Create specialized character objects from CSV data
-                    if row['role'].lower() == 'warrior' and \
-                            row['weapon'] and row['armour']:
-                        character = Warrior(
-                            row['name'],
-                            row['race'],
-                            row['skill_level'],
-                            int(row['wealth']),
-                            row['weapon'],
-                            row['armour']
-                        )
-                    elif row['role'].lower() == 'mage' and \
-                            row['spell'] and row['mana_points']:
-                        character = Mage(
-                            row['name'],
-                            row['race'],
-                            row['skill_level'],
-                            int(row['wealth']),
-                            row['spell'],
-                            int(row['mana_points'])
-                        )
-                    else:
-                        # Fallback to base Character class for incomplete
-                        character = Character(
-                            row['name'],
-                            row['race'],
-                            row['role'],
-                            row['skill_level'],
-                            int(row['wealth'])
-                        )
-                    loaded_characters.append(character)
-                except ValueError as e:
-                    print(f"Error loading character from file: {e}")
-                    continue
+        if cache is not None and where is None and \
+                rejected_filename is None:
+            loaded_characters = cache.load(
+                filename, lambda name: iter_characters(name, errors=errors))
+        else:
+            loaded_characters = list(
+                iter_characters(filename, where, errors))
+        errors.report()
+        if not loaded_characters:
+            print(f"No characters could be loaded from {filename}.")
+            print()
+            return []
 
         print(f"Characters loaded successfully from {filename}")
         print(f"Loaded {len(loaded_characters)} characters.")
@@ -150,3 +683,307 @@ def load_characters_from_file():
         print(f"Error loading file: {e}")
         print()
         return []
+    finally:
+        errors.close()
+
+
+def save_partitioned_characters(characters, directory, extension='.csv'):
+    """
+    Save characters to a directory with one file per race and role,
+    plus a manifest recording each partition's file, row count and
+    wealth total, minimum and maximum. Partition files of an earlier
+    save that are no longer needed are removed.
+    :param characters: list, list of Character objects to save
+    :param directory: str, the directory to save to, created if needed
+    :param extension: str, '.csv' or a JSON Lines extension for the
+    partition files
+    :return: bool, True if save was successful, False if failed
+    """
+    if not characters:
+        print("No characters to save.")
+        print()
+        return False
+
+    partitions = {}
+    for character in characters:
+        key = (character.get_race(), character.get_role())
+        partitions.setdefault(key, []).append(character)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        try:
+            old_files = {partition.get('file') for partition
+                         in read_partition_manifest(directory)
+                         if isinstance(partition, dict)}
+        except (OSError, ValueError):
+            old_files = set()
+        # Only plain file names inside the directory are ever removed,
+        # whatever a stale or edited manifest lists
+        old_files = {file for file in old_files
+                     if isinstance(file, str) and
+                     file not in ('', os.curdir, os.pardir,
+                                  PARTITION_MANIFEST) and
+                     os.path.basename(file) == file}
+
+        manifest = []
+        for (race, role), members in sorted(partitions.items()):
+            file = f"{race}_{role}{extension}".lower()
+            write_characters(members, os.path.join(directory, file))
+            wealth = [character.get_wealth() for character in members]
+            manifest.append({
+                'race': race,
+                'role': role,
+                'file': file,
+                'count': len(members),
+                'total_wealth': sum(wealth),
+                'min_wealth': min(wealth),
+                'max_wealth': max(wealth),
+            })
+
+        # Replace the manifest in one step so readers never see half
+        manifest_path = os.path.join(directory, PARTITION_MANIFEST)
+        with open(manifest_path + '.tmp', 'w') as file:
+            json.dump({'partitions': manifest}, file, indent=2)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+        for file in old_files - {partition['file'] for partition
+                                 in manifest}:
+            os.remove(os.path.join(directory, file))
+        print(f"Characters saved successfully to {directory} "
+              f"in {len(manifest)} partition(s)")
+        print()
+        return True
+    except Exception as e:
+        print(f"Error saving partitions: {e}")
+        print()
+        return False
+
+
+def read_partition_manifest(directory, races=None, roles=None):
+    """
+    Read the manifest of a partitioned save, optionally keeping only
+    some races and roles.
+    Raises OSError if the manifest cannot be read and ValueError if it
+    is malformed.
+    :param directory: str, the directory of the partitioned save
+    :param races: iterable or None, races to keep, in any case; None
+    keeps every race
+    :param roles: iterable or None, roles to keep, in any case; None
+    keeps every role
+    :return: list, of partition dictionaries with keys race, role, file,
+    count, total_wealth, min_wealth and max_wealth
+    """
+    with open(os.path.join(directory, PARTITION_MANIFEST)) as file:
+        try:
+            partitions = json.load(file)['partitions']
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Malformed partition manifest: {e}")
+    if races is not None:
+        races = {race.capitalize() for race in races}
+        partitions = [partition for partition in partitions
+                      if partition['race'] in races]
+    if roles is not None:
+        roles = {role.capitalize() for role in roles}
+        partitions = [partition for partition in partitions
+                      if partition['role'] in roles]
+    return partitions
+
+
+def load_partitioned_characters(directory, races=None, roles=None):
+    """
+    Load characters from a partitioned save, reading only the partition
+    files of the chosen races and roles.
+    :param directory: str, the directory of the partitioned save
+    :param races: iterable or None, races to load; None loads every race
+    :param roles: iterable or None, roles to load; None loads every role
+    :return: list, list of loaded Character objects, empty list if failed
+    """
+    try:
+        partitions = read_partition_manifest(directory, races, roles)
+        loaded_characters = []
+        for partition in partitions:
+            loaded_characters.extend(iter_characters(
+                os.path.join(directory, partition['file'])))
+        if not loaded_characters:
+            print(f"No characters could be loaded from {directory}.")
+            print()
+            return []
+
+        print(f"Characters loaded successfully from {directory}")
+        print(f"Loaded {len(loaded_characters)} characters from "
+              f"{len(partitions)} partition(s).")
+        print()
+        return loaded_characters
+    except FileNotFoundError as e:
+        print(f"File {e.filename} not found.")
+        print()
+        return []
+    except Exception as e:
+        print(f"Error loading partitions: {e}")
+        print()
+        return []
+
+
+def _read_batches(filename, queue, loop, batch_size):
+    """
+    Worker thread body for async_load_characters_from_file.
+    Parses the file in batches and hands each batch to the event loop
+    through a bounded asyncio queue, blocking while the queue is full.
+    A final None marks the end of the stream; an exception object is
+    sent instead if reading fails.
+    :param filename: str, path of the CSV or JSON Lines file to read
+    :param queue: asyncio.Queue, bounded queue owned by the event loop
+    :param loop: asyncio event loop that owns the queue
+    :param batch_size: int, number of characters per batch
+    :return: None
+    """
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    try:
+        batch = []
+        for character in iter_characters(filename):
+            batch.append(character)
+            if len(batch) >= batch_size:
+                put(batch)
+                batch = []
+        if batch:
+            put(batch)
+        put(None)
+    except Exception as e:
+        put(e)
+
+
+def _write_batches(filename, queue, loop, total, progress):
+    """
+    Worker thread body for async_save_characters_to_file.
+    Takes batches of characters from the bounded asyncio queue and
+    writes them to the file until a None batch is received.
+    :param filename: str, path of the CSV or JSON Lines file to create
+    :param queue: asyncio.Queue, bounded queue owned by the event loop
+    :param loop: asyncio event loop that owns the queue
+    :param total: int, total number of characters to be written
+    :param progress: callable or None, called on the event loop with
+    (written, total) after each batch
+    :return: int, number of characters written
+    """
+    def queued_characters():
+        written = 0
+        while True:
+            batch = asyncio.run_coroutine_threadsafe(
+                queue.get(), loop).result()
+            if batch is None:
+                return
+            yield from batch
+            written += len(batch)
+            if progress:
+                loop.call_soon_threadsafe(progress, written, total)
+
+    return write_characters(queued_characters(), filename)
+
+
+async def async_load_characters_from_file(
+        filename, batch_size=ASYNC_BATCH_SIZE,
+        max_queued_batches=ASYNC_MAX_QUEUED_BATCHES, progress=None):
+    """
+    Load characters from a CSV or JSON Lines file without blocking the
+    event loop.
+    Rows are parsed on a background thread and streamed to the event
+    loop in batches through a bounded queue, so at most
+    max_queued_batches batches are held in flight at any time.
+    :param filename: str, path of the CSV or JSON Lines file to read
+    :param batch_size: int, number of characters per batch
+    :param max_queued_batches: int, capacity of the batch queue
+    :param progress: callable or None, called with (loaded, None) after
+    each batch is received
+    :return: list, list of loaded Character objects, empty list if failed
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max_queued_batches)
+    reader = threading.Thread(
+        target=_read_batches,
+        args=(filename, queue, loop, batch_size),
+        daemon=True)
+    reader.start()
+
+    loaded_characters = []
+    error = None
+    while True:
+        batch = await queue.get()
+        if batch is None:
+            break
+        if isinstance(batch, Exception):
+            error = batch
+            break
+        loaded_characters.extend(batch)
+        if progress:
+            progress(len(loaded_characters), None)
+
+    if isinstance(error, FileNotFoundError):
+        print(f"File {filename} not found.")
+        print()
+        return []
+    if error is not None:
+        print(f"Error loading file: {error}")
+        print()
+        return []
+    if not loaded_characters:
+        print(f"No characters could be loaded from {filename}.")
+        print()
+        return []
+
+    print(f"Characters loaded successfully from {filename}")
+    print(f"Loaded {len(loaded_characters)} characters.")
+    print()
+    return loaded_characters
+
+
+async def async_save_characters_to_file(
+        characters, filename, batch_size=ASYNC_BATCH_SIZE,
+        max_queued_batches=ASYNC_MAX_QUEUED_BATCHES, progress=None):
+    """
+    Save characters to a CSV or JSON Lines file without blocking the
+    event loop.
+    The character list is copied up front, then handed to a writer
+    thread in batches through a bounded queue; the event loop is free
+    to run other coroutines whenever the queue is full.
+    :param characters: list, list of Character objects to save to file
+    :param filename: str, path of the CSV or JSON Lines file to create
+    :param batch_size: int, number of characters per batch
+    :param max_queued_batches: int, capacity of the batch queue
+    :param progress: callable or None, called with (written, total)
+    after each batch is written
+    :return: bool, True if save was successful, False if failed
+    """
+    if not characters:
+        print("No characters to save.")
+        print()
+        return False
+
+    loop = asyncio.get_running_loop()
+    snapshot = list(characters)
+    queue = asyncio.Queue(maxsize=max_queued_batches)
+    writer = loop.run_in_executor(
+        None, _write_batches, filename, queue, loop, len(snapshot), progress)
+
+    batches = [snapshot[start:start + batch_size]
+               for start in range(0, len(snapshot), batch_size)]
+    batches.append(None)
+
+    try:
+        for batch in batches:
+            # Wait for queue space, but stop feeding if the writer fails
+            put = asyncio.ensure_future(queue.put(batch))
+            await asyncio.wait(
+                {put, writer}, return_when=asyncio.FIRST_COMPLETED)
+            if not put.done():
+                put.cancel()
+                break
+        await writer
+        print(f"Characters saved successfully to {filename}")
+        print()
+        return True
+    except Exception as e:
+        print(f"Error saving file: {e}")
+        print()
+        return False
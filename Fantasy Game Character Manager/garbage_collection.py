@@ -0,0 +1,31 @@
+# garbage_collection.py
+
+"""
+Control of the cyclic garbage collector for bulk work.
+
+This module defines paused_garbage_collection, used around work that
+creates millions of small objects at once, such as reading a roster
+cache entry or applying a batch of wealth transactions. Each of those
+allocations counts towards the next collection, so without a pause
+the collector repeatedly walks every object in the program without
+finding any garbage.
+"""
+
+import contextlib
+import gc
+
+
+@contextlib.contextmanager
+def paused_garbage_collection():
+    """
+    Context manager pausing the cyclic garbage collector, and resuming
+    it afterwards if it was running.
+    :return: generator, for use in a with statement
+    """
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if collecting:
+            gc.enable()
@@ -0,0 +1,79 @@
+# gui_session.py
+
+"""
+Long-lived GUI session for the character management system.
+
+This module defines the GUISession class which keeps a single hidden
+Tk root alive for the whole application run. Forms, browser windows and
+file dialogs are opened as children of that root, and the character
+creation form is built once and reset between uses, so opening the GUI
+a second time costs no interpreter start-up or widget construction.
+"""
+
+import tkinter as tk
+from character_gui import CharacterCreationGUI
+
+
+class GUISession:
+    """
+    Owner of the shared Tk root and the reusable character form.
+    The root is created on first use and kept hidden; it only exists to
+    parent the windows the application shows.
+    """
+
+    def __init__(self):
+        """
+        Initialize a GUISession without creating any windows yet.
+        """
+        self._root = None
+        self._character_form = None
+
+    def get_root(self):
+        """
+        Get the shared hidden Tk root, creating it on first use.
+        :return: tk.Tk, the shared root window
+        """
+        if self._root is None or not self._root_exists():
+            self._root = tk.Tk()
+            self._root.withdraw()
+            self._character_form = None
+        return self._root
+
+    def _root_exists(self):
+        """
+        Check whether the shared root is still alive.
+        :return: bool, True if the root window has not been destroyed
+        """
+        try:
+            return bool(self._root.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def character_form(self, name_completer=None):
+        """
+        Get the reusable character creation form.
+        :param name_completer: callable or None, existing-name suggestion
+        function passed on to the form
+        :return: CharacterCreationGUI, the form, hidden until run
+        """
+        root = self.get_root()
+        if self._character_form is None:
+            self._character_form = CharacterCreationGUI(
+                name_completer, master=root)
+        else:
+            self._character_form.set_name_completer(name_completer)
+        return self._character_form
+
+    def close(self):
+        """
+        Destroy the shared root and every window it owns.
+        :return: None
+        """
+        if self._root is not None and self._root_exists():
+            self._root.destroy()
+        self._root = None
+        self._character_form = None
+
+
+# Session shared by the whole application
+gui_session = GUISession()
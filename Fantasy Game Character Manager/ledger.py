@@ -0,0 +1,299 @@
+# ledger.py
+
+"""
+Wealth transaction ledger for the character management system.
+
+This module defines the Batch and Ledger classes. A Batch collects
+transfers of gold between characters, rewards (gold given to a
+character) and charges (gold taken from one); a Ledger applies each
+batch atomically to a roster. The batch is first netted to one change
+per character, and every resulting wealth is checked to be a valid,
+non-negative wealth: if any is not, nothing is changed. Only then is
+the batch appended to the ledger's log and the wealth of the affected
+characters set together, through Character.set_wealth_many, so roster
+indexes are updated in one write per batch.
+
+Characters are identified by their position in the roster, which never
+changes as rosters only grow at the end. The log is a JSON Lines file
+with one batch per line, each transaction written as [source, target,
+amount] with null for the missing side of a reward or a charge.
+Replaying the log onto the roster it was written against, as loaded
+before the first batch, repeats every batch in order.
+"""
+
+import argparse
+import json
+import os
+import threading
+from character import Character
+from file_manager import load_characters_from_file, write_characters
+from garbage_collection import paused_garbage_collection
+from validators import OUT_OF_RANGE, ValidationError, validate_wealth
+
+
+class Batch:
+    """
+    Transactions to be applied together by a Ledger.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty Batch.
+        """
+        self.sources = []
+        self.targets = []
+        self.amounts = []
+
+    def _add(self, source, target, amount):
+        """
+        Add a transaction to the batch.
+        Raises ValidationError if the amount is not a valid wealth.
+        :param source: int or None, position of the character paying
+        :param target: int or None, position of the character paid
+        :param amount: int or str, the gold moved
+        :return: None
+        """
+        self.amounts.append(validate_wealth(amount))
+        self.sources.append(source)
+        self.targets.append(target)
+
+    def transfer(self, source, target, amount):
+        """
+        Move gold from one character to another.
+        :param source: int, position of the character paying
+        :param target: int, position of the character paid
+        :param amount: int or str, the gold moved
+        :return: None
+        """
+        self._add(source, target, amount)
+
+    def reward(self, target, amount):
+        """
+        Give gold to a character.
+        :param target: int, position of the character paid
+        :param amount: int or str, the gold given
+        :return: None
+        """
+        self._add(None, target, amount)
+
+    def charge(self, source, amount):
+        """
+        Take gold from a character.
+        :param source: int, position of the character paying
+        :param amount: int or str, the gold taken
+        :return: None
+        """
+        self._add(source, None, amount)
+
+    def __len__(self):
+        """
+        Number of transactions in the batch.
+        :return: int, the number of transactions
+        """
+        return len(self.amounts)
+
+
+class Ledger:
+    """
+    Applies batches of wealth transactions to a roster, each one
+    entirely or not at all, and appends them to a log for replay.
+    Batches are applied one at a time, so a Ledger can be shared
+    between threads.
+    """
+
+    def __init__(self, characters, log_filename=None, sync=False):
+        """
+        Initialize a Ledger.
+        Raises OSError if the log cannot be opened.
+        :param characters: sequence, the roster's Character objects by
+        position, such as a Roster snapshot
+        :param log_filename: str or None, path of the JSON Lines log to
+        append batches to; None to keep no log
+        :param sync: bool, whether to flush each batch to disk before
+        applying it, so an applied batch survives a crash
+        """
+        self._characters = characters
+        self._lock = threading.Lock()
+        self._log = open(log_filename, 'a', encoding='utf-8') \
+            if log_filename else None
+        self._sync = sync
+        self.batches = 0
+        self.transactions = 0
+
+    def _net_changes(self, batch):
+        """
+        Net a batch to one change of wealth per character.
+        :param batch: Batch, the transactions
+        :return: dict, position -> change of wealth
+        """
+        changes = {}
+        get = changes.get
+        for source, target, amount in zip(batch.sources, batch.targets,
+                                          batch.amounts):
+            if source is not None:
+                changes[source] = get(source, 0) - amount
+            if target is not None:
+                changes[target] = get(target, 0) + amount
+        return changes
+
+    def _new_wealth(self, changes):
+        """
+        Work out the wealth of every character a batch changes. A
+        character held at several positions gets the changes of all of
+        them together.
+        Raises ValueError if a position is not in the roster and
+        ValidationError if a character cannot afford the batch.
+        :param changes: dict, position -> change of wealth
+        :return: list, (Character, new wealth) pairs, one per character
+        """
+        characters = self._characters
+        count = len(characters)
+        by_character = {}
+        for position, change in changes.items():
+            if type(position) is not int or not 0 <= position < count:
+                raise ValueError(f"No character at position {position}.")
+            if not change:
+                continue
+            character = characters[position]
+            known = by_character.get(id(character))
+            if known is not None:
+                change += known[1]
+            by_character[id(character)] = (character, change)
+        updates = []
+        for character, change in by_character.values():
+            wealth = character.get_wealth() + change
+            if wealth < 0:
+                raise ValidationError(
+                    f"{character.get_name()} cannot afford the batch: "
+                    f"{-change} gold with {character.get_wealth()}.",
+                    'wealth', OUT_OF_RANGE)
+            updates.append((character, wealth))
+        return updates
+
+    def apply(self, batch):
+        """
+        Apply a batch of transactions: check it, log it, then change the
+        characters' wealth. Every check is made before the batch is
+        logged, with the changes already netted to one new wealth per
+        character, so nothing is changed or logged if the batch fails
+        one, and no batch is logged that cannot then be applied.
+        Raises ValueError if a position is not in the roster,
+        ValidationError if a character would be left with negative
+        wealth, and OSError if the log cannot be written.
+        :param batch: Batch, the transactions
+        :return: int, the number of characters whose wealth changed
+        """
+        with self._lock, paused_garbage_collection():
+            updates = self._new_wealth(self._net_changes(batch))
+            if self._log is not None:
+                self._log.write(json.dumps(
+                    {'transactions': list(zip(batch.sources, batch.targets,
+                                              batch.amounts))},
+                    separators=(',', ':')) + '\n')
+                self._log.flush()
+                if self._sync:
+                    os.fsync(self._log.fileno())
+            Character.set_wealth_many(updates)
+            self.batches += 1
+            self.transactions += len(batch)
+        return len(updates)
+
+    def close(self):
+        """
+        Close the log.
+        :return: None
+        """
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def __enter__(self):
+        """
+        Use the Ledger in a with statement.
+        :return: Ledger, this ledger
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Close the Ledger at the end of a with statement.
+        :return: None
+        """
+        self.close()
+
+
+def read_log(filename):
+    """
+    Read the batches of a ledger log. A last line cut short, as left by
+    a crash while it was written, is ignored: its batch was never
+    applied.
+    Raises OSError if the file cannot be read and ValueError if a line
+    is not a batch.
+    :param filename: str, path of the JSON Lines log
+    :return: generator, yields Batch objects in log order
+    """
+    with open(filename, encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.endswith('\n'):
+                return
+            try:
+                transactions = json.loads(line)['transactions']
+                batch = Batch()
+                for source, target, amount in transactions:
+                    batch._add(source, target, amount)
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"Line {line_number}: invalid batch "
+                                 f"({e}).") from None
+            yield batch
+
+
+def replay_log(filename, characters):
+    """
+    Apply every batch of a ledger log to a roster, in order.
+    Raises OSError if the file cannot be read and ValueError if a batch
+    is invalid or cannot be applied; the batches before it stay applied.
+    :param filename: str, path of the JSON Lines log
+    :param characters: sequence, the roster's Character objects by
+    position, as they were before the first batch
+    :return: Ledger, the ledger that applied the batches, with their
+    counts
+    """
+    ledger = Ledger(characters)
+    with paused_garbage_collection():
+        for batch_number, batch in enumerate(read_log(filename), 1):
+            try:
+                ledger.apply(batch)
+            except ValueError as e:
+                raise ValueError(f"Batch {batch_number}: {e}") from None
+    return ledger
+
+
+def main():
+    """
+    Parse command line arguments and replay a ledger log onto a roster
+    file.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay a wealth ledger log onto a roster file.")
+    parser.add_argument('filename', help="the CSV or JSON Lines roster")
+    parser.add_argument('log', help="the JSON Lines ledger log")
+    parser.add_argument('output', help="the CSV or JSON Lines file to "
+                                       "write the roster to")
+    args = parser.parse_args()
+
+    characters = load_characters_from_file(args.filename)
+    if not characters:
+        return
+    try:
+        ledger = replay_log(args.log, characters)
+        write_characters(characters, args.output)
+    except (OSError, ValueError) as e:
+        print(f"Error replaying ledger: {e}")
+        return
+    print(f"Replayed {ledger.batches:,} batches of "
+          f"{ledger.transactions:,} transactions into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
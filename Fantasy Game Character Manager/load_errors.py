@@ -0,0 +1,163 @@
+# load_errors.py
+
+"""
+Error collection for bulk loads of character files.
+
+This module defines the LoadErrors class, which records every row that
+fails to load with its row number, field and error code, counts the
+failures of each kind, prints only the first few as they happen, and
+can write the rejected rows to a CSV file for fixing. Printing a line
+per bad row made loads of badly broken files spend most of their time
+writing to the terminal.
+"""
+
+import csv
+from array import array
+
+# Error code for rows that cannot be parsed at all, such as bad JSON
+MALFORMED = 'malformed'
+
+# Error code for failures without a more specific code
+INVALID = 'invalid'
+
+# Default number of errors printed as they are recorded
+MAX_PRINTED_ERRORS = 10
+
+
+class LoadErrors:
+    """
+    Collector of the rows that failed during a load.
+    Failures are stored compactly (a row number and a kind number each),
+    so millions of them take a few bytes apiece.
+    """
+
+    def __init__(self, max_printed=MAX_PRINTED_ERRORS,
+                 rejected_filename=None, fieldnames=None):
+        """
+        Initialize an empty LoadErrors.
+        :param max_printed: int, how many errors to print as they happen
+        :param rejected_filename: str or None, CSV file to write the
+        rejected rows to, created on the first failure
+        :param fieldnames: list or None, the columns of the rows being
+        loaded, written after the error details in the rejected file
+        """
+        self._max_printed = max_printed
+        self._rejected_filename = rejected_filename
+        self._fieldnames = list(fieldnames or [])
+        self._rejected_file = None
+        self._rejected_writer = None
+        self._kinds = []
+        self._kind_numbers = {}
+        self._counts = []
+        self._rows = array('q')
+        self._row_kinds = bytearray()
+
+    def record(self, row_number, error, row=None, code=None):
+        """
+        Record a row that failed to load.
+        :param row_number: int or None, the row's line number in the
+        file, None if unknown
+        :param error: Exception, the error raised for the row
+        :param row: dict, str or None, the raw row: a dictionary of
+        field values, or the unparsed line text
+        :param code: str or None, error code overriding the error's own
+        :return: None
+        """
+        field = getattr(error, 'field', None)
+        code = code or getattr(error, 'code', None) or INVALID
+        kind = (field, code)
+        number = self._kind_numbers.get(kind)
+        if number is None:
+            number = self._kind_numbers[kind] = len(self._kinds)
+            self._kinds.append(kind)
+            self._counts.append(0)
+        self._counts[number] += 1
+        self._rows.append(-1 if row_number is None else row_number)
+        self._row_kinds.append(min(number, 255))
+
+        if len(self) <= self._max_printed:
+            where = "" if row_number is None else f"row {row_number}: "
+            print(f"Error loading character from file: {where}{error}")
+        if self._rejected_filename is not None:
+            self._write_rejected(row_number, field, code, error, row)
+
+    def _write_rejected(self, row_number, field, code, error, row):
+        """
+        Append a failed row to the rejected rows file.
+        :param row_number: int or None, the row's line number
+        :param field: str or None, the field that failed
+        :param code: str, the error code
+        :param error: Exception, the error raised
+        :param row: dict, str or None, the raw row
+        :return: None
+        """
+        if self._rejected_writer is None:
+            self._rejected_file = open(
+                self._rejected_filename, 'w', newline='')
+            self._rejected_writer = csv.writer(self._rejected_file)
+            self._rejected_writer.writerow(
+                ['row', 'field', 'code', 'message'] + self._fieldnames +
+                ['raw'])
+        if isinstance(row, dict):
+            values = ['' if row.get(name) is None else row[name]
+                      for name in self._fieldnames]
+            raw = ''
+        else:
+            values = [''] * len(self._fieldnames)
+            raw = '' if row is None else row.rstrip('\r\n')
+        self._rejected_writer.writerow(
+            ['' if row_number is None else row_number, field or '', code,
+             str(error)] + values + [raw])
+
+    def failures(self):
+        """
+        Iterate over the recorded failures in the order they happened.
+        :return: generator, yields (row number or None, field or None,
+        error code) tuples
+        """
+        for row_number, number in zip(self._rows, self._row_kinds):
+            field, code = self._kinds[number]
+            yield (None if row_number < 0 else row_number), field, code
+
+    def counts(self):
+        """
+        Count the failures of each kind, most frequent first.
+        :return: list, of ((field, code), count) tuples
+        """
+        return sorted(zip(self._kinds, self._counts),
+                      key=lambda item: -item[1])
+
+    def close(self):
+        """
+        Close the rejected rows file, if one was written.
+        :return: None
+        """
+        if self._rejected_file is not None:
+            self._rejected_file.close()
+            self._rejected_file = None
+            self._rejected_writer = None
+
+    def report(self):
+        """
+        Print a summary of the failures by kind and close the rejected
+        rows file. Prints nothing if every row loaded.
+        :return: None
+        """
+        self.close()
+        if not len(self):
+            return
+        hidden = len(self) - self._max_printed
+        if hidden > 0:
+            print(f"... {hidden:,} more error(s) not shown.")
+        print(f"{len(self):,} row(s) could not be loaded:")
+        for (field, code), count in self.counts():
+            print(f"    {field or 'row'}: {code} x {count:,}")
+        if self._rejected_filename is not None:
+            print(f"Rejected rows written to {self._rejected_filename}")
+
+    def __len__(self):
+        """
+        Number of failures recorded.
+        :return: int, the number of rows that failed
+        """
+        return len(self._rows)
@@ -8,6 +8,7 @@ and adds mage-specific attributes like spell and mana points.
 """
 
 from character import Character
+from character_registry import register_character_class
 from validators import validate_spell, validate_mana_points
 
 
@@ -79,3 +80,8 @@ class Mage(Character):
         return (f"{base_str}\n"
                 f"Spell          : {self._spell}\n"
                 f"Mana Points    : {self._mana_points} MP")
+
+
+register_character_class(
+    Mage, 'Mage',
+    ['name', 'race', 'skill_level', 'wealth', 'spell', 'mana_points'])
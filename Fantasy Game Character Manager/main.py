@@ -5,16 +5,44 @@ Fantasy Game Character Manager - Main Code
 Author: Freddie Kingham
 """
 
+import argparse
 import re
-from character import Character
-from warrior import Warrior
-from mage import Mage
-from character_gui import CharacterCreationGUI
-from file_manager import save_characters_to_file, load_characters_from_file
+import shlex
+import sys
+import time
+from character_registry import codec_for_role, registered_roles
+from roster_browser import RosterBrowser
+from gui_session import gui_session
+from file_manager import (
+    save_characters_to_file, load_characters_from_file,
+    save_partitioned_characters, load_partitioned_characters,
+    read_partition_manifest, dict_to_character, iter_rows, FIELDNAMES,
+    FIELD_VALIDATORS, JSON_LINES_EXTENSIONS
+)
+from file_chooser import choose_save_file
+from background_save import BackgroundSave
+from roster import Roster
+from roster_cache import RosterCache
+from roster_sketch import sketch_file, display_sketch
+from roster_scan import scan_file, display_scan
+from roster_diff import (
+    diff_files, merge_files, describe_change, display_summary, DiffSummary
+)
+from external_sort import sort_file
+from validators import (
+    FIELD_CHOICES, FIELD_RANGES, describe_choices, validate_role,
+    validate_wealth
+)
 
 
-# Global list to store all characters
-characters = []
+# Global thread-safe roster storing all characters
+characters = Roster()
+
+# Most recent background save, if any
+background_save = None
+
+# Cache of parsed roster files, or None unless turned on with --cache
+roster_cache = None
 
 
 def display_menu():
@@ -34,6 +62,12 @@ def display_menu():
     print("5. Total Wealth of all the Characters")
     print("6. Save Characters to a File")
     print("7. Load Characters from a File")
+    print("8. Background Save Status")
+    print("9. List Names by Prefix")
+    print("10. Browse Characters (GUI)")
+    print("11. Wealth Rankings")
+    print("12. Undo Last Change")
+    print("13. Redo")
     print("0. Exit Application")
     print("=" * 50)
     print("Please make a selection:", end=" ")
@@ -52,6 +86,10 @@ def get_character_name():
         elif not re.match("^[a-zA-Z]+$", name):
             print("Invalid input! Character name can only contain letters.")
         else:
+            existing = characters.count_name(name)
+            if existing:
+                print(f"Note: {existing} character(s) named "
+                      f"{name.capitalize()} already exist.")
             return name.capitalize()
 
 
@@ -78,20 +116,16 @@ def get_character_race():
 def get_character_role():
     """
     Get and validate character role from user input.
-    Only accepts Warrior or Mage as valid roles.
+    Only accepts the roles of the registered character classes.
     :return: str, validated and capitalized character role
     """
-    valid_roles = ['warrior', 'mage']
+    choices = describe_choices(registered_roles())
     while True:
-        role = input("Enter the character role (Warrior or Mage): ").strip()
-        if not role:
-            print("Invalid input! Character role cannot be empty.")
-        elif not re.match("^[a-zA-Z]+$", role):
-            print("Invalid input! Character role can only contain letters.")
-        elif role.lower() not in valid_roles:
-            print("Invalid input! Role must be Warrior or Mage.")
-        else:
-            return role.capitalize()
+        role = input(f"Enter the character role ({choices}): ").strip()
+        try:
+            return validate_role(role)
+        except ValueError as e:
+            print(f"Invalid input! {e}")
 
 
 def get_character_skill_level():
@@ -128,78 +162,37 @@ def get_character_wealth():
             return wealth
 
 
-def get_warrior_weapon():
+def field_hint(field):
     """
-    Get and validate warrior weapon from user input.
-    Only accepts Sword or Axe as valid weapons.
-    :return: str, validated and capitalized weapon name
+    Describe the values a field accepts, for its prompt.
+    :param field: str, the field name
+    :return: str, such as " (Sword or Axe)" or " (0-100)", or an empty
+    string for fields without fixed choices or bounds
     """
-    while True:
-        weapon = input("Enter the warrior's weapon (Sword or Axe): ").strip()
-        if not weapon:
-            print("Invalid input! Weapon cannot be empty.")
-        elif not re.match("^[a-zA-Z]+$", weapon):
-            print("Invalid input! Weapon can only contain letters.")
-        elif weapon.lower() not in ['sword', 'axe']:
-            print("Invalid input! Weapon must be Sword or Axe.")
-        else:
-            return weapon.capitalize()
+    if field in FIELD_CHOICES:
+        return f" ({describe_choices(FIELD_CHOICES[field])})"
+    if field in FIELD_RANGES:
+        low, high = FIELD_RANGES[field]
+        return f" ({low}-{high})"
+    return ""
 
 
-def get_warrior_armour():
+def get_role_field(role, field):
     """
-    Get and validate warrior armour from user input.
-    Only accepts Chainmail or Plate as valid armour types.
-    :return: str, validated and capitalized armour name
+    Get and validate a role-specific field from user input, with the
+    validator of the field's column.
+    :param role: str, the role the field belongs to
+    :param field: str, the field name, a column of the roster files
+    :return: str or int, the validated value
     """
     while True:
-        armour = input(
-            "Enter the warrior's armour (Chainmail or Plate): ").strip()
-        if not armour:
-            print("Invalid input! Armour cannot be empty.")
-        elif not re.match("^[a-zA-Z]+$", armour):
-            print("Invalid input! Armour can only contain letters.")
-        elif armour.lower() not in ['chainmail', 'plate']:
-            print("Invalid input! Armour must be Chainmail or Plate.")
-        else:
-            return armour.capitalize()
-
-
-def get_mage_spell():
-    """
-    Get and validate mage spell from user input.
-    Only accepts Fireball or Lightning as valid spells.
-    :return: str, validated and capitalized spell name
-    """
-    while True:
-        spell = input(
-            "Enter the mage's spell (Fireball or Lightning): ").strip()
-        if not spell:
-            print("Invalid input! Spell cannot be empty.")
-        elif not re.match("^[a-zA-Z]+$", spell):
-            print("Invalid input! Spell can only contain letters.")
-        elif spell.lower() not in ['fireball', 'lightning']:
-            print("Invalid input! Spell must be Fireball or Lightning.")
-        else:
-            return spell.capitalize()
-
-
-def get_mage_mana_points():
-    """
-    Get and validate mage mana points from user input.
-    Ensures mana points are between 0 and 100.
-    :return: int, validated mana points value
-    """
-    while True:
-        mana = input("Enter the mage's mana points (0-100): ").strip()
-        if not mana:
-            print("Invalid input! Mana points cannot be empty.")
-        elif not mana.isdigit():
-            print("Invalid input! Please enter a valid number.")
-        elif int(mana) < 0 or int(mana) > 100:
-            print("Invalid input! Mana points must be between 0 and 100.")
-        else:
-            return int(mana)
+        value = input(f"Enter the {role.lower()}'s "
+                      f"{field.replace('_', ' ')}{field_hint(field)}: "
+                      ).strip()
+        try:
+            return FIELD_VALIDATORS[field](value)
+        except ValueError as e:
+            print(f"Invalid input! {e}")
 
 
 def add_character():
@@ -207,7 +200,7 @@ def add_character():
     Add a character using console input.
     Collects all character information through prompts
     and creates appropriate character object.
-    Adds the created character to the global characters list.
+    Adds the created character to the global characters roster.
     :return: None
     """
     print("\n--- Add New Character ---")
@@ -219,24 +212,17 @@ def add_character():
     skill_level = get_character_skill_level()
     wealth = get_character_wealth()
 
-    try:
-        # Create specialized character object based on role
-        if role.lower() == 'warrior':
-            weapon = get_warrior_weapon()
-            armour = get_warrior_armour()
-            character = Warrior(
-                name, race, skill_level, wealth, weapon, armour)
-        elif role.lower() == 'mage':
-            spell = get_mage_spell()
-            mana_points = get_mage_mana_points()
-            character = Mage(
-                name, race, skill_level, wealth, spell, mana_points)
-        else:
-            # Fallback to base Character class
-            # (should not happen with current validation)
-            character = Character(name, race, role, skill_level, wealth)
+    # The class registered for the role decides which extra fields to ask
+    # for; roles without their own class create a plain Character
+    codec = codec_for_role(role)
+    row = {'name': name, 'race': race, 'role': role,
+           'skill_level': skill_level, 'wealth': wealth}
+    for field in codec.extra_fields:
+        row[field] = get_role_field(role, field)
 
-        characters.append(character)
+    try:
+        character = codec.create(row)
+        characters.append(character, f"Add {character.get_name()}")
 
         # Display the character information
         print("\n" + "="*50)
@@ -253,23 +239,31 @@ def add_character():
 def add_character_gui():
     """
     Launch GUI for adding a character.
-    Opens the character creation GUI and adds the created character
+    Opens the reusable character creation GUI and adds every character
+    created in it, including those from "create another" mode,
     to the system.
     :return: None
     """
     print("\nLaunching GUI for character creation...")
-    gui = CharacterCreationGUI()
-    character = gui.run()
+    gui = gui_session.character_form(
+        name_completer=characters.complete_names)
+    gui.run()
+    created = gui.results
 
-    if character:
-        characters.append(character)
+    if len(created) == 1:
+        characters.append(created[0], f"Add {created[0].get_name()}")
         print(f"\nCharacter added successfully via GUI!")
         print("="*50)
         print("CHARACTER DETAILS:")
         print("="*50)
-        print(character)
+        print(created[0])
         print("="*50)
         print()
+    elif created:
+        characters.extend(created, f"Add {len(created)} characters")
+        print(f"\n{len(created)} characters added successfully via GUI:")
+        print("    " + ", ".join(char.get_name() for char in created))
+        print()
     else:
         print("Character creation cancelled.")
         print()
@@ -281,16 +275,17 @@ def list_all_characters():
     Displays detailed information for each character with proper formatting.
     :return: None
     """
-    if not characters:
+    snapshot = characters.snapshot()
+    if not snapshot:
         print("\nNo characters found.")
         print()
         return
 
     print(f"\n{'='*20} ALL CHARACTERS {'='*20}")
-    print(f"Total Characters: {len(characters)}")
+    print(f"Total Characters: {len(snapshot)}")
     print("="*60)
 
-    for i, character in enumerate(characters, 1):
+    for i, character in enumerate(snapshot, 1):
         print(f"\n[{i}] {character.get_name()}")
         print("-" * 40)
         # Use the __str__ method which includes specialized attributes
@@ -322,11 +317,20 @@ def search_characters_by_name():
         print()
         return
 
-    found_characters = [
-        char for char in characters if search_name in char.get_name().lower()]
+    display_search_results(search_name)
+
+
+def display_search_results(search_name):
+    """
+    Display the characters whose name contains the search text.
+    :param search_name: str, the lowercase text to search for
+    :return: None
+    """
+    found_characters = characters.search_by_name(search_name)
 
     if not found_characters:
         print(f"\nNo characters found with name containing '{search_name}'.")
+        display_fuzzy_suggestions(search_name)
         print()
         return
 
@@ -349,48 +353,736 @@ def search_characters_by_name():
     print()
 
 
+def display_fuzzy_suggestions(search_name):
+    """
+    Display the closest names to a search that found nothing, so typos
+    like 'Gandlf' still lead to 'Gandalf'.
+    :param search_name: str, the lowercase text that was searched for
+    :return: None
+    """
+    suggestions = characters.fuzzy_search(search_name)
+    if not suggestions:
+        return
+
+    print("Did you mean:")
+    for name, distance, similarity, matches in suggestions:
+        print(f"    {name.capitalize():<20} "
+              f"{len(matches)} character(s), "
+              f"{distance} edit(s), {similarity:.0%} similar")
+
+
+def browse_characters_gui():
+    """
+    Open the roster browser window.
+    Characters loaded from a file in the browser are added to the system.
+    :return: None
+    """
+    print("\nLaunching roster browser...")
+    before = len(characters)
+    RosterBrowser(characters, master=gui_session.get_root()).run()
+    added = len(characters) - before
+    if added:
+        print(f"{added} character(s) loaded in the browser.")
+    print()
+
+
+def list_names_by_prefix():
+    """
+    List existing character names starting with a prefix.
+    Shows up to 20 names alphabetically with how many characters share
+    each name.
+    :return: None
+    """
+    prefix = input("\nEnter the start of the name: ").strip()
+    if not prefix:
+        print("Invalid input! Prefix cannot be empty.")
+        print()
+        return
+
+    completions = characters.complete_names(prefix, 20)
+    if not completions:
+        print(f"\nNo names start with '{prefix}'.")
+        print()
+        return
+
+    print(f"\n{'='*15} NAMES STARTING WITH '{prefix.upper()}' {'='*15}")
+    for name, count in completions:
+        print(f"    {name:<20} {count} character(s)")
+    print("="*50)
+    print()
+
+
 def total_wealth():
     """
     Calculate and display total wealth statistics.
     Shows total wealth, average wealth, richest and poorest characters.
     :return: None
     """
-    if not characters:
+    count, total = characters.wealth_statistics()
+    if not count:
         print("\nNo characters found.")
         print()
         return
 
-    total = sum(character.get_wealth() for character in characters)
-
+    richest = characters.richest(1)[0]
+    poorest = characters.poorest(1)[0]
     print(f"\n{'='*15} WEALTH STATISTICS ({'='*15}")
-    print(f"Total Characters      : {len(characters)}")
+    print(f"Total Characters      : {count}")
     print(f"Total Wealth          : {total:,} Gold coins")
-    print(f"Average Wealth        : {total / len(characters):,.2f} Gold coins")
+    print(f"Average Wealth        : {total / count:,.2f} Gold coins")
+    print(f"Median Wealth         : "
+          f"{characters.wealth_percentile(50):,} Gold coins")
+    print(f"Richest Character     : {richest.get_name()} "
+          f"({richest.get_wealth():,} Gold coins)")
+    print(f"Poorest Character     : {poorest.get_name()} "
+          f"({poorest.get_wealth():,} Gold coins)")
+    print("="*50)
+    print()
+
+
+def undo_change():
+    """
+    Undo the most recent addition to the roster, such as a file load.
+    :return: None
+    """
+    undone = characters.undo()
+    if undone is None:
+        print("\nNothing to undo.\n")
+        return
+    description, count = undone
+    print(f"\nUndid: {description or 'change'} "
+          f"({count:,} character(s) removed).\n")
+
+
+def redo_change():
+    """
+    Redo the most recently undone addition to the roster.
+    :return: None
+    """
+    redone = characters.redo()
+    if redone is None:
+        print("\nNothing to redo.\n")
+        return
+    description, count = redone
+    print(f"\nRedid: {description or 'change'} "
+          f"({count:,} character(s) added back).\n")
+
+
+def wealth_rankings():
+    """
+    Answer a wealth ranking query chosen by the user: the richest or
+    poorest characters, the wealth at a percentile, or how a wealth
+    amount ranks against the roster.
+    :return: None
+    """
+    if not characters:
+        print("\nNo characters found.")
+        print()
+        return
+
+    print("\n1. Richest Characters")
+    print("2. Poorest Characters")
+    print("3. Wealth at a Percentile")
+    print("4. Rank of a Wealth Amount")
+    choice = input("Please make a selection: ").strip()
+    queries = {
+        '1': ("How many characters? ", display_richest),
+        '2': ("How many characters? ", display_poorest),
+        '3': ("Enter the percentile (0-100): ", display_percentile),
+        '4': ("Enter the wealth (in Gold coins): ", display_wealth_rank),
+    }
+    if choice not in queries:
+        print(f"Invalid selection '{choice}'.")
+        print()
+        return
+
+    prompt, display = queries[choice]
+    try:
+        display(input(prompt).strip())
+    except ValueError as e:
+        print(f"Invalid input! {e}")
+        print()
+
+
+def parse_count(text):
+    """
+    Parse the number of characters to show in a ranking.
+    Raises ValueError if the text is not a positive whole number.
+    :param text: str, the number entered
+    :return: int, the number of characters
+    """
+    if not text.isdigit() or int(text) < 1:
+        raise ValueError("The number of characters must be at least 1.")
+    return int(text)
+
+
+def display_wealth_ranking(title, ranked):
+    """
+    Display characters in ranking order with their wealth.
+    :param title: str, the heading of the ranking
+    :param ranked: list, Character objects in ranking order
+    :return: None
+    """
+    print(f"\n{'='*15} {title} {'='*15}")
+    for i, character in enumerate(ranked, 1):
+        print(f"[{i}] {character.get_name():<20} "
+              f"{character.get_wealth():>15,} Gold coins")
     print("="*50)
     print()
 
 
+def display_richest(text):
+    """
+    Display the richest characters.
+    Raises ValueError if the number of characters is invalid.
+    :param text: str, how many characters to show
+    :return: None
+    """
+    display_wealth_ranking(
+        "RICHEST CHARACTERS", characters.richest(parse_count(text)))
+
+
+def display_poorest(text):
+    """
+    Display the poorest characters.
+    Raises ValueError if the number of characters is invalid.
+    :param text: str, how many characters to show
+    :return: None
+    """
+    display_wealth_ranking(
+        "POOREST CHARACTERS", characters.poorest(parse_count(text)))
+
+
+def display_percentile(text):
+    """
+    Display the wealth at a percentile of the roster.
+    Raises ValueError if the percentile is invalid.
+    :param text: str, the percentile from 0 to 100
+    :return: None
+    """
+    try:
+        percent = float(text)
+    except ValueError:
+        raise ValueError("Percentile must be a number between 0 and 100.")
+    wealth = characters.wealth_percentile(percent)
+    print(f"\n{percent:g}th percentile wealth: {wealth:,} Gold coins")
+    print()
+
+
+def display_wealth_rank(text):
+    """
+    Display how many characters are poorer and richer than an amount.
+    Raises ValueError if the wealth is invalid.
+    :param text: str, the wealth in gold coins
+    :return: None
+    """
+    wealth = validate_wealth(text)
+    count = len(characters)
+    poorer = characters.wealth_rank(wealth)
+    richer = count - characters.wealth_rank(wealth + 1)
+    print(f"\n{wealth:,} Gold coins: {poorer} of {count} characters "
+          f"are poorer and {richer} are richer "
+          f"({poorer / count:.1%} percentile rank).")
+    print()
+
+
 def save_characters():
     """
-    Save characters to file using GUI file chooser.
-    Opens file dialog to allow user to choose save location.
+    Save characters to file in the background using GUI file chooser.
+    Opens file dialog to allow user to choose save location, then writes
+    a snapshot of the characters on a worker thread so the menu stays
+    responsive.
     :return: None
     """
+    global background_save
     print("\nSaving characters to file...")
-    save_characters_to_file(characters)
+    if background_save is not None and background_save.is_running():
+        print("A save is already in progress. "
+              "Check its status with option 8.")
+        print()
+        return
+
+    if not characters:
+        print("No characters to save.")
+        print()
+        return
+
+    filename = choose_save_file("Save Characters to File")
+    if not filename:
+        print("Save cancelled.")
+        print()
+        return
+
+    background_save = BackgroundSave(characters.snapshot(), filename)
+    background_save.start()
+    print(f"Saving {background_save.get_total():,} characters to "
+          f"{filename} in the background.")
+    print("Check progress with option 8.")
+    print()
 
 
-def load_characters():
+def show_background_save_status():
+    """
+    Display the status of the most recent background save.
+    Offers to cancel the save if it is still running.
+    :return: None
+    """
+    if background_save is None:
+        print("\nNo background save has been started.")
+        print()
+        return
+
+    print(f"\n{'='*15} BACKGROUND SAVE {'='*15}")
+    print(background_save)
+    print("="*47)
+
+    if background_save.is_running():
+        answer = input("Cancel this save? (y/n): ").strip().lower()
+        if answer == 'y':
+            background_save.cancel()
+            background_save.wait()
+            print(f"Save {background_save.get_state().lower()}.")
+    print()
+
+
+def wait_for_background_save():
+    """
+    Wait for a running background save to finish before exiting.
+    :return: None
+    """
+    if background_save is not None and background_save.is_running():
+        print("\nWaiting for the background save to finish...")
+        background_save.wait()
+        print(f"Save {background_save.get_state().lower()}: "
+              f"{background_save.get_filename()}")
+
+
+def load_characters(filename=None, where=None, rejected_filename=None):
     """
     Load characters from file using GUI file chooser.
     Opens file dialog to allow user to choose file to load from.
+    :param filename: str or None, file to load from without the dialog
+    :param where: dict or None, only load rows matching these filters
+    :param rejected_filename: str or None, CSV file for the rows that
+    fail validation
     :return: None
     """
-    global characters
     print("\nLoading characters from file...")
-    loaded_characters = load_characters_from_file()
+    loaded_characters = load_characters_from_file(
+        filename, where, roster_cache, rejected_filename)
     if loaded_characters:
-        characters.extend(loaded_characters)
+        characters.extend(
+            loaded_characters,
+            f"Load {len(loaded_characters):,} characters"
+            f"{'' if filename is None else ' from ' + filename}")
+
+
+def role_fields_usage():
+    """
+    Describe the role-specific fields the add command takes.
+    :return: str, such as "[WEAPON ARMOUR | SPELL MANA_POINTS]"
+    """
+    return "[" + " | ".join(
+        " ".join(codec_for_role(role).extra_fields).upper()
+        for role in registered_roles()) + "]"
+
+
+def batch_add(args, pending):
+    """
+    Batch command: validate a character and queue it for adding. The
+    role-specific fields are those of the class registered for the
+    role, in the order the class saves them.
+    Usage: add NAME RACE ROLE SKILL WEALTH [WEAPON ARMOUR | SPELL MANA_POINTS]
+    :param args: list, the command arguments
+    :param pending: list, characters waiting to be added to the roster
+    :return: None
+    """
+    extra_fields = codec_for_role(args[2]).extra_fields \
+        if len(args) > 2 else ()
+    if len(args) != 5 and len(args) != 5 + len(extra_fields):
+        raise ValueError(f"add needs NAME RACE ROLE SKILL WEALTH "
+                         f"{role_fields_usage()}")
+    row = dict.fromkeys(FIELDNAMES, '')
+    row.update(zip(FIELDNAMES, args[:5]))
+    row.update(zip(extra_fields, args[5:]))
+    pending.append(dict_to_character(row))
+
+
+def batch_search(args):
+    """
+    Batch command: display characters whose name contains the text.
+    Usage: search TEXT
+    :param args: list, the command arguments
+    :return: None
+    """
+    if len(args) != 1:
+        raise ValueError("search needs exactly one search text")
+    display_search_results(args[0].lower())
+
+
+def batch_load(args):
+    """
+    Batch command: load characters from a CSV or JSON Lines file,
+    optionally only the rows matching filters, optionally writing the
+    rows that fail validation to a CSV file.
+    Usage: load FILE [FIELD=VALUES ...] [rejects=FILE]
+    :param args: list, the command arguments
+    :return: None
+    """
+    if not args:
+        raise ValueError("load needs a file name")
+    filters = [arg for arg in args[1:]
+               if not arg.lower().startswith('rejects=')]
+    rejects = [arg.partition('=')[2] for arg in args[1:]
+               if arg.lower().startswith('rejects=')]
+    if len(rejects) > 1 or rejects and not rejects[0]:
+        raise ValueError("load takes one rejects=FILE")
+    where = parse_filters(filters)
+    load_characters(args[0], where or None,
+                    rejects[0] if rejects else None)
+
+
+def batch_select(args):
+    """
+    Batch command: display some columns of the rows of a file matching
+    filters, without loading them into the roster.
+    Usage: select FILE COLUMNS [FIELD=VALUES ...]
+    :param args: list, the command arguments
+    :return: None
+    """
+    if len(args) < 2:
+        raise ValueError("select needs a file name and columns")
+    columns = [column.lower() for column in args[1].split(',')]
+    where = parse_filters(args[2:]) or None
+    try:
+        rows = list(iter_rows(args[0], columns, where))
+    except OSError as e:
+        raise ValueError(f"could not read {args[0]}: {e}")
+
+    print(f"\n{'='*15} SELECTED ROWS {'='*15}")
+    print("  ".join(f"{column:<15}" for column in columns).rstrip())
+    for row in rows:
+        print("  ".join(f"{'' if row[column] is None else row[column]!s:<15}"
+                        for column in columns).rstrip())
+    print(f"{len(rows)} row(s) selected.")
+    print("="*50)
+    print()
+
+
+def batch_ranking(display):
+    """
+    Build a batch command running a one-argument wealth ranking query.
+    Usage: richest N, poorest N, percentile P or rank WEALTH
+    :param display: callable, the display function taking the argument
+    :return: callable, the batch command handler
+    """
+    def command(args):
+        if len(args) != 1:
+            raise ValueError("wealth rankings need exactly one argument")
+        if not characters:
+            raise ValueError("no characters to rank")
+        display(args[0])
+    return command
+
+
+def batch_sketch(args):
+    """
+    Batch command: display streaming statistics of a roster file
+    without loading it into the roster.
+    Usage: sketch FILE
+    :param args: list, the command arguments
+    :return: None
+    """
+    if len(args) != 1:
+        raise ValueError("sketch needs exactly one file name")
+    try:
+        display_sketch(sketch_file(args[0]))
+    except OSError as e:
+        raise ValueError(f"could not read {args[0]}: {e}")
+
+
+def parse_filters(args, fields=FIELDNAMES):
+    """
+    Parse FIELD=VALUES filter arguments. Several values may be given
+    separated by commas, for example race=Elf,Dwarf.
+    Raises ValueError if a filter is not recognised.
+    :param args: list, the filter arguments
+    :param fields: list, the field names that may be filtered on
+    :return: dict, field name -> list of allowed values
+    """
+    filters = {}
+    for arg in args:
+        key, _, values = arg.partition('=')
+        if key.lower() not in fields or not values:
+            raise ValueError(
+                f"unknown filter '{arg}', expected one of "
+                f"{', '.join(field + '=...' for field in fields)}")
+        filters[key.lower()] = values.split(',')
+    return filters
+
+
+def parse_partition_filters(args):
+    """
+    Parse race=... and role=... partition filters.
+    Raises ValueError if a filter is not recognised.
+    :param args: list, the filter arguments
+    :return: tuple, (races or None, roles or None)
+    """
+    filters = parse_filters(args, ['race', 'role'])
+    return filters.get('race'), filters.get('role')
+
+
+def batch_save_partitioned(args):
+    """
+    Batch command: save all characters to a directory partitioned by
+    race and role.
+    Usage: save-partitioned DIRECTORY [csv | jsonl]
+    :param args: list, the command arguments
+    :return: None
+    """
+    if len(args) not in (1, 2):
+        raise ValueError(
+            "save-partitioned needs a directory and optionally a format")
+    extension = '.' + (args[1].lower() if len(args) == 2 else 'csv')
+    if extension not in ('.csv',) + JSON_LINES_EXTENSIONS:
+        raise ValueError(f"unknown file format '{args[1]}'")
+    if not save_partitioned_characters(
+            characters.snapshot(), args[0], extension):
+        raise ValueError(f"could not save to {args[0]}")
+
+
+def batch_load_partitioned(args):
+    """
+    Batch command: load the chosen partitions of a partitioned save.
+    Usage: load-partitioned DIRECTORY [race=RACES] [role=ROLES]
+    :param args: list, the command arguments
+    :return: None
+    """
+    if not args:
+        raise ValueError("load-partitioned needs a directory")
+    races, roles = parse_partition_filters(args[1:])
+    loaded_characters = load_partitioned_characters(args[0], races, roles)
+    if loaded_characters:
+        characters.extend(
+            loaded_characters,
+            f"Load {len(loaded_characters):,} characters from {args[0]}")
+
+
+def batch_partition_totals(args):
+    """
+    Batch command: display the count and wealth of the chosen partitions
+    of a partitioned save from its manifest, without reading any
+    character data.
+    Usage: partition-totals DIRECTORY [race=RACES] [role=ROLES]
+    :param args: list, the command arguments
+    :return: None
+    """
+    if not args:
+        raise ValueError("partition-totals needs a directory")
+    races, roles = parse_partition_filters(args[1:])
+    try:
+        partitions = read_partition_manifest(args[0], races, roles)
+    except OSError as e:
+        raise ValueError(f"could not read the manifest: {e}")
+    count = sum(partition['count'] for partition in partitions)
+    total = sum(partition['total_wealth'] for partition in partitions)
+
+    print(f"\n{'='*15} PARTITION TOTALS {'='*15}")
+    for partition in partitions:
+        label = f"{partition['race']} {partition['role']}"
+        print(f"    {label:<16} {partition['count']:>10,} character(s) "
+              f"{partition['total_wealth']:>15,} Gold coins")
+    print(f"Total Characters      : {count:,}")
+    print(f"Total Wealth          : {total:,} Gold coins")
+    if count:
+        print(f"Average Wealth        : {total / count:,.2f} Gold coins")
+    print("="*50)
+    print()
+
+
+def batch_scan(args):
+    """
+    Batch command: display wealth and mana aggregates of a roster file
+    computed straight from the file, optionally grouped.
+    Usage: scan FILE [race] [role]
+    :param args: list, the command arguments
+    :return: None
+    """
+    if not args:
+        raise ValueError("scan needs a file name")
+    try:
+        display_scan(scan_file(args[0], args[1:]))
+    except OSError as e:
+        raise ValueError(f"could not read {args[0]}: {e}")
+
+
+# Most changes listed by the diff batch command
+DIFF_DISPLAY_LIMIT = 20
+
+
+def batch_diff(args):
+    """
+    Batch command: list the characters added, removed or changed between
+    two roster files, or merge them into a third file. Characters are
+    matched by name unless key=FIELDS names other fields.
+    Usage: diff OLD NEW [key=FIELDS] [merge=OUTPUT]
+    :param args: list, the command arguments
+    :return: None
+    """
+    if len(args) < 2:
+        raise ValueError("diff needs an old and a new file name")
+    options = parse_filters(args[2:], ['key', 'merge'])
+    key_fields = [field.lower() for field in options.get('key', ['name'])]
+    try:
+        if 'merge' in options:
+            output = ','.join(options['merge'])
+            summary = merge_files(args[0], args[1], output, key_fields)
+            display_summary(summary)
+            print(f"Merged roster written to {output}")
+            print()
+            return
+        summary = DiffSummary()
+        print(f"\n{'='*15} ROSTER DIFFERENCES {'='*15}")
+        shown = 0
+        for change in diff_files(args[0], args[1], key_fields,
+                                 summary=summary):
+            if shown < DIFF_DISPLAY_LIMIT:
+                print(describe_change(change))
+                shown += 1
+        changes = sum(summary.counts.values()) - summary.counts['unchanged']
+        if changes > shown:
+            print(f"... and {changes - shown:,} more.")
+        display_summary(summary)
+        print("="*50)
+        print()
+    except OSError as e:
+        raise ValueError(f"could not compare {args[0]} and {args[1]}: {e}")
+
+
+def batch_sort(args):
+    """
+    Batch command: sort the characters of a roster file by some of their
+    fields into another file, without loading them. Files larger than
+    memory are sorted in runs on disk.
+    Usage: sort INPUT OUTPUT [by=FIELDS] [order=asc|desc]
+    :param args: list, the command arguments
+    :return: None
+    """
+    if len(args) < 2:
+        raise ValueError("sort needs an input and an output file name")
+    options = parse_filters(args[2:], ['by', 'order'])
+    key_fields = [field.lower() for field in options.get('by', ['name'])]
+    order = ','.join(options.get('order', ['asc'])).lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be asc or desc")
+    try:
+        count = sort_file(args[0], args[1], key_fields, order == 'desc')
+    except OSError as e:
+        raise ValueError(f"could not sort {args[0]}: {e}")
+    print(f"Sorted {count:,} character(s) into {args[1]}")
+    print()
+
+
+def batch_save(args):
+    """
+    Batch command: save all characters to a CSV file.
+    Usage: save FILE
+    :param args: list, the command arguments
+    :return: None
+    """
+    if len(args) != 1:
+        raise ValueError("save needs exactly one file name")
+    if not save_characters_to_file(characters.snapshot(), args[0]):
+        raise ValueError(f"could not save to {args[0]}")
+
+
+# Batch commands which take no arguments mapped to their menu handlers
+BATCH_MENU_COMMANDS = {
+    'list': list_all_characters,
+    'totals': total_wealth,
+    'undo': undo_change,
+    'redo': redo_change,
+}
+
+# Batch commands which take arguments mapped to their handlers
+BATCH_COMMANDS = {
+    'load': batch_load,
+    'search': batch_search,
+    'save': batch_save,
+    'scan': batch_scan,
+    'diff': batch_diff,
+    'sort': batch_sort,
+    'select': batch_select,
+    'sketch': batch_sketch,
+    'save-partitioned': batch_save_partitioned,
+    'load-partitioned': batch_load_partitioned,
+    'partition-totals': batch_partition_totals,
+    'richest': batch_ranking(display_richest),
+    'poorest': batch_ranking(display_poorest),
+    'percentile': batch_ranking(display_percentile),
+    'rank': batch_ranking(display_wealth_rank),
+}
+
+
+def run_batch(lines, timing=False):
+    """
+    Run a script of commands without displaying menus or prompts.
+    One command per line; blank lines and lines starting with '#' are
+    ignored. Consecutive add commands are validated one by one but
+    added to the roster in a single write. Errors are reported with
+    their line number and the script carries on.
+    :param lines: iterable, the lines of the script
+    :param timing: bool, print the time taken by each command
+    :return: int, number of commands that failed
+    """
+    errors = 0
+    pending = []
+    add_started = None
+    script_started = time.perf_counter()
+
+    def flush_adds():
+        if pending:
+            characters.extend(pending, f"Add {len(pending)} character(s)")
+            if timing:
+                elapsed = time.perf_counter() - add_started
+                print(f"[timing] add x{len(pending)}: {elapsed:.4f}s")
+            pending.clear()
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            command, *args = shlex.split(line)
+            command = command.lower()
+            if command == 'add':
+                if not pending:
+                    add_started = time.perf_counter()
+                batch_add(args, pending)
+                continue
+
+            flush_adds()
+            started = time.perf_counter()
+            if command in BATCH_MENU_COMMANDS:
+                if args:
+                    raise ValueError(f"{command} takes no arguments")
+                BATCH_MENU_COMMANDS[command]()
+            elif command in BATCH_COMMANDS:
+                BATCH_COMMANDS[command](args)
+            else:
+                raise ValueError(f"unknown command '{command}'")
+            if timing:
+                elapsed = time.perf_counter() - started
+                print(f"[timing] {command}: {elapsed:.4f}s")
+        except ValueError as e:
+            errors += 1
+            print(f"Line {line_number}: {e}")
+
+    flush_adds()
+    if timing:
+        elapsed = time.perf_counter() - script_started
+        print(f"[timing] total: {elapsed:.4f}s")
+    return errors
 
 
 def main():
@@ -421,7 +1113,21 @@ def main():
             save_characters()
         elif choice == "7":
             load_characters()
+        elif choice == "8":
+            show_background_save_status()
+        elif choice == "9":
+            list_names_by_prefix()
+        elif choice == "10":
+            browse_characters_gui()
+        elif choice == "11":
+            wealth_rankings()
+        elif choice == "12":
+            undo_change()
+        elif choice == "13":
+            redo_change()
         elif choice == "0":
+            wait_for_background_save()
+            gui_session.close()
             print("\nThank you for using Fantasy Game Character Manager!")
             print("Goodbye!")
             break
@@ -429,5 +1135,38 @@ def main():
             print(f"\nInvalid selection '{choice}'. Please try again.\n")
 
 
+def run_from_command_line():
+    """
+    Start the interactive menu, or run a batch script if one is given.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Fantasy Game Character Manager")
+    parser.add_argument(
+        '--batch', metavar='SCRIPT',
+        help="run commands from SCRIPT ('-' for standard input) "
+             "instead of the interactive menu")
+    parser.add_argument(
+        '--timing', action='store_true',
+        help="print the time taken by each batch command")
+    parser.add_argument(
+        '--cache', action='store_true',
+        help="keep parsed copies of loaded files in the roster cache, so "
+             "unchanged files load faster next time")
+    args = parser.parse_args()
+
+    if args.cache:
+        global roster_cache
+        roster_cache = RosterCache()
+
+    if args.batch is None:
+        main()
+    elif args.batch == '-':
+        sys.exit(1 if run_batch(sys.stdin, args.timing) else 0)
+    else:
+        with open(args.batch) as script:
+            sys.exit(1 if run_batch(script, args.timing) else 0)
+
+
 if __name__ == "__main__":
-    main()
+    run_from_command_line()
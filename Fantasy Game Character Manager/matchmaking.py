@@ -0,0 +1,390 @@
+# matchmaking.py
+
+"""
+Skill-balanced matchmaking of characters into parties.
+
+This module defines the Matchmaker class, which keeps characters waiting
+for a party in queues bucketed by role, skill level and race, and forms
+parties of a fixed composition (such as two warriors and two mages)
+whose members' skill levels are within a given spread, optionally all
+of one race. Characters join and leave the queues in constant time, and
+forming a party only looks at the heads of the few buckets inside each
+skill window, never at the whole queue, so its cost does not grow with
+the number of characters waiting.
+
+Among the parties that can be formed, the one preferred by the balancing
+objective is chosen: by default the party with the narrowest range of
+skill levels, then the one whose longest-waiting member has waited
+longest. Other objectives are named in OBJECTIVES, or any function
+taking a Party and returning a value to minimize can be given.
+"""
+
+import argparse
+import heapq
+import time
+from collections import Counter, OrderedDict
+from itertools import islice
+from file_manager import load_characters_from_file
+
+# Members of each role in a party, by default
+PARTY_COMPOSITION = {'Warrior': 2, 'Mage': 2}
+
+# Largest difference between the skill levels of a party, by default
+MAX_SKILL_SPREAD = 1
+
+
+class Party:
+    """
+    A party formed by a Matchmaker: its members and how long each of
+    them waited in the queue.
+    """
+
+    def __init__(self, members, waits):
+        """
+        Initialize a Party.
+        :param members: list, Character objects in the party
+        :param waits: list, the time each member waited, in the same
+        order
+        """
+        self.members = members
+        self.waits = waits
+
+    def skill_spread(self):
+        """
+        Get the difference between the highest and lowest skill level.
+        :return: int, the spread of skill levels
+        """
+        levels = [int(member.get_skill_level()) for member in self.members]
+        return max(levels) - min(levels)
+
+    def role_skill_gap(self):
+        """
+        Get the difference between the highest and lowest average skill
+        level of the roles in the party.
+        :return: float, the gap between the roles' average skill levels
+        """
+        totals = Counter()
+        counts = Counter()
+        for member in self.members:
+            totals[member.get_role()] += int(member.get_skill_level())
+            counts[member.get_role()] += 1
+        averages = [totals[role] / counts[role] for role in counts]
+        return max(averages) - min(averages)
+
+    def __str__(self):
+        """
+        String representation of the Party.
+        :return: str, the members' names, roles and skill levels
+        """
+        return ", ".join(f"{member.get_name()} ({member.get_role()} "
+                         f"{member.get_skill_level()})"
+                         for member in self.members)
+
+
+def skill_objective(party):
+    """
+    Prefer parties with the narrowest range of skill levels, then those
+    that have waited longest.
+    :param party: Party, a candidate party
+    :return: tuple, the party's score; lower is better
+    """
+    return party.skill_spread(), -max(party.waits)
+
+
+def role_balance_objective(party):
+    """
+    Prefer parties whose roles have the closest average skill levels,
+    then those that have waited longest.
+    :param party: Party, a candidate party
+    :return: tuple, the party's score; lower is better
+    """
+    return party.role_skill_gap(), -max(party.waits)
+
+
+def wait_objective(party):
+    """
+    Prefer parties that have waited longest, then those with the
+    narrowest range of skill levels.
+    :param party: Party, a candidate party
+    :return: tuple, the party's score; lower is better
+    """
+    return -max(party.waits), party.skill_spread()
+
+
+# Balancing objectives by name
+OBJECTIVES = {
+    'skill': skill_objective,
+    'role-balance': role_balance_objective,
+    'wait': wait_objective,
+}
+
+
+def _ticket(item):
+    """
+    Get the order in which a queued character joined.
+    :param item: tuple, (character, (ticket, time joined))
+    :return: int, the ticket
+    """
+    return item[1][0]
+
+
+class Matchmaker:
+    """
+    Queues of characters waiting for a party, bucketed by role, skill
+    level and race, and the forming of balanced parties from them.
+    """
+
+    def __init__(self, composition=None, max_spread=MAX_SKILL_SPREAD,
+                 same_race=False, objective='skill'):
+        """
+        Initialize an empty Matchmaker.
+        Raises ValueError if the composition has no members, the spread
+        is negative or the objective is unknown.
+        :param composition: dict or None, role -> members of that role
+        in a party; PARTY_COMPOSITION by default
+        :param max_spread: int, largest difference between the skill
+        levels of a party's members
+        :param same_race: bool, whether a party's members must all be of
+        one race
+        :param objective: str or callable, a name in OBJECTIVES or a
+        function taking a Party and returning a value to minimize
+        """
+        composition = dict(composition or PARTY_COMPOSITION)
+        if not composition or any(count < 1
+                                  for count in composition.values()):
+            raise ValueError("A party needs at least one member of each "
+                             "of its roles.")
+        if max_spread < 0:
+            raise ValueError("The skill spread cannot be negative.")
+        if not callable(objective):
+            if objective not in OBJECTIVES:
+                raise ValueError(f"Unknown objective '{objective}'.")
+            objective = OBJECTIVES[objective]
+        self._composition = composition
+        self._max_spread = max_spread
+        self._same_race = same_race
+        self._objective = objective
+        # (role, skill level, race) -> character -> (ticket, time joined)
+        self._buckets = {}
+        self._where = {}
+        self._levels = Counter()
+        self._races = Counter()
+        self._tickets = 0
+
+    def enqueue(self, character, now=None):
+        """
+        Add a character to the queue.
+        Raises ValueError if the character is already queued or no party
+        needs its role.
+        :param character: Character, the character
+        :param now: float or None, the time it joins; time.monotonic()
+        by default
+        :return: None
+        """
+        if character in self._where:
+            raise ValueError(f"{character.get_name()} is already queued.")
+        if character.get_role() not in self._composition:
+            raise ValueError(f"No party needs a {character.get_role()}.")
+        key = (character.get_role(), int(character.get_skill_level()),
+               character.get_race())
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = OrderedDict()
+        self._tickets += 1
+        bucket[character] = (self._tickets,
+                             time.monotonic() if now is None else now)
+        self._where[character] = key
+        self._levels[key[1]] += 1
+        self._races[key[2]] += 1
+
+    def dequeue(self, character):
+        """
+        Remove a character from the queue.
+        :param character: Character, the character
+        :return: bool, True if it was queued
+        """
+        key = self._where.pop(character, None)
+        if key is None:
+            return False
+        bucket = self._buckets[key]
+        del bucket[character]
+        if not bucket:
+            del self._buckets[key]
+        for counts, value in ((self._levels, key[1]), (self._races, key[2])):
+            counts[value] -= 1
+            if not counts[value]:
+                del counts[value]
+        return True
+
+    def _candidate(self, low, race):
+        """
+        Find the longest-waiting members for a party within a skill
+        window.
+        :param low: int, the lowest skill level of the window
+        :param race: str or None, the race of every member, or None for
+        any race
+        :return: list or None, (character, (ticket, time joined)) items
+        for the party, or None if the window does not have enough
+        """
+        races = (race,) if race is not None else tuple(self._races)
+        levels = range(low, low + self._max_spread + 1)
+        items = []
+        for role, count in self._composition.items():
+            buckets = [bucket for bucket in (
+                self._buckets.get((role, level, each))
+                for level in levels for each in races) if bucket]
+            if sum(map(len, buckets)) < count:
+                return None
+            if len(buckets) == 1:
+                items.extend(islice(buckets[0].items(), count))
+            else:
+                items.extend(islice(heapq.merge(
+                    *[bucket.items() for bucket in buckets], key=_ticket),
+                    count))
+        return items
+
+    def form_party(self, now=None):
+        """
+        Form the party preferred by the objective from the queue, and
+        remove its members from the queue.
+        :param now: float or None, the current time; time.monotonic()
+        by default
+        :return: Party or None, the party, or None if none can be formed
+        """
+        now = time.monotonic() if now is None else now
+        races = tuple(self._races) if self._same_race else (None,)
+        best = None
+        best_score = None
+        for race in races:
+            for low in sorted(self._levels):
+                items = self._candidate(low, race)
+                if items is None:
+                    continue
+                party = Party([character for character, _ in items],
+                              [now - joined for _, (_, joined) in items])
+                score = self._objective(party)
+                if best is None or score < best_score:
+                    best = party
+                    best_score = score
+        if best is not None:
+            for member in best.members:
+                self.dequeue(member)
+        return best
+
+    def form_parties(self, now=None, limit=None):
+        """
+        Form parties from the queue until no more can be formed.
+        :param now: float or None, the current time; time.monotonic()
+        by default
+        :param limit: int or None, the most parties to form
+        :return: list, the Party objects in the order they were formed
+        """
+        now = time.monotonic() if now is None else now
+        parties = []
+        while limit is None or len(parties) < limit:
+            party = self.form_party(now)
+            if party is None:
+                break
+            parties.append(party)
+        return parties
+
+    def waiting(self, role=None):
+        """
+        Count the characters waiting in the queue.
+        :param role: str or None, count only this role
+        :return: int, the number of characters waiting
+        """
+        if role is None:
+            return len(self._where)
+        return sum(len(bucket) for key, bucket in self._buckets.items()
+                   if key[0] == role)
+
+    def __contains__(self, character):
+        """
+        Check whether a character is queued.
+        :param character: Character, the character
+        :return: bool, True if it is queued
+        """
+        return character in self._where
+
+    def __len__(self):
+        """
+        Number of characters waiting in the queue.
+        :return: int, the number of characters
+        """
+        return len(self._where)
+
+
+def _parse_composition(text):
+    """
+    Parse a party composition such as 'Warrior:2,Mage:2'.
+    Raises ValueError if it is malformed.
+    :param text: str, comma-separated role:count pairs
+    :return: dict, role -> members of that role
+    """
+    composition = {}
+    for part in text.split(','):
+        role, _, count = part.partition(':')
+        if not role.strip() or not count.strip().isdigit():
+            raise ValueError(f"Invalid party member '{part}'.")
+        composition[role.strip().capitalize()] = int(count)
+    return composition
+
+
+def main():
+    """
+    Parse command line arguments and form parties from the characters of
+    a roster file.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Form skill-balanced parties from a roster file.")
+    parser.add_argument('filename', help="the CSV or JSON Lines file")
+    parser.add_argument('--party', default='Warrior:2,Mage:2',
+                        help="members of each role (default: "
+                             "Warrior:2,Mage:2)")
+    parser.add_argument('--max-spread', type=int, default=MAX_SKILL_SPREAD,
+                        help="largest skill level difference in a party")
+    parser.add_argument('--same-race', action='store_true',
+                        help="form parties of a single race")
+    parser.add_argument('--objective', default='skill',
+                        choices=sorted(OBJECTIVES))
+    parser.add_argument('--show', type=int, default=10,
+                        help="parties to list (default: 10)")
+    args = parser.parse_args()
+
+    try:
+        matchmaker = Matchmaker(_parse_composition(args.party),
+                                args.max_spread, args.same_race,
+                                args.objective)
+        characters = load_characters_from_file(args.filename)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    except OSError as e:
+        print(f"Error loading characters from file: {e}")
+        return
+
+    start = time.perf_counter()
+    skipped = 0
+    for character in characters:
+        try:
+            matchmaker.enqueue(character, 0)
+        except ValueError:
+            skipped += 1
+    parties = matchmaker.form_parties(0)
+    elapsed = time.perf_counter() - start
+
+    for number, party in enumerate(parties[:args.show], 1):
+        print(f"Party {number}: {party}")
+    print(f"{len(parties):,} parties formed in {elapsed:.3f}s; "
+          f"{len(matchmaker):,} character(s) left waiting, "
+          f"{skipped:,} of other roles skipped.")
+    if parties:
+        spreads = Counter(party.skill_spread() for party in parties)
+        for spread, count in sorted(spreads.items()):
+            print(f"    skill spread {spread}: {count:,} parties")
+
+
+if __name__ == "__main__":
+    main()
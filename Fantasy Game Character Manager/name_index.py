@@ -0,0 +1,347 @@
+# name_index.py
+
+"""
+Name index for the character management system.
+
+This module defines the NameIndex class which supports fuzzy
+(typo-tolerant) name search over a large roster. It uses the pigeonhole
+principle: for each distance d up to max_distance, every name is cut
+into d + 1 segments, and since d edits can touch at most d of them, any
+name within distance d of a query has at least one segment appearing
+unchanged in the query at nearly the same position. A query therefore
+only looks up a few dozen exact segments in a dictionary, and edit
+distances are computed for the handful of names found. Distances are
+searched from 0 upwards, stopping at the first distance with matches,
+so the common single-typo case only uses the most selective index.
+
+The distinct names are also kept in a sorted list, so prefix
+completion is a binary search followed by a short slice.
+"""
+
+import bisect
+
+
+def edit_distance(first, second, max_distance):
+    """
+    Compute the Levenshtein distance between two strings.
+    Common prefixes and suffixes are stripped first, then the distance
+    is computed with Myers' bit-parallel algorithm, which processes a
+    whole column of the edit table per character using integer
+    bit operations.
+    :param first: str, the first string
+    :param second: str, the second string
+    :param max_distance: int, the largest distance of interest
+    :return: int, the edit distance, or max_distance + 1 if larger
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+
+    # Strip the common prefix and suffix, which cost nothing
+    start = 0
+    shortest = min(len(first), len(second))
+    while start < shortest and first[start] == second[start]:
+        start += 1
+    end = 0
+    while end < shortest - start and \
+            first[-1 - end] == second[-1 - end]:
+        end += 1
+    first = first[start:len(first) - end]
+    second = second[start:len(second) - end]
+    if len(first) > len(second):
+        first, second = second, first
+    if not first:
+        return min(len(second), max_distance + 1)
+
+    # Bit masks of the positions of each character in the shorter string
+    peq = {}
+    for i, char in enumerate(first):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    full = (1 << len(first)) - 1
+    last = 1 << (len(first) - 1)
+    pv = full
+    mv = 0
+    score = len(first)
+    for char in second:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh = mh << 1
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv & full
+    return min(score, max_distance + 1)
+
+
+def name_segments(length, segment_count):
+    """
+    Split a name length into segment_count near-equal segments, with
+    any longer segments at the end.
+    :param length: int, the length of the name
+    :param segment_count: int, the number of segments
+    :return: list, of (start, size) tuples, one per segment
+    """
+    size, longer = divmod(length, segment_count)
+    segments = []
+    start = 0
+    for i in range(segment_count):
+        segment_size = size + (1 if i >= segment_count - longer else 0)
+        segments.append((start, segment_size))
+        start += segment_size
+    return segments
+
+
+class NameIndex:
+    """
+    Segment index over character names for fuzzy search.
+    Names are indexed case-insensitively; every character sharing a
+    name is kept under the same index entry.
+    """
+
+    def __init__(self, max_distance=2):
+        """
+        Initialize an empty NameIndex.
+        :param max_distance: int, the largest edit distance searches
+        may use; one segment index is kept per distance up to this
+        """
+        self._max_distance = max_distance
+        self._names = []
+        self._name_ids = {}
+        self._items = []
+        self._ids_by_length = {}
+        self._sorted_names = []
+        # Segment index per distance: (length, segment, text) -> name ids
+        self._segments = {distance: {}
+                          for distance in range(1, max_distance + 1)}
+
+    def add(self, name, item):
+        """
+        Add an item to the index under the given name.
+        :param name: str, the name to index the item under
+        :param item: object, the item returned by searches (a Character)
+        :return: None
+        """
+        key = self._add(name, item)
+        if key is not None:
+            bisect.insort(self._sorted_names, key)
+
+    def _add(self, name, item):
+        """
+        Add an item to every index except the sorted name list.
+        :param name: str, the name to index the item under
+        :param item: object, the item returned by searches
+        :return: str or None, the lowercase name if it was new
+        """
+        key = name.lower()
+        name_id = self._name_ids.get(key)
+        if name_id is not None:
+            self._items[name_id].append(item)
+            return None
+
+        name_id = len(self._names)
+        self._name_ids[key] = name_id
+        self._names.append(key)
+        self._items.append([item])
+        length = len(key)
+        self._ids_by_length.setdefault(length, []).append(name_id)
+        for distance, segments in self._segments.items():
+            if length <= distance:
+                # Too short to cut into non-empty segments
+                continue
+            for i, (start, size) in enumerate(
+                    name_segments(length, distance + 1)):
+                segment_key = (length, i, key[start:start + size])
+                segments.setdefault(segment_key, []).append(name_id)
+        return key
+
+    def add_characters(self, characters):
+        """
+        Add characters to the index under their names.
+        :param characters: iterable, Character objects to add
+        :return: None
+        """
+        self.add_many(
+            (character.get_name(), character) for character in characters)
+
+    def add_many(self, entries):
+        """
+        Add many items at once, sorting the new names in a single pass
+        rather than inserting them one by one.
+        :param entries: iterable, of (name, item) tuples
+        :return: None
+        """
+        new_names = []
+        for name, item in entries:
+            key = self._add(name, item)
+            if key is not None:
+                new_names.append(key)
+        if new_names:
+            # Sorting an already sorted list plus one new run is linear
+            self._sorted_names.extend(new_names)
+            self._sorted_names.sort()
+
+    def remove_last(self, entries):
+        """
+        Remove the most recently added items, undoing the add or add_many
+        calls that added them. Names left without items were first added
+        by those calls, so they are the newest name ids and are dropped
+        from the end of every list.
+        :param entries: iterable, of (name, item) tuples, the last items
+        added to the index
+        :return: None
+        """
+        removed = {}
+        for name, item in entries:
+            key = name.lower()
+            removed[key] = removed.get(key, 0) + 1
+        first_empty = len(self._names)
+        for key, count in removed.items():
+            name_id = self._name_ids[key]
+            items = self._items[name_id]
+            del items[len(items) - count:]
+            if not items:
+                first_empty = min(first_empty, name_id)
+
+        dropped = self._names[first_empty:]
+        for name_id in range(len(self._names) - 1, first_empty - 1, -1):
+            key = self._names[name_id]
+            length = len(key)
+            del self._name_ids[key]
+            self._ids_by_length[length].pop()
+            for distance, segments in self._segments.items():
+                if length <= distance:
+                    continue
+                for i, (start, size) in enumerate(
+                        name_segments(length, distance + 1)):
+                    segment_key = (length, i, key[start:start + size])
+                    ids = segments[segment_key]
+                    ids.pop()
+                    if not ids:
+                        del segments[segment_key]
+        del self._names[first_empty:]
+        del self._items[first_empty:]
+        if len(dropped) * 8 < len(self._sorted_names):
+            for key in dropped:
+                del self._sorted_names[
+                    bisect.bisect_left(self._sorted_names, key)]
+        elif dropped:
+            dropped = set(dropped)
+            self._sorted_names = [name for name in self._sorted_names
+                                  if name not in dropped]
+
+    def complete(self, prefix, limit=10):
+        """
+        List the names starting with the given prefix, alphabetically.
+        :param prefix: str, the start of the name, in any case
+        :param limit: int, the maximum number of names returned
+        :return: list, of (name, count) tuples where count is the number
+        of characters sharing the name
+        """
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self._sorted_names, prefix)
+        completions = []
+        for name in self._sorted_names[start:start + limit]:
+            if not name.startswith(prefix):
+                break
+            completions.append(
+                (name, len(self._items[self._name_ids[name]])))
+        return completions
+
+    def count(self, name):
+        """
+        Count the characters with exactly the given name.
+        :param name: str, the name, in any case
+        :return: int, the number of characters with the name
+        """
+        name_id = self._name_ids.get(name.lower())
+        return 0 if name_id is None else len(self._items[name_id])
+
+    def _candidates(self, query, max_distance):
+        """
+        Find the ids of names that could be within max_distance of the
+        query. For each possible name length, each segment of such a
+        name is looked up at every query position it could have moved
+        to. Considering the first unchanged segment of a match, at most
+        i edits fall before segment i and at most max_distance - i after
+        it, which narrows the positions to check (the multi-match-aware
+        selection of Li et al., "PASS-JOIN", VLDB 2011).
+        :param query: str, the lowercase search text
+        :param max_distance: int, the largest edit distance allowed
+        :return: set, candidate name ids
+        """
+        candidates = set()
+        segments = self._segments[max_distance]
+        segment_count = max_distance + 1
+        for length in range(max(1, len(query) - max_distance),
+                            len(query) + max_distance + 1):
+            if length <= max_distance:
+                # Short names have no segments, so check them all
+                candidates.update(self._ids_by_length.get(length, ()))
+                continue
+            shift = len(query) - length
+            for i, (start, size) in enumerate(
+                    name_segments(length, segment_count)):
+                after = max_distance - i
+                first = max(0, start - i, start + shift - after)
+                last = min(len(query) - size,
+                           start + i, start + shift + after)
+                for position in range(first, last + 1):
+                    ids = segments.get(
+                        (length, i, query[position:position + size]))
+                    if ids:
+                        candidates.update(ids)
+        return candidates
+
+    def fuzzy_search(self, query, max_distance=2, limit=10):
+        """
+        Find the names closest to the query by edit distance.
+        Only names at the smallest edit distance with any match are
+        returned, ranked by similarity score (1 - distance / longer
+        length), then alphabetically.
+        Raises ValueError if max_distance is larger than the index allows.
+        :param query: str, the text to search for
+        :param max_distance: int, the largest edit distance to accept
+        :param limit: int, the maximum number of distinct names returned
+        :return: list, of (name, distance, similarity, items) tuples
+        """
+        if max_distance > self._max_distance:
+            raise ValueError(
+                f"Fuzzy search distance cannot exceed {self._max_distance}.")
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        matches = []
+        name_id = self._name_ids.get(query)
+        if name_id is not None:
+            matches.append((0, -1.0, query, name_id))
+
+        for distance_limit in range(1, max_distance + 1):
+            if matches:
+                break
+            for name_id in self._candidates(query, distance_limit):
+                name = self._names[name_id]
+                distance = edit_distance(query, name, distance_limit)
+                if distance == distance_limit:
+                    similarity = 1 - distance / max(len(query), len(name))
+                    matches.append((distance, -similarity, name, name_id))
+
+        matches.sort()
+        return [(name, distance, -negative_similarity,
+                 list(self._items[name_id]))
+                for distance, negative_similarity, name, name_id
+                in matches[:limit]]
+
+    def __len__(self):
+        """
+        Number of distinct names in the index.
+        :return: int, the number of distinct names
+        """
+        return len(self._names)
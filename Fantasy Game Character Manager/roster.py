@@ -0,0 +1,522 @@
+# roster.py
+
+"""
+Thread-safe character roster for the character management system.
+
+This module defines the ReadWriteLock and Roster classes. The Roster
+holds the characters of the application and lets many reader threads
+search and total the roster while a single writer adds characters.
+
+Characters are only ever added to the end of a roster, so every earlier
+state of it is a prefix of the current one. An undo step is therefore
+just the length of the roster before a change: recording one costs
+nothing however large the roster is, and undoing a change cuts the
+roster and its indexes back to that length in time proportional to the
+size of the change alone.
+"""
+
+import contextlib
+import threading
+from name_index import NameIndex
+from wealth_index import WealthIndex
+
+# Most changes a roster remembers for undo
+ROSTER_UNDO_LIMIT = 100
+
+
+class ReadWriteLock:
+    """
+    Lock allowing many concurrent readers or one exclusive writer.
+    Waiting writers take priority over new readers so a steady stream
+    of queries cannot starve an import.
+    """
+
+    def __init__(self):
+        """
+        Initialize an unlocked ReadWriteLock.
+        """
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        """
+        Acquire the lock for reading, waiting while a writer holds or
+        is waiting for it.
+        :return: None
+        """
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self):
+        """
+        Release a read hold on the lock.
+        :return: None
+        """
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Acquire the lock for writing, waiting for all readers to leave.
+        :return: None
+        """
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        """
+        Release the write hold on the lock.
+        :return: None
+        """
+        with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+
+    def read_locked(self):
+        """
+        Context manager holding the lock for reading.
+        :return: _LockHold, context manager for a read hold
+        """
+        return _LockHold(self.acquire_read, self.release_read)
+
+    def write_locked(self):
+        """
+        Context manager holding the lock for writing.
+        :return: _LockHold, context manager for a write hold
+        """
+        return _LockHold(self.acquire_write, self.release_write)
+
+
+class _LockHold:
+    """
+    Context manager calling an acquire function on entry and a release
+    function on exit.
+    """
+
+    def __init__(self, acquire, release):
+        """
+        Initialize the context manager.
+        :param acquire: callable, called on entry
+        :param release: callable, called on exit
+        """
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._release()
+        return False
+
+
+class Roster:
+    """
+    Thread-safe container for the application's characters.
+    Queries take a shared read lock and may run on many threads at once;
+    additions take the exclusive write lock. Iterating a Roster iterates
+    over a snapshot, so a loop is never disturbed by concurrent additions.
+    A NameIndex is kept up to date with every addition for fuzzy search,
+    and a WealthIndex, refreshed whenever a character's wealth is set,
+    answers richest, poorest and percentile queries.
+    Every append or extend is an undo step; undo removes the characters
+    it added and redo adds them back.
+    """
+
+    def __init__(self, characters=None):
+        """
+        Initialize a Roster, optionally with existing characters.
+        :param characters: iterable or None, initial Character objects
+        """
+        self._lock = ReadWriteLock()
+        self._characters = list(characters) if characters else []
+        self._name_index = NameIndex()
+        self._wealth_index = WealthIndex()
+        # id of each character -> its position, or a tuple of positions
+        # if the same character was added more than once
+        self._positions = {}
+        # Number of leading characters the indexes cover; they are up to
+        # date when it equals the roster length, and None when they must
+        # be rebuilt
+        self._index_length = None
+        self._refresh_indexes()
+        # Undo steps as (roster length before the change, description);
+        # redo steps also hold the characters the undo removed
+        self._undo_steps = []
+        self._redo_steps = []
+
+    def _index_characters(self, start):
+        """
+        Add the characters from the given position onwards to the name
+        and wealth indexes. Must be called with the write lock held.
+        :param start: int, position of the first new character
+        :return: None
+        """
+        new_characters = self._characters[start:]
+        if len(new_characters) == 1:
+            self._name_index.add(new_characters[0].get_name(),
+                                 new_characters[0])
+        else:
+            self._name_index.add_characters(new_characters)
+        self._wealth_index.add_many(
+            (character.get_wealth(), position)
+            for position, character in enumerate(new_characters, start))
+        positions = self._positions
+        for position, character in enumerate(new_characters, start):
+            known = positions.setdefault(id(character), position)
+            if known == position:
+                character.add_wealth_observer(self)
+            else:
+                if not isinstance(known, tuple):
+                    known = (known,)
+                positions[id(character)] = known + (position,)
+        self._index_length = len(self._characters)
+
+    def _unindex_characters(self, start, removed):
+        """
+        Remove characters that were cut from the end of the roster from
+        the name and wealth indexes. Must be called with the write lock
+        held.
+        :param start: int, the position of the first removed character
+        :param removed: list, the removed Character objects in order
+        :return: None
+        """
+        self._name_index.remove_last(
+            (character.get_name(), character) for character in removed)
+        self._wealth_index.remove_many(
+            (character.get_wealth(), position)
+            for position, character in enumerate(removed, start))
+        positions = self._positions
+        # A character removed from several positions is unindexed once,
+        # keeping the positions before start
+        for character in {id(character): character
+                          for character in removed}.values():
+            known = positions.pop(id(character), None)
+            if not isinstance(known, tuple):
+                known = () if known is None else (known,)
+            known = tuple(position for position in known
+                          if position < start)
+            if known:
+                positions[id(character)] = \
+                    known if len(known) > 1 else known[0]
+            else:
+                character.remove_wealth_observer(self)
+        self._index_length = start
+
+    def _refresh_indexes(self):
+        """
+        Bring the indexes up to date after undo cut the roster, either by
+        removing the cut characters from them or, when fewer characters
+        are left than were cut, by indexing the rest again. Must be
+        called with the write lock held.
+        :return: None
+        """
+        length = len(self._characters)
+        if self._index_length == length:
+            return
+        if self._index_length is not None and \
+                self._index_length - length <= length:
+            # The characters still indexed are held by the redo steps,
+            # the most recently undone first
+            removed = []
+            for start, _, characters in reversed(self._redo_steps):
+                if start >= self._index_length:
+                    break
+                removed.extend(characters)
+            self._unindex_characters(
+                length, removed[:self._index_length - length])
+            return
+        self._name_index = NameIndex()
+        self._wealth_index = WealthIndex()
+        self._positions = {}
+        self._index_characters(0)
+
+    @contextlib.contextmanager
+    def _indexes_read_locked(self):
+        """
+        Context manager holding the read lock with the indexes up to
+        date, refreshing them under the write lock first if needed.
+        :return: generator, for use in a with statement
+        """
+        while True:
+            self._lock.acquire_read()
+            if self._index_length == len(self._characters):
+                break
+            self._lock.release_read()
+            with self._lock.write_locked():
+                self._refresh_indexes()
+        try:
+            yield
+        finally:
+            self._lock.release_read()
+
+    def _record_step(self, start, description, join_last_step):
+        """
+        Record a change as an undo step and forget the undone changes,
+        which can no longer be redone. Must be called with the write
+        lock held.
+        :param start: int, the roster length before the change
+        :param description: str or None, what the change was
+        :param join_last_step: bool, True to make the change part of the
+        most recent undo step instead
+        :return: None
+        """
+        self._redo_steps = []
+        if join_last_step and self._undo_steps:
+            return
+        self._undo_steps.append((start, description))
+        if len(self._undo_steps) > ROSTER_UNDO_LIMIT:
+            del self._undo_steps[0]
+
+    def wealth_changed(self, character, old_wealth, new_wealth):
+        """
+        Move a character's wealth index entries after its wealth is set.
+        Called by Character.set_wealth for the rosters holding the
+        character; characters no longer in this roster are ignored.
+        :param character: Character, the character whose wealth changed
+        :param old_wealth: int, the previous wealth
+        :param new_wealth: int, the new wealth
+        :return: None
+        """
+        with self._lock.write_locked():
+            positions = self._positions.get(id(character))
+            if positions is None:
+                return
+            if self._index_length != len(self._characters):
+                # Waiting for a refresh after undo, which would remove
+                # the old wealth: index everything again instead
+                self._index_length = None
+                return
+            if not isinstance(positions, tuple):
+                positions = (positions,)
+            for position in positions:
+                self._wealth_index.move(old_wealth, new_wealth, position)
+
+    def wealth_changed_many(self, changes):
+        """
+        Move the wealth index entries of many characters after their
+        wealth is set, in one write. Called by Character.set_wealth_many
+        with the changes of the characters this roster holds; characters
+        no longer in it are ignored.
+        :param changes: list, (character, old wealth, new wealth) tuples
+        :return: None
+        """
+        with self._lock.write_locked():
+            if self._index_length != len(self._characters):
+                self._index_length = None
+                return
+            index = self._wealth_index
+            for character, old_wealth, new_wealth in changes:
+                positions = self._positions.get(id(character))
+                if positions is None:
+                    continue
+                if not isinstance(positions, tuple):
+                    positions = (positions,)
+                for position in positions:
+                    index.move(old_wealth, new_wealth, position)
+
+    def append(self, character, description=None):
+        """
+        Add a character to the roster as one undo step.
+        :param character: Character, the character to add
+        :param description: str or None, what the change was, reported
+        when it is undone or redone
+        :return: None
+        """
+        self.extend([character], description)
+
+    def extend(self, characters, description=None, join_last_step=False):
+        """
+        Add several characters to the roster in one write, as one undo
+        step.
+        :param characters: iterable, Character objects to add
+        :param description: str or None, what the change was, reported
+        when it is undone or redone
+        :param join_last_step: bool, True to add the characters to the
+        most recent undo step, for changes made in several writes such
+        as a file loaded in chunks
+        :return: None
+        """
+        characters = list(characters)
+        with self._lock.write_locked():
+            self._refresh_indexes()
+            start = len(self._characters)
+            self._record_step(start, description, join_last_step)
+            self._characters.extend(characters)
+            self._index_characters(start)
+
+    def undo(self):
+        """
+        Undo the most recent change, removing the characters it added.
+        Only the character list is cut here, which takes a moment even
+        for a million characters; the indexes catch up at the next query
+        that needs them, or not at all if the change is redone first.
+        :return: tuple or None, (description, number of characters
+        removed), None if there is nothing to undo
+        """
+        with self._lock.write_locked():
+            if not self._undo_steps:
+                return None
+            start, description = self._undo_steps.pop()
+            removed = self._characters[start:]
+            del self._characters[start:]
+            self._redo_steps.append((start, description, removed))
+            return description, len(removed)
+
+    def redo(self):
+        """
+        Redo the most recently undone change, adding its characters back.
+        :return: tuple or None, (description, number of characters
+        added), None if there is nothing to redo
+        """
+        with self._lock.write_locked():
+            if not self._redo_steps:
+                return None
+            start, description, characters = self._redo_steps.pop()
+            self._undo_steps.append((start, description))
+            self._characters.extend(characters)
+            if self._index_length == start:
+                self._index_characters(start)
+            # Otherwise the indexes either still cover these characters
+            # from before the undo or are refreshed when next needed
+            return description, len(characters)
+
+    def history(self):
+        """
+        Describe the changes that can be undone and redone.
+        :return: tuple, (undo descriptions, redo descriptions), each list
+        with the next step to be undone or redone first
+        """
+        with self._lock.read_locked():
+            return ([description for _, description
+                     in reversed(self._undo_steps)],
+                    [description for _, description, _
+                     in reversed(self._redo_steps)])
+
+    def snapshot(self):
+        """
+        Get an immutable copy of the roster at this moment.
+        :return: tuple, the Character objects currently in the roster
+        """
+        with self._lock.read_locked():
+            return tuple(self._characters)
+
+    def search_by_name(self, search_name):
+        """
+        Find characters whose name contains the given text.
+        Matching is case-insensitive.
+        :param search_name: str, the text to look for in names
+        :return: list, matching Character objects in roster order
+        """
+        search_name = search_name.lower()
+        with self._lock.read_locked():
+            return [char for char in self._characters
+                    if search_name in char.get_name().lower()]
+
+    def fuzzy_search(self, search_name, max_distance=2, limit=10):
+        """
+        Find the characters whose names are closest to the given text,
+        tolerating up to max_distance typos.
+        :param search_name: str, the name to look for
+        :param max_distance: int, the largest edit distance to accept
+        :param limit: int, the maximum number of distinct names returned
+        :return: list, of (name, distance, similarity, characters) tuples
+        ranked best first
+        """
+        with self._indexes_read_locked():
+            return self._name_index.fuzzy_search(
+                search_name, max_distance, limit)
+
+    def complete_names(self, prefix, limit=10):
+        """
+        List existing names starting with the given prefix.
+        :param prefix: str, the start of the name, in any case
+        :param limit: int, the maximum number of names returned
+        :return: list, of (name, count) tuples in alphabetical order
+        """
+        with self._indexes_read_locked():
+            return [(name.capitalize(), count) for name, count
+                    in self._name_index.complete(prefix, limit)]
+
+    def count_name(self, name):
+        """
+        Count the characters with exactly the given name.
+        :param name: str, the name, in any case
+        :return: int, the number of characters with the name
+        """
+        with self._indexes_read_locked():
+            return self._name_index.count(name)
+
+    def wealth_statistics(self):
+        """
+        Count the characters and total their wealth.
+        :return: tuple, (number of characters, total wealth)
+        """
+        with self._indexes_read_locked():
+            return len(self._characters), self._wealth_index.total()
+
+    def richest(self, count):
+        """
+        Get the wealthiest characters.
+        :param count: int, the maximum number of characters returned
+        :return: list, Character objects, richest first
+        """
+        with self._indexes_read_locked():
+            return [self._characters[position] for _, position
+                    in self._wealth_index.largest(count)]
+
+    def poorest(self, count):
+        """
+        Get the least wealthy characters.
+        :param count: int, the maximum number of characters returned
+        :return: list, Character objects, poorest first
+        """
+        with self._indexes_read_locked():
+            return [self._characters[position] for _, position
+                    in self._wealth_index.smallest(count)]
+
+    def wealth_rank(self, wealth):
+        """
+        Count the characters poorer than the given wealth.
+        :param wealth: int, the wealth in gold coins
+        :return: int, the number of characters with less wealth
+        """
+        with self._indexes_read_locked():
+            return self._wealth_index.rank(wealth)
+
+    def wealth_percentile(self, percent):
+        """
+        Get the wealth at a percentile of the roster (nearest rank).
+        Raises ValueError if percent is outside 0-100 or the roster is
+        empty.
+        :param percent: float, the percentile from 0 to 100
+        :return: int, the wealth at the percentile in gold coins
+        """
+        with self._indexes_read_locked():
+            return self._wealth_index.percentile(percent)
+
+    def __len__(self):
+        """
+        Number of characters in the roster.
+        :return: int, the roster size
+        """
+        with self._lock.read_locked():
+            return len(self._characters)
+
+    def __iter__(self):
+        """
+        Iterate over a snapshot of the roster.
+        :return: iterator, over the Character objects
+        """
+        return iter(self.snapshot())
@@ -0,0 +1,504 @@
+# roster_browser.py
+
+"""
+Roster browser GUI for the character management system.
+
+This module contains the RosterBrowser class which shows the roster in
+a table that stays responsive with millions of characters. Only the
+rows visible on screen exist as Treeview items; scrolling, sorting and
+filtering just change which characters those rows display.
+"""
+
+import bisect
+import tkinter as tk
+from tkinter import ttk, messagebox
+from warrior import Warrior
+from mage import Mage
+from file_manager import iter_characters
+from file_chooser import choose_open_file
+
+
+# Number of table rows kept on screen
+VISIBLE_ROWS = 20
+
+# Number of characters read from a file per GUI update while loading
+LOAD_CHUNK_SIZE = 5000
+
+# Milliseconds to wait after the last keystroke before filtering
+FILTER_DELAY_MS = 250
+
+# Table columns as (key, heading, width)
+COLUMNS = [
+    ('name', 'Name', 150),
+    ('race', 'Race', 70),
+    ('role', 'Role', 70),
+    ('skill_level', 'Skill', 50),
+    ('wealth', 'Wealth', 90),
+    ('details', 'Details', 190),
+    ]
+
+# Functions giving the sort key of a character for each sortable column
+SORT_KEYS = {
+    'name': lambda character: character.get_name(),
+    'race': lambda character: character.get_race(),
+    'role': lambda character: character.get_role(),
+    'skill_level': lambda character: int(character.get_skill_level()),
+    'wealth': lambda character: character.get_wealth(),
+    }
+
+
+def character_details(character):
+    """
+    Describe the role-specific attributes of a character.
+    :param character: Character, the character to describe
+    :return: str, the weapon and armour or spell and mana points
+    """
+    if isinstance(character, Warrior):
+        return f"{character.get_weapon()}, {character.get_armour()}"
+    if isinstance(character, Mage):
+        return f"{character.get_spell()}, {character.get_mana_points()} MP"
+    return ''
+
+
+class RosterBrowser:
+    """
+    GUI window for browsing, sorting and filtering the roster.
+    Sort orders are computed once per column and cached, race and role
+    filters use cached groups of row numbers, and a name prefix filter
+    is a binary search in the name order, so changing the view never
+    touches the Tk widgets for more than the visible rows.
+    """
+
+    def __init__(self, roster, master=None):
+        """
+        Initialize the roster browser window.
+        :param roster: Roster, the characters to browse; characters
+        loaded from a file in the browser are added to it
+        :param master: tk widget or None, parent window; when None the
+        browser owns its own Tk root
+        :return: None
+        """
+        self.roster = roster
+        self.rows = list(roster.snapshot())
+        self.view = range(len(self.rows))
+        self.offset = 0
+        self.sort_column = None
+        self.sort_reverse = False
+        self._sorted = {}
+        self._sorted_names = None
+        self._groups = {}
+        self._filter_job = None
+        self._loader = None
+        self._load_job = None
+        self._loaded = 0
+        self._load_filename = None
+
+        self._owns_root = master is None
+        self.root = tk.Tk() if master is None else tk.Toplevel(master)
+        self.root.title("Roster Browser")
+        self.root.geometry("720x560")
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Filters
+        filter_frame = ttk.Frame(main_frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(filter_frame, text="Name starts with:").pack(side=tk.LEFT)
+        self.name_var = tk.StringVar()
+        name_entry = ttk.Entry(
+            filter_frame, textvariable=self.name_var, width=15)
+        name_entry.pack(side=tk.LEFT, padx=(5, 10))
+        name_entry.bind('<KeyRelease>', self.on_filter_typed)
+
+        ttk.Label(filter_frame, text="Race:").pack(side=tk.LEFT)
+        self.race_var = tk.StringVar(value='All')
+        race_combo = ttk.Combobox(
+            filter_frame, textvariable=self.race_var,
+            values=['All', 'Elf', 'Dwarf', 'Human'], state='readonly',
+            width=7)
+        race_combo.pack(side=tk.LEFT, padx=(5, 10))
+        race_combo.bind('<<ComboboxSelected>>', self.refresh_view)
+
+        ttk.Label(filter_frame, text="Role:").pack(side=tk.LEFT)
+        self.role_var = tk.StringVar(value='All')
+        role_combo = ttk.Combobox(
+            filter_frame, textvariable=self.role_var,
+            values=['All', 'Warrior', 'Mage'], state='readonly', width=8)
+        role_combo.pack(side=tk.LEFT, padx=(5, 10))
+        role_combo.bind('<<ComboboxSelected>>', self.refresh_view)
+
+        self.load_button = ttk.Button(
+            filter_frame, text="Load File...", command=self.load_file)
+        self.load_button.pack(side=tk.RIGHT)
+        self.redo_button = ttk.Button(
+            filter_frame, text="Redo", command=self.redo, width=6)
+        self.redo_button.pack(side=tk.RIGHT, padx=(0, 5))
+        self.undo_button = ttk.Button(
+            filter_frame, text="Undo", command=self.undo, width=6)
+        self.undo_button.pack(side=tk.RIGHT, padx=(0, 5))
+
+        # Table with a fixed set of rows and a scrollbar driving them
+        table_frame = ttk.Frame(main_frame)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.tree = ttk.Treeview(
+            table_frame, columns=[key for key, heading, width in COLUMNS],
+            show='headings', height=VISIBLE_ROWS, selectmode='browse')
+        for key, heading, width in COLUMNS:
+            if key in SORT_KEYS:
+                self.tree.heading(
+                    key, text=heading,
+                    command=lambda column=key: self.sort_by(column))
+            else:
+                self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor=tk.W)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.scrollbar = ttk.Scrollbar(
+            table_frame, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.row_ids = [self.tree.insert('', tk.END, values=())
+                        for _ in range(VISIBLE_ROWS)]
+
+        self.tree.bind('<MouseWheel>', self.on_mouse_wheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_by(3))
+        self.root.bind('<Prior>', lambda event: self.scroll_by(-VISIBLE_ROWS))
+        self.root.bind('<Next>', lambda event: self.scroll_by(VISIBLE_ROWS))
+        self.root.bind('<Escape>', lambda event: self.close())
+
+        self.status_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.status_var).pack(
+            fill=tk.X, pady=(10, 0))
+
+        self.render()
+
+    def sort_key_order(self, column):
+        """
+        Get the row numbers ordered by a column, computing it only once.
+        :param column: str, the column key to sort by
+        :return: list, row numbers in ascending column order
+        """
+        if column not in self._sorted:
+            key = SORT_KEYS[column]
+            rows = self.rows
+            self._sorted[column] = sorted(
+                range(len(rows)), key=lambda i: key(rows[i]))
+        return self._sorted[column]
+
+    def name_prefix_range(self, prefix):
+        """
+        Find the span of the name order whose names start with a prefix.
+        :param prefix: str, the lowercase name prefix
+        :return: tuple, (start, end) positions in the name order
+        """
+        order = self.sort_key_order('name')
+        if self._sorted_names is None:
+            self._sorted_names = [
+                self.rows[i].get_name().lower() for i in order]
+        start = bisect.bisect_left(self._sorted_names, prefix)
+        end = bisect.bisect_left(self._sorted_names, prefix + '{')
+        return start, end
+
+    def group(self, column, value):
+        """
+        Get the set of row numbers with a given race or role.
+        :param column: str, 'race' or 'role'
+        :param value: str, the race or role to match
+        :return: set, matching row numbers
+        """
+        if column not in self._groups:
+            key = SORT_KEYS[column]
+            groups = {}
+            for i, character in enumerate(self.rows):
+                groups.setdefault(key(character), set()).add(i)
+            self._groups[column] = groups
+        return self._groups[column].get(value, set())
+
+    def refresh_view(self, event=None):
+        """
+        Recompute the visible order from the sort column and filters,
+        then redraw from the top.
+        :param event: tkinter event object, optional widget event
+        :return: None
+        """
+        self._filter_job = None
+        if self.sort_column is None:
+            order = range(len(self.rows))
+        else:
+            order = self.sort_key_order(self.sort_column)
+
+        prefix = self.name_var.get().strip().lower()
+        allowed = None
+        full_order = True
+        if prefix:
+            start, end = self.name_prefix_range(prefix)
+            if self.sort_column == 'name':
+                order = order[start:end]
+                full_order = False
+            else:
+                allowed = set(self._sorted['name'][start:end])
+
+        for column, var in (('race', self.race_var),
+                            ('role', self.role_var)):
+            if var.get() != 'All':
+                rows = self.group(column, var.get())
+                allowed = rows if allowed is None else allowed & rows
+
+        if allowed is not None:
+            if full_order and len(allowed) < len(order) // 8:
+                # Few matches: sorting them beats scanning the whole order
+                order = sorted(allowed)
+                if self.sort_column is not None:
+                    key = SORT_KEYS[self.sort_column]
+                    rows = self.rows
+                    order.sort(key=lambda i: key(rows[i]))
+            else:
+                order = [i for i in order if i in allowed]
+        if self.sort_reverse:
+            order = order[::-1]
+
+        self.view = order
+        self.offset = 0
+        self.render()
+
+    def sort_by(self, column):
+        """
+        Sort the table by a column, reversing if it is already sorted.
+        :param column: str, the column key to sort by
+        :return: None
+        """
+        if self._loader is not None:
+            return
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self.status_var.set("Sorting...")
+        self.root.update_idletasks()
+        self.refresh_view()
+
+    def on_filter_typed(self, event=None):
+        """
+        Schedule a filter update once typing pauses.
+        :param event: tkinter event object, optional key release event
+        :return: None
+        """
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(
+            FILTER_DELAY_MS, self.refresh_view)
+
+    def render(self):
+        """
+        Fill the visible rows from the current view and offset, and
+        update the scrollbar and status line.
+        :return: None
+        """
+        total = len(self.view)
+        self.offset = max(0, min(self.offset, total - VISIBLE_ROWS))
+        for position, row_id in enumerate(self.row_ids):
+            index = self.offset + position
+            if index < total:
+                character = self.rows[self.view[index]]
+                values = (
+                    character.get_name(),
+                    character.get_race(),
+                    character.get_role(),
+                    character.get_skill_level(),
+                    f"{character.get_wealth():,}",
+                    character_details(character))
+            else:
+                values = ()
+            self.tree.item(row_id, values=values)
+
+        if total:
+            self.scrollbar.set(
+                self.offset / total,
+                min(1.0, (self.offset + VISIBLE_ROWS) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        status = f"Showing {total:,} of {len(self.rows):,} characters"
+        if self._loader is not None:
+            status += f" - loading ({self._loaded:,} read)..."
+        self.status_var.set(status)
+
+    def on_scroll(self, action, amount, unit=None):
+        """
+        Handle scrollbar movement.
+        :param action: str, 'moveto' or 'scroll'
+        :param amount: str, the fraction to move to or steps to scroll
+        :param unit: str or None, 'units' or 'pages' when scrolling
+        :return: None
+        """
+        if action == 'moveto':
+            self.offset = int(float(amount) * len(self.view))
+            self.render()
+        elif unit == 'pages':
+            self.scroll_by(int(amount) * VISIBLE_ROWS)
+        else:
+            self.scroll_by(int(amount))
+
+    def on_mouse_wheel(self, event):
+        """
+        Scroll the table with the mouse wheel.
+        :param event: tkinter event object with the wheel delta
+        :return: None
+        """
+        self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def scroll_by(self, rows):
+        """
+        Move the visible window by a number of rows.
+        :param rows: int, rows to move; negative moves up
+        :return: None
+        """
+        self.offset += rows
+        self.render()
+
+    def load_file(self):
+        """
+        Load characters from a file a chunk at a time, so the window
+        keeps redrawing while a large file is read.
+        :return: None
+        """
+        if self._loader is not None:
+            return
+        filename = choose_open_file(
+            "Load Characters from File", parent=self.root)
+        if not filename:
+            return
+        try:
+            self._loader = iter_characters(filename)
+            # Read the first row now so a missing file fails immediately
+            first = next(self._loader, None)
+        except (OSError, ValueError, KeyError) as e:
+            self._loader = None
+            messagebox.showerror("Load Error", f"Error loading file: {e}")
+            return
+
+        for button in (self.load_button, self.undo_button,
+                       self.redo_button):
+            button.state(['disabled'])
+        self._loaded = 0
+        self._load_filename = filename
+        # Show rows in file order while loading
+        self.sort_column = None
+        self.sort_reverse = False
+        if first is not None:
+            self.add_rows([first])
+        self._load_job = self.root.after(0, self.load_chunk)
+
+    def load_chunk(self):
+        """
+        Read the next chunk of the file being loaded and schedule the
+        following one.
+        :return: None
+        """
+        self._load_job = None
+        if self._loader is None:
+            # The window was closed while the file was loading
+            return
+        chunk = []
+        try:
+            for character in self._loader:
+                chunk.append(character)
+                if len(chunk) >= LOAD_CHUNK_SIZE:
+                    break
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Load Error", f"Error loading file: {e}")
+            chunk = []
+            self._loader = None
+
+        if chunk:
+            self.add_rows(chunk)
+            self._load_job = self.root.after(1, self.load_chunk)
+            return
+
+        self._loader = None
+        for button in (self.load_button, self.undo_button,
+                       self.redo_button):
+            button.state(['!disabled'])
+        self.refresh_view()
+
+    def add_rows(self, characters):
+        """
+        Add characters to the roster and the table, dropping the cached
+        sort orders and groups which no longer cover every row. The
+        chunks of one file load make up a single undo step.
+        :param characters: list, Character objects to add
+        :return: None
+        """
+        self.roster.extend(characters, f"Load {self._load_filename}",
+                           join_last_step=self._loaded > 0)
+        self.rows.extend(characters)
+        self._loaded += len(characters)
+        self._sorted = {}
+        self._sorted_names = None
+        self._groups = {}
+        self.view = range(len(self.rows))
+        self.render()
+
+    def reload_rows(self):
+        """
+        Show the roster's current characters again after undo or redo,
+        keeping the sort column and filters.
+        :return: None
+        """
+        self.rows = list(self.roster.snapshot())
+        self._sorted = {}
+        self._sorted_names = None
+        self._groups = {}
+        self.refresh_view()
+
+    def undo(self):
+        """
+        Undo the most recent addition to the roster, such as a file load.
+        :return: None
+        """
+        undone = self.roster.undo()
+        if undone is None:
+            messagebox.showinfo("Undo", "Nothing to undo.", parent=self.root)
+            return
+        self.reload_rows()
+
+    def redo(self):
+        """
+        Redo the most recently undone addition to the roster.
+        :return: None
+        """
+        redone = self.roster.redo()
+        if redone is None:
+            messagebox.showinfo("Redo", "Nothing to redo.", parent=self.root)
+            return
+        self.reload_rows()
+
+    def close(self):
+        """
+        Close the browser window, cancelling any chunk load or filter
+        update still scheduled, as the Tk root may outlive the window.
+        :return: None
+        """
+        for job in (self._load_job, self._filter_job):
+            if job is not None:
+                self.root.after_cancel(job)
+        self._load_job = None
+        self._filter_job = None
+        self._loader = None
+        self.root.destroy()
+
+    def run(self):
+        """
+        Run the browser until the window is closed.
+        :return: None
+        """
+        if self._owns_root:
+            self.root.mainloop()
+        else:
+            self.root.wait_window()
@@ -0,0 +1,410 @@
+# roster_cache.py
+
+"""
+On-disk cache of parsed roster files.
+
+This module defines the RosterCache class, which keeps the validated
+characters of recently loaded roster files in a binary form that loads
+several times faster than parsing and validating the file again.
+
+Entries are content-addressed: each is stored under the BLAKE2b hash of
+the roster file's bytes, so copies of a file share one entry and any
+change to a file makes its old entry unreachable. An index maps each
+file path to its size, modification time and hash, so an unchanged file
+is recognised from a stat call without re-reading it. The cache is kept
+under a size limit by evicting the least recently used entries; an
+entry's modification time records when it was last used.
+
+Entries hold only plain values (strings, numbers and tuples) written
+with marshal: each character's field values, as saved by the codec of
+its class in character_registry, under the class's registered name.
+They are turned back into objects of registered classes only, and only
+the codec's fields are set. marshal is not meant for data from others,
+so the cache is for files this user loaded themselves: its directory is
+created readable by its owner only. marshal's format depends on the
+Python version, which is part of every entry's name.
+
+The index is read and rewritten under a lock, so programs sharing the
+cache do not lose each other's updates, and it only keeps the most
+recently used CACHE_INDEX_PATHS files that still exist.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import time
+from character_registry import codec_for_character, codec_for_class_name
+from garbage_collection import paused_garbage_collection
+
+try:
+    import fcntl
+except ImportError:
+    # No file locks on this platform: the index is only locked between
+    # the threads of one program
+    fcntl = None
+
+# Default cache location and size limit
+CACHE_DIRECTORY = os.path.join(
+    os.path.expanduser('~'), '.cache', 'fantasy_character_manager')
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Bytes hashed per read when computing a file's content hash
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Version of the entry layout; bump it when the layout changes
+CACHE_FORMAT = 2
+
+# Name of the file mapping roster paths to their size, mtime and hash
+CACHE_INDEX = 'index.json'
+
+# Name of the file locked while the index is updated
+CACHE_INDEX_LOCK = 'index.lock'
+
+# Most roster files the index remembers
+CACHE_INDEX_PATHS = 1000
+
+# Lock for index updates between the threads of this program
+_index_lock = threading.Lock()
+
+
+def file_digest(filename):
+    """
+    Compute the content hash of a file.
+    Raises OSError if the file cannot be read.
+    :param filename: str, path of the file
+    :return: str, hexadecimal BLAKE2b digest of the file's bytes
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def encode_characters(characters):
+    """
+    Convert characters to plain values for marshal: the registered names
+    of their classes, a class number per character and a tuple of field
+    values per character, as given by the class's codec.
+    Raises TypeError if a character's class is not registered.
+    :param characters: list, Character objects
+    :return: tuple, the plain encoding
+    """
+    classes = []
+    class_numbers = {}
+    numbers = bytearray()
+    rows = []
+    for character in characters:
+        codec = codec_for_character(character)
+        number = class_numbers.get(codec)
+        if number is None:
+            number = class_numbers[codec] = len(classes)
+            classes.append(codec.cls.__name__)
+        numbers.append(number)
+        rows.append(codec.encode(character))
+    return CACHE_FORMAT, classes, bytes(numbers), rows
+
+
+def decode_characters(encoded):
+    """
+    Rebuild characters from their plain encoding without re-validating
+    them. Only registered character classes are created, and only the
+    fields of their codecs are set.
+    Raises ValueError if the encoding is not understood or names a class
+    that is not registered.
+    :param encoded: tuple, as returned by encode_characters
+    :return: list, Character objects
+    """
+    layout, classes, numbers, rows = encoded
+    if layout != CACHE_FORMAT:
+        raise ValueError(f"Unknown cache format {layout}.")
+    constructors = []
+    for name in classes:
+        codec = codec_for_class_name(name)
+        if codec is None:
+            raise ValueError(f"{name!r} is not a registered character "
+                             f"class.")
+        constructors.append((codec.cls, codec.fields, tuple(
+            '_' + field for field in codec.fields)))
+
+    characters = []
+    for number, values in zip(numbers, rows):
+        cls, fields, attributes = constructors[number]
+        if not isinstance(values, tuple) or len(values) != len(fields):
+            raise ValueError(f"A cached {cls.__name__} does not have "
+                             f"{len(fields)} fields.")
+        character = cls.__new__(cls)
+        character.__dict__.update(zip(attributes, values))
+        characters.append(character)
+    return characters
+
+
+class RosterCache:
+    """
+    Size-limited, least recently used cache of parsed roster files.
+    """
+
+    def __init__(self, directory=CACHE_DIRECTORY,
+                 max_bytes=CACHE_MAX_BYTES):
+        """
+        Initialize a RosterCache; the directory is created when the
+        first entry is stored.
+        :param directory: str, where the cache files are kept
+        :param max_bytes: int, the largest total size of the entries
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def get_directory(self):
+        """
+        Get the cache directory.
+        :return: str, the directory holding the cache files
+        """
+        return self._directory
+
+    def _entry_path(self, digest):
+        """
+        Get the path of the entry for a content hash.
+        :param digest: str, the content hash of a roster file
+        :return: str, the path of the cache entry
+        """
+        version = f"py{sys.version_info[0]}{sys.version_info[1]}"
+        return os.path.join(self._directory, f"{digest}.{version}.cache")
+
+    @contextlib.contextmanager
+    def _index_locked(self):
+        """
+        Context manager holding the index lock, between threads and,
+        where the platform has file locks, between programs.
+        :return: generator, for use in a with statement
+        """
+        with _index_lock:
+            if fcntl is None:
+                yield
+                return
+            self._make_directory()
+            with open(os.path.join(self._directory, CACHE_INDEX_LOCK),
+                      'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _make_directory(self):
+        """
+        Create the cache directory, readable by its owner only, if it
+        does not exist.
+        :return: None
+        """
+        os.makedirs(self._directory, mode=0o700, exist_ok=True)
+
+    def _read_index(self):
+        """
+        Read the index of known roster files. Call with the index lock
+        held.
+        :return: dict, path -> {'size', 'mtime_ns', 'digest', 'used'};
+        empty if there is no readable index
+        """
+        try:
+            with open(os.path.join(self._directory, CACHE_INDEX)) as file:
+                index = json.load(file)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_file(self, name, data):
+        """
+        Write a file in the cache directory in one step, so a reader
+        never sees it half written.
+        :param name: str, the file's path
+        :param data: bytes, the contents
+        :return: None
+        """
+        self._make_directory()
+        descriptor, temporary = tempfile.mkstemp(dir=self._directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temporary, name)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def _digest(self, path, status):
+        """
+        Get the content hash of a roster file, from the index if its
+        size and modification time are unchanged.
+        Raises OSError if the file cannot be read.
+        :param path: str, absolute path of the roster file
+        :param status: os.stat_result, the file's current status
+        :return: str, the content hash
+        """
+        try:
+            with self._index_locked():
+                index = self._read_index()
+                entry = index.get(path)
+                if entry and entry.get('size') == status.st_size and \
+                        entry.get('mtime_ns') == status.st_mtime_ns:
+                    digest = entry['digest']
+                else:
+                    digest = file_digest(path)
+                index[path] = {'size': status.st_size,
+                               'mtime_ns': status.st_mtime_ns,
+                               'digest': digest, 'used': time.time()}
+                self._write_file(os.path.join(self._directory, CACHE_INDEX),
+                                 json.dumps(self._pruned(index)).encode())
+        except OSError:
+            # The cache directory is not writable; hash the file anyway
+            digest = file_digest(path)
+        return digest
+
+    def _pruned(self, index):
+        """
+        Drop the index entries of roster files that no longer exist, and
+        of the least recently used files beyond CACHE_INDEX_PATHS.
+        :param index: dict, the index
+        :return: dict, the entries to keep
+        """
+        kept = sorted(((entry.get('used', 0), path, entry)
+                       for path, entry in index.items()
+                       if isinstance(entry, dict)), reverse=True)
+        return {path: entry for _, path, entry in kept[:CACHE_INDEX_PATHS]
+                if os.path.exists(path)}
+
+    def load(self, filename, loader):
+        """
+        Get the characters of a roster file from the cache, or load them
+        with the given function and cache them.
+        Raises OSError if the roster file cannot be read.
+        :param filename: str, path of the roster file
+        :param loader: callable, taking the filename and returning an
+        iterable of Character objects, used on a miss
+        :return: list, the file's Character objects
+        """
+        path = os.path.abspath(filename)
+        status = os.stat(path)
+        entry = self._entry_path(self._digest(path, status))
+        try:
+            with open(entry, 'rb') as file, paused_garbage_collection():
+                characters = decode_characters(marshal.loads(file.read()))
+            os.utime(entry)
+            self.hits += 1
+            return characters
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # Unreadable entry: drop it and load the file instead
+            self._remove(entry)
+
+        self.misses += 1
+        characters = list(loader(filename))
+        after = os.stat(path)
+        if (after.st_size, after.st_mtime_ns) == \
+                (status.st_size, status.st_mtime_ns):
+            try:
+                with paused_garbage_collection():
+                    data = marshal.dumps(encode_characters(characters))
+                self._write_file(entry, data)
+                self.evict()
+            except (OSError, ValueError):
+                # Not cacheable here; the characters are still returned
+                pass
+        return characters
+
+    def _remove(self, path):
+        """
+        Delete a cache file, ignoring files already gone.
+        :param path: str, the file to delete
+        :return: None
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def entries(self):
+        """
+        List the cache entries, least recently used first.
+        :return: list, of (path, size in bytes, last used time) tuples
+        """
+        try:
+            names = os.listdir(self._directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith('.cache'):
+                continue
+            path = os.path.join(self._directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, status.st_size, status.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits its size
+        limit.
+        :return: int, the number of entries deleted
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        deleted = 0
+        for path, size, _ in entries:
+            if total <= self._max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            deleted += 1
+        return deleted
+
+    def clear(self):
+        """
+        Delete every entry and the index.
+        :return: int, the number of entries deleted
+        """
+        entries = self.entries()
+        for path, _, _ in entries:
+            self._remove(path)
+        if os.path.isdir(self._directory):
+            with self._index_locked():
+                self._remove(os.path.join(self._directory, CACHE_INDEX))
+        return len(entries)
+
+
+def main():
+    """
+    Parse command line arguments and show or clear the cache.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Inspect or clear the parsed roster cache.")
+    parser.add_argument('--directory', default=CACHE_DIRECTORY)
+    parser.add_argument('--clear', action='store_true',
+                        help="delete every cached roster")
+    args = parser.parse_args()
+
+    cache = RosterCache(args.directory)
+    if args.clear:
+        print(f"Deleted {cache.clear()} cached roster(s).")
+        return
+    entries = cache.entries()
+    total = sum(size for _, size, _ in entries)
+    print(f"{len(entries)} cached roster(s), {total / 1e6:.1f} MB "
+          f"in {cache.get_directory()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,552 @@
+# roster_diff.py
+
+"""
+Differences between two roster files, and merging them.
+
+This module compares an old and a new roster file by key (the name by
+default) and streams out the characters that were added, removed or
+changed, with the old and new value of every changed field. It can also
+merge the two files into one, taking changed characters from the new
+file or the old one.
+
+Both files are read once as rows of raw text, without building
+Character objects. Keys are compared case-insensitively, and only rows
+whose text differs between the files are validated, so comparing two
+mostly identical rosters validates little more than the changes. When
+several characters share a key, the first with that key in the old file
+is paired with the first in the new file, and so on.
+The comparison is a hash join: the rows of the old file are held in a
+dictionary by key and the new file is streamed past it. When the old
+file is larger than the memory budget, both files are first split into
+partition files on disk by a hash of the key, so that every key lands in
+the same partition of both, and the partitions are compared one pair at
+a time (a Grace hash join). Either way the work is linear in the sizes
+of the files.
+
+Changes are reported in new-file order, followed by the removed
+characters, when the files fit in memory; in partition order otherwise.
+"""
+
+import argparse
+import csv
+import json
+import marshal
+import os
+import struct
+import tempfile
+from file_manager import (
+    FIELDNAMES, is_json_lines_file, iter_raw_rows, validate_raw_row
+)
+from load_errors import LoadErrors
+
+# Size of old file up to which the comparison runs wholly in memory
+DIFF_MEMORY_BYTES = 256 * 1024 * 1024
+
+# Rows written to a partition file at a time, and the format of the
+# byte length written before each batch
+PARTITION_BATCH_ROWS = 10000
+_BATCH_LENGTH = struct.Struct('<Q')
+
+# Kinds of change
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+# Fields shown as a number difference when they change
+NUMERIC_FIELDS = ('wealth', 'mana_points')
+
+
+class RosterChange:
+    """
+    One character's difference between the old and new file. Rows are
+    tuples of validated values in FIELDNAMES order; a missing row is
+    None.
+    """
+
+    def __init__(self, kind, key, old, new):
+        """
+        Initialize a RosterChange.
+        :param kind: str, ADDED, REMOVED, CHANGED or UNCHANGED
+        :param key: tuple, the key values followed by the number of
+        earlier characters with the same key in the file
+        :param old: tuple or None, the row in the old file
+        :param new: tuple or None, the row in the new file
+        """
+        self.kind = kind
+        self.key = key
+        self.old = old
+        self.new = new
+
+    def row(self):
+        """
+        Get the character's fields, from the new file unless it was
+        removed.
+        :return: dict, the field values keyed by field name
+        """
+        return dict(zip(FIELDNAMES, self.new or self.old))
+
+    def deltas(self):
+        """
+        Get the fields that differ between the old and new row.
+        :return: dict, field name -> (old value, new value); empty unless
+        the character changed
+        """
+        if self.old is None or self.new is None:
+            return {}
+        return {field: (old, new) for field, old, new
+                in zip(FIELDNAMES, self.old, self.new) if old != new}
+
+
+class DiffSummary:
+    """
+    Number of characters of each kind of change.
+    """
+
+    def __init__(self):
+        """
+        Initialize a DiffSummary with every count at zero.
+        """
+        self.counts = {ADDED: 0, REMOVED: 0, CHANGED: 0, UNCHANGED: 0}
+
+    def add(self, change):
+        """
+        Count a change.
+        :param change: RosterChange, the change to count
+        :return: None
+        """
+        self.counts[change.kind] += 1
+
+
+def _key_getter(key_fields):
+    """
+    Build a function getting the key of a raw row: its key fields in
+    lowercase, as validation only changes their case.
+    Raises ValueError if a key field is not a roster column.
+    :param key_fields: tuple, the fields making up the key
+    :return: callable, taking a row tuple and returning a str for a
+    single key field or a tuple for several
+    """
+    for field in key_fields:
+        if field not in FIELDNAMES:
+            raise ValueError(f"Unknown key column '{field}'.")
+    indices = tuple(FIELDNAMES.index(field) for field in key_fields)
+    if len(indices) == 1:
+        index = indices[0]
+        return lambda values: values[index].lower()
+    return lambda values: tuple(values[index].lower() for index in indices)
+
+
+def _read_rows(filename, errors):
+    """
+    Read every row of a roster file as a tuple of raw text.
+    Raises OSError if the file cannot be opened.
+    :param filename: str, path of the CSV or JSON Lines file
+    :param errors: LoadErrors, collector for the malformed lines
+    :return: generator, yields tuples of strings in FIELDNAMES order
+    """
+    for values in iter_raw_rows(filename, errors):
+        yield tuple(values)
+
+
+def _validate(values, errors):
+    """
+    Validate a raw row, recording it in errors if it fails.
+    :param values: tuple, the row's raw text in FIELDNAMES order
+    :param errors: LoadErrors, collector for the invalid rows
+    :return: tuple or None, the validated values (empty role-specific
+    fields as None), None if the row is invalid
+    """
+    try:
+        return validate_raw_row(values)
+    except ValueError as e:
+        errors.record(None, e, dict(zip(FIELDNAMES, values)))
+        return None
+
+
+def write_batch(rows, file):
+    """
+    Append a batch of rows to a temporary file, such as a partition, as
+    its length in bytes followed by the rows in marshal format. Loading
+    the batch back from bytes is many times faster than marshal.load
+    reading a file object.
+    :param rows: list, row tuples
+    :param file: file object, the file open for binary writing
+    :return: None
+    """
+    data = marshal.dumps(rows)
+    file.write(_BATCH_LENGTH.pack(len(data)))
+    file.write(data)
+
+
+def _partition(rows, key_of, count, directory, prefix):
+    """
+    Split rows into partition files by a hash of their key, keeping the
+    file order within each partition.
+    :param rows: iterable, row tuples
+    :param key_of: callable, getting the key of a row
+    :param count: int, the number of partitions
+    :param directory: str, where to write the partition files
+    :param prefix: str, start of the partition file names
+    :return: list, the partition file paths
+    """
+    paths = [os.path.join(directory, f"{prefix}{number}.part")
+             for number in range(count)]
+    files = [open(path, 'wb') for path in paths]
+    buffers = [[] for _ in range(count)]
+    try:
+        for values in rows:
+            number = hash(key_of(values)) % count
+            buffer = buffers[number]
+            buffer.append(values)
+            if len(buffer) >= PARTITION_BATCH_ROWS:
+                write_batch(buffer, files[number])
+                buffer.clear()
+        for buffer, file in zip(buffers, files):
+            if buffer:
+                write_batch(buffer, file)
+    finally:
+        for file in files:
+            file.close()
+    return paths
+
+
+def read_batches(path):
+    """
+    Read back the rows of a file written with write_batch, a batch in
+    memory at a time.
+    :param path: str, the file
+    :return: generator, yields row tuples in the order written
+    """
+    with open(path, 'rb') as file:
+        while True:
+            header = file.read(_BATCH_LENGTH.size)
+            if not header:
+                return
+            (length,) = _BATCH_LENGTH.unpack(header)
+            yield from marshal.loads(file.read(length))
+
+
+def _change(kind, key, occurrence, old, new, summary):
+    """
+    Make a RosterChange and count it.
+    :param kind: str, the kind of change
+    :param key: str or tuple, the key as returned by the key getter
+    :param occurrence: int, the number of earlier rows with the key
+    :param old: tuple or None, the row in the old file
+    :param new: tuple or None, the row in the new file
+    :param summary: DiffSummary or None, the counts to add it to
+    :return: RosterChange, the change
+    """
+    key = (key, occurrence) if type(key) is str else key + (occurrence,)
+    change = RosterChange(kind, key, old, new)
+    if summary is not None:
+        summary.add(change)
+    return change
+
+
+def _compare(old_rows, new_rows, key_of, errors, summary, unchanged):
+    """
+    Compare two streams of raw rows holding the same keys. Rows whose
+    text differs are validated, and an invalid row counts as missing
+    from its file.
+    The first old row with each key is held in one dictionary and any
+    later ones in another, so unique keys cost a lookup per row. Once a
+    key is reached in the new rows, its entry in the first dictionary
+    holds the number of new rows seen with it instead.
+    :param old_rows: iterable, rows of the old file
+    :param new_rows: iterable, rows of the new file
+    :param key_of: callable, getting the key of a row
+    :param errors: LoadErrors, collector for the invalid rows
+    :param summary: DiffSummary or None, counts every character
+    :param unchanged: bool, whether to validate and yield the rows that
+    are the same in both files, rather than only counting them
+    :return: generator, yields a RosterChange per character
+    """
+    first = {}
+    repeated = {}
+    for values in old_rows:
+        key = key_of(values)
+        if first.setdefault(key, values) is not values:
+            repeated.setdefault(key, []).append(values)
+
+    same = 0
+    for values in new_rows:
+        key = key_of(values)
+        entry = first.get(key)
+        if entry is None or type(entry) is tuple:
+            occurrence = 0
+            previous = entry
+        else:
+            occurrence = entry
+            later = repeated.get(key, ())
+            previous = later[entry - 1] if entry <= len(later) else None
+        first[key] = occurrence + 1
+        if previous == values:
+            if not unchanged:
+                same += 1
+                continue
+            values = _validate(values, errors)
+            if values is not None:
+                yield _change(UNCHANGED, key, occurrence, values, values,
+                              summary)
+            continue
+
+        new = _validate(values, errors)
+        if previous is not None:
+            previous = _validate(previous, errors)
+        if previous is None:
+            if new is not None:
+                yield _change(ADDED, key, occurrence, None, new, summary)
+        elif new is None:
+            yield _change(REMOVED, key, occurrence, previous, None, summary)
+        elif previous != new:
+            yield _change(CHANGED, key, occurrence, previous, new, summary)
+        elif unchanged:
+            yield _change(UNCHANGED, key, occurrence, previous, new,
+                          summary)
+        else:
+            # The text differs only in ways validation evens out
+            same += 1
+    if summary is not None:
+        summary.counts[UNCHANGED] += same
+
+    for key, entry in first.items():
+        start = entry
+        if type(entry) is tuple:
+            start = 1
+            values = _validate(entry, errors)
+            if values is not None:
+                yield _change(REMOVED, key, 0, values, None, summary)
+        for occurrence, values in enumerate(
+                repeated.get(key, ())[start - 1:], start):
+            values = _validate(values, errors)
+            if values is not None:
+                yield _change(REMOVED, key, occurrence, values, None,
+                              summary)
+
+
+def compare_files(old_filename, new_filename, key_fields=('name',),
+                  memory_bytes=DIFF_MEMORY_BYTES, errors=None,
+                  summary=None, unchanged=True):
+    """
+    Compare every character of two roster files. Invalid rows are
+    recorded in errors and treated as missing.
+    Raises OSError if a file cannot be read and ValueError if a key
+    field is unknown.
+    :param old_filename: str, path of the old CSV or JSON Lines file
+    :param new_filename: str, path of the new CSV or JSON Lines file
+    :param key_fields: tuple, the fields identifying a character
+    :param memory_bytes: int, old file size above which the files are
+    partitioned on disk
+    :param errors: LoadErrors or None, collector for the invalid rows;
+    by default a few are printed and a summary follows the comparison
+    :param summary: DiffSummary or None, counts every character compared
+    :param unchanged: bool, whether to yield the characters that are the
+    same in both files too; if False they are only counted
+    :return: generator, yields a RosterChange per character
+    """
+    key_of = _key_getter(tuple(key_fields))
+    report = errors is None
+    if report:
+        errors = LoadErrors(fieldnames=FIELDNAMES)
+    size = os.path.getsize(old_filename)
+    if size <= memory_bytes:
+        yield from _compare(_read_rows(old_filename, errors),
+                            _read_rows(new_filename, errors), key_of,
+                            errors, summary, unchanged)
+    else:
+        count = -(-size // memory_bytes) * 2
+        with tempfile.TemporaryDirectory() as directory:
+            old_paths = _partition(_read_rows(old_filename, errors),
+                                   key_of, count, directory, 'old')
+            new_paths = _partition(_read_rows(new_filename, errors),
+                                   key_of, count, directory, 'new')
+            for old_path, new_path in zip(old_paths, new_paths):
+                yield from _compare(read_batches(old_path),
+                                    read_batches(new_path), key_of,
+                                    errors, summary, unchanged)
+                os.remove(old_path)
+                os.remove(new_path)
+    if report:
+        errors.report()
+
+
+def diff_files(old_filename, new_filename, key_fields=('name',),
+               memory_bytes=DIFF_MEMORY_BYTES, summary=None, errors=None):
+    """
+    Stream the characters added, removed or changed between two roster
+    files.
+    Raises OSError if a file cannot be read and ValueError if a key
+    field is unknown.
+    :param old_filename: str, path of the old CSV or JSON Lines file
+    :param new_filename: str, path of the new CSV or JSON Lines file
+    :param key_fields: tuple, the fields identifying a character
+    :param memory_bytes: int, old file size above which the files are
+    partitioned on disk
+    :param summary: DiffSummary or None, counts every character compared,
+    including the unchanged ones
+    :param errors: LoadErrors or None, collector for the invalid rows
+    :return: generator, yields a RosterChange per difference
+    """
+    return compare_files(old_filename, new_filename, key_fields,
+                         memory_bytes, errors, summary, False)
+
+
+def merge_files(old_filename, new_filename, output_filename,
+                key_fields=('name',), prefer='new',
+                memory_bytes=DIFF_MEMORY_BYTES, errors=None):
+    """
+    Write every character of two roster files to one file: characters
+    in either file are kept, and a character in both is written once,
+    as it is in the preferred file.
+    Raises OSError if a file cannot be read or written and ValueError if
+    a key field or prefer is not recognised.
+    :param old_filename: str, path of the old CSV or JSON Lines file
+    :param new_filename: str, path of the new CSV or JSON Lines file
+    :param output_filename: str, path of the CSV or JSON Lines file to
+    create
+    :param key_fields: tuple, the fields identifying a character
+    :param prefer: str, 'new' or 'old', the file whose version of a
+    changed character is kept
+    :param memory_bytes: int, old file size above which the files are
+    partitioned on disk
+    :param errors: LoadErrors or None, collector for the invalid rows,
+    which are left out of the merged file
+    :return: DiffSummary, the number of characters of each kind
+    """
+    if prefer not in ('new', 'old'):
+        raise ValueError("prefer must be 'new' or 'old'.")
+    summary = DiffSummary()
+
+    def merged_rows():
+        for change in compare_files(old_filename, new_filename,
+                                    key_fields, memory_bytes, errors,
+                                    summary):
+            if change.old is None or \
+                    change.new is not None and prefer == 'new':
+                yield change.new
+            else:
+                yield change.old
+
+    write_rows(merged_rows(), output_filename)
+    return summary
+
+
+def write_rows(rows, filename):
+    """
+    Write row tuples to a CSV or JSON Lines file depending on its
+    extension, in the same layout as file_manager.write_characters.
+    Raises OSError if the file cannot be written.
+    :param rows: iterable, tuples of values in FIELDNAMES order
+    :param filename: str, path of the file to create
+    :return: int, number of rows written
+    """
+    count = 0
+    if is_json_lines_file(filename):
+        encoder = json.JSONEncoder(separators=(',', ':'))
+        skill = FIELDNAMES.index('skill_level')
+        with open(filename, 'w') as file:
+            for values in rows:
+                data = {field: value for field, value
+                        in zip(FIELDNAMES, values) if value is not None}
+                data['skill_level'] = int(values[skill])
+                file.write(encoder.encode(data))
+                file.write('\n')
+                count += 1
+        return count
+
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+        for values in rows:
+            writer.writerow(['' if value is None else value
+                             for value in values])
+            count += 1
+    return count
+
+
+def describe_change(change):
+    """
+    Describe a change on one line: + for added, - for removed and ~ for
+    changed characters, with the changed fields.
+    :param change: RosterChange, the change to describe
+    :return: str, the description
+    """
+    name = change.row()['name']
+    if change.key[-1]:
+        name += f" #{change.key[-1] + 1}"
+    if change.kind == ADDED:
+        row = change.row()
+        return (f"+ {name} ({row['race']} {row['role']}, "
+                f"{row['wealth']:,} Gold coins)")
+    if change.kind == REMOVED:
+        return f"- {name}"
+    parts = []
+    for field, (old, new) in change.deltas().items():
+        text = f"{field} {'' if old is None else old} -> " \
+               f"{'' if new is None else new}"
+        if field in NUMERIC_FIELDS and old is not None and new is not None:
+            text += f" ({new - old:+,})"
+        parts.append(text)
+    return f"~ {name}: {', '.join(parts)}"
+
+
+def display_summary(summary):
+    """
+    Display the number of characters of each kind of change.
+    :param summary: DiffSummary, the counts to display
+    :return: None
+    """
+    counts = summary.counts
+    print(f"{counts[ADDED]:,} added, {counts[REMOVED]:,} removed, "
+          f"{counts[CHANGED]:,} changed, {counts[UNCHANGED]:,} unchanged.")
+
+
+def main():
+    """
+    Parse command line arguments and show the differences between two
+    roster files, or merge them.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Differences between two roster files.")
+    parser.add_argument('old', help="the older CSV or JSON Lines file")
+    parser.add_argument('new', help="the newer CSV or JSON Lines file")
+    parser.add_argument(
+        '--key', nargs='+', default=['name'], choices=FIELDNAMES,
+        help="fields identifying a character (default: name)")
+    parser.add_argument(
+        '--merge', metavar='OUTPUT',
+        help="write the merged roster to OUTPUT instead")
+    parser.add_argument(
+        '--prefer', choices=['new', 'old'], default='new',
+        help="file whose version of a changed character is merged")
+    parser.add_argument(
+        '--summary', action='store_true',
+        help="only count the changes")
+    parser.add_argument(
+        '--memory-mb', type=int, default=DIFF_MEMORY_BYTES // 2 ** 20,
+        help="old file size above which the files are partitioned")
+    args = parser.parse_args()
+    memory_bytes = args.memory_mb * 2 ** 20
+
+    try:
+        if args.merge:
+            summary = merge_files(args.old, args.new, args.merge,
+                                  args.key, args.prefer, memory_bytes)
+            display_summary(summary)
+            print(f"Merged roster written to {args.merge}")
+            return
+        summary = DiffSummary()
+        for change in diff_files(args.old, args.new, args.key,
+                                 memory_bytes, summary):
+            if not args.summary:
+                print(describe_change(change))
+        display_summary(summary)
+    except (OSError, ValueError) as e:
+        print(f"Error comparing files: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+# roster_scan.py
+
+"""
+Aggregate scans straight over roster files.
+
+This module computes counts, totals, averages, minimums and maximums of
+wealth and mana points, optionally grouped by race and/or role, without
+building dictionaries or Character objects. A CSV file is memory-mapped
+and read in large chunks; each chunk is split into fields with a couple
+of bytes operations, the wanted columns are taken out with slices, and
+the numbers are converted and summed with map/sum, so the per-row work
+happens in C rather than in a Python loop. Chunks with irregular rows
+fall back to splitting line by line, padding short rows with empty
+fields as csv.DictReader does and skipping rows with too many.
+
+The scan checks only the columns it aggregates: wealth and mana points
+must be whole numbers, but names, races and roles are not validated.
+JSON Lines files are scanned through file_manager.iter_rows instead,
+which is slower but still builds no Character objects.
+"""
+
+import argparse
+import csv
+import itertools
+import mmap
+import os
+from file_manager import is_json_lines_file, iter_rows
+
+# Bytes read per chunk; each chunk ends at a line boundary
+SCAN_CHUNK_BYTES = 16 * 1024 * 1024
+
+# Columns that can be grouped by and aggregated
+GROUP_COLUMNS = ('race', 'role')
+AGGREGATE_COLUMNS = ('wealth', 'mana_points')
+
+
+class ColumnStats:
+    """
+    Count, total, minimum and maximum of one numeric column.
+    """
+
+    def __init__(self):
+        """
+        Initialize empty ColumnStats.
+        """
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+
+    def add_values(self, values):
+        """
+        Add a batch of values.
+        :param values: list, the int values
+        :return: None
+        """
+        if not values:
+            return
+        self.count += len(values)
+        self.total += sum(values)
+        low = min(values)
+        high = max(values)
+        if self.minimum is None or low < self.minimum:
+            self.minimum = low
+        if self.maximum is None or high > self.maximum:
+            self.maximum = high
+
+    def merge(self, other):
+        """
+        Add the values summarized by other ColumnStats to these.
+        :param other: ColumnStats, the statistics to merge in
+        :return: None
+        """
+        if not other.count:
+            return
+        self.count += other.count
+        self.total += other.total
+        if self.minimum is None or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.maximum is None or other.maximum > self.maximum:
+            self.maximum = other.maximum
+
+    def average(self):
+        """
+        Get the mean of the values.
+        :return: float or None, the average, None if there are no values
+        """
+        return self.total / self.count if self.count else None
+
+
+class ScanResult:
+    """
+    Aggregates produced by a scan: ColumnStats for wealth and mana points
+    per group, and the number of rows skipped as malformed. Without
+    grouping there is a single group keyed by the empty tuple.
+    """
+
+    def __init__(self, group_by=()):
+        """
+        Initialize an empty ScanResult.
+        :param group_by: tuple, the columns the rows are grouped by
+        """
+        self.group_by = tuple(group_by)
+        self.groups = {}
+        self.skipped = 0
+
+    def group(self, key):
+        """
+        Get the statistics of a group, creating them if needed.
+        :param key: tuple, the group's values of the group_by columns
+        :return: dict, column name -> ColumnStats
+        """
+        stats = self.groups.get(key)
+        if stats is None:
+            stats = {column: ColumnStats() for column in AGGREGATE_COLUMNS}
+            self.groups[key] = stats
+        return stats
+
+    def totals(self):
+        """
+        Combine the statistics of every group.
+        :return: dict, column name -> ColumnStats over all rows
+        """
+        combined = {column: ColumnStats() for column in AGGREGATE_COLUMNS}
+        for stats in self.groups.values():
+            for column, column_stats in stats.items():
+                combined[column].merge(column_stats)
+        return combined
+
+
+def _split_rows(chunk, column_count, indices):
+    """
+    Split a chunk of CSV lines into the wanted columns, using bulk bytes
+    operations when every row has the expected number of fields. Short
+    rows are padded with empty fields, as csv.DictReader reads them;
+    blank lines are ignored and rows with too many fields skipped.
+    :param chunk: bytes, whole lines of the file
+    :param column_count: int, the number of columns in the file
+    :param indices: list, positions of the wanted columns
+    :return: tuple, (list of columns as lists of bytes, rows skipped)
+    """
+    lines = chunk.replace(b'\r', b'').splitlines()
+    if set(map(bytes.count, lines, itertools.repeat(b','))) == \
+            {column_count - 1}:
+        fields = b','.join(lines).split(b',')
+        return [fields[index::column_count] for index in indices], 0
+
+    # Irregular chunk: pad short lines and drop long ones, line by line
+    columns = [[] for _ in indices]
+    skipped = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        values = line.split(b',')
+        if len(values) > column_count:
+            skipped += 1
+            continue
+        values += [b''] * (column_count - len(values))
+        for column, index in zip(columns, indices):
+            column.append(values[index])
+    return columns, skipped
+
+
+def _drop_bad_numbers(columns, wealth_column, mana_column):
+    """
+    Remove the rows whose wealth is not a whole number or whose mana
+    points are neither empty nor a whole number.
+    :param columns: list, the columns as lists of bytes
+    :param wealth_column: int, position of wealth within columns
+    :param mana_column: int, position of mana points within columns
+    :return: tuple, (filtered columns, rows removed)
+    """
+    wealth = columns[wealth_column]
+    mana = columns[mana_column]
+    if all(map(bytes.isdigit, wealth)) and \
+            all(map(bytes.isdigit, filter(None, mana))):
+        return columns, 0
+    good = [wealth_value.isdigit() and (not mana_value or
+                                        mana_value.isdigit())
+            for wealth_value, mana_value in zip(wealth, mana)]
+    filtered = [list(itertools.compress(column, good)) for column in columns]
+    return filtered, good.count(False)
+
+
+def _aggregate(result, key_columns, wealth, mana, key=()):
+    """
+    Add a chunk's values to the result, group by group. Rows are split
+    on the first group column, then each part on the next, so every
+    comparison is between single bytes values.
+    :param result: ScanResult, the result to add to
+    :param key_columns: list, the group columns still to split on, as
+    lists of bytes
+    :param wealth: list, wealth values as bytes
+    :param mana: list, mana point values as bytes, empty for warriors
+    :param key: tuple, the group values chosen so far
+    :return: None
+    """
+    if not key_columns:
+        stats = result.group(key)
+        stats['wealth'].add_values(list(map(int, wealth)))
+        stats['mana_points'].add_values(list(map(int, filter(None, mana))))
+        return
+
+    first, rest = key_columns[0], key_columns[1:]
+    for value in set(first):
+        chosen = list(map(value.__eq__, first))
+        _aggregate(
+            result,
+            [list(itertools.compress(column, chosen)) for column in rest],
+            list(itertools.compress(wealth, chosen)),
+            list(itertools.compress(mana, chosen)),
+            key + (value,))
+
+
+def _normalize_groups(result):
+    """
+    Decode the byte group keys and merge groups differing only in case.
+    :param result: ScanResult, the result with bytes keys
+    :return: ScanResult, a result with capitalized str keys
+    """
+    normalized = ScanResult(result.group_by)
+    normalized.skipped = result.skipped
+    for key, stats in result.groups.items():
+        new_key = tuple(value.decode(errors='replace').capitalize()
+                        for value in key)
+        target = normalized.group(new_key)
+        for column, column_stats in stats.items():
+            target[column].merge(column_stats)
+    return normalized
+
+
+def _scan_csv(filename, group_by, chunk_size):
+    """
+    Scan a CSV roster file chunk by chunk through a memory map.
+    Raises OSError if the file cannot be read and ValueError if it lacks
+    a needed column.
+    :param filename: str, path of the CSV file
+    :param group_by: tuple, the columns to group by
+    :param chunk_size: int, approximate bytes per chunk
+    :return: ScanResult, the aggregates with bytes group keys
+    """
+    result = ScanResult(group_by)
+    if not os.path.getsize(filename):
+        return result
+    with open(filename, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        header_end = data.find(b'\n') + 1 or len(data)
+        header = next(csv.reader([data[:header_end].decode()]), [])
+        wanted = list(group_by) + list(AGGREGATE_COLUMNS)
+        missing = [column for column in wanted if column not in header]
+        if missing:
+            raise ValueError(f"Missing column(s): {', '.join(missing)}")
+        indices = [header.index(column) for column in wanted]
+
+        position = header_end
+        while position < len(data):
+            end = data.find(b'\n', position + chunk_size) + 1 or len(data)
+            columns, skipped = _split_rows(
+                data[position:end], len(header), indices)
+            columns, bad = _drop_bad_numbers(
+                columns, len(group_by), len(group_by) + 1)
+            result.skipped += skipped + bad
+            _aggregate(result, columns[:len(group_by)],
+                       columns[-2], columns[-1])
+            position = end
+    return result
+
+
+def _scan_rows(filename, group_by):
+    """
+    Scan a JSON Lines roster file through iter_rows.
+    Raises OSError if the file cannot be read.
+    :param filename: str, path of the JSON Lines file
+    :param group_by: tuple, the columns to group by
+    :return: ScanResult, the aggregates with bytes group keys
+    """
+    result = ScanResult(group_by)
+    columns = list(group_by) + ['wealth', 'mana_points']
+    for row in iter_rows(filename, columns):
+        key = tuple(row[column].encode() for column in group_by)
+        stats = result.group(key)
+        stats['wealth'].add_values([row['wealth']])
+        if row['mana_points'] is not None:
+            stats['mana_points'].add_values([row['mana_points']])
+    return result
+
+
+def scan_file(filename, group_by=(), chunk_size=SCAN_CHUNK_BYTES):
+    """
+    Compute wealth and mana point aggregates of a roster file without
+    loading it, optionally grouped by race and/or role.
+    Raises OSError if the file cannot be read and ValueError if a group
+    column is not race or role or the file lacks a needed column.
+    :param filename: str, path of the CSV or JSON Lines file
+    :param group_by: iterable, columns to group by: 'race', 'role' or both
+    :param chunk_size: int, approximate bytes read per chunk
+    :return: ScanResult, the aggregates
+    """
+    group_by = tuple(column.lower() for column in group_by)
+    for column in group_by:
+        if column not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by '{column}'; "
+                             f"choose from {', '.join(GROUP_COLUMNS)}.")
+    if is_json_lines_file(filename):
+        result = _scan_rows(filename, group_by)
+    else:
+        result = _scan_csv(filename, group_by, chunk_size)
+    return _normalize_groups(result)
+
+
+def display_scan(result):
+    """
+    Display the aggregates of a scan.
+    :param result: ScanResult, the aggregates to display
+    :return: None
+    """
+    totals = result.totals()
+    if not totals['wealth'].count:
+        print("\nNo characters found.")
+        if result.skipped:
+            print(f"{result.skipped:,} malformed row(s) skipped.")
+        print()
+        return
+
+    rows = [('All characters', totals)]
+    if result.group_by:
+        rows += [(' '.join(key), result.groups[key])
+                 for key in sorted(result.groups)]
+
+    print(f"\n{'='*15} FILE SCAN {'='*15}")
+    for label, stats in rows:
+        wealth = stats['wealth']
+        mana = stats['mana_points']
+        print(f"{label}:")
+        print(f"    Characters     : {wealth.count:,}")
+        print(f"    Total Wealth   : {wealth.total:,} Gold coins")
+        print(f"    Average Wealth : {wealth.average():,.2f} Gold coins")
+        print(f"    Wealth Range   : {wealth.minimum:,} - "
+              f"{wealth.maximum:,} Gold coins")
+        if mana.count:
+            print(f"    Mages          : {mana.count:,}, "
+                  f"average {mana.average():.2f} MP, "
+                  f"range {mana.minimum} - {mana.maximum} MP")
+    if result.skipped:
+        print(f"{result.skipped:,} malformed row(s) skipped.")
+    print("="*50)
+    print()
+
+
+def main():
+    """
+    Parse command line arguments and display the scan of a file.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Wealth and mana aggregates of a roster file.")
+    parser.add_argument('filename', help="CSV or JSON Lines roster file")
+    parser.add_argument(
+        '--group-by', nargs='+', default=[], choices=GROUP_COLUMNS,
+        help="group the aggregates by race and/or role")
+    args = parser.parse_args()
+    try:
+        display_scan(scan_file(args.filename, args.group_by))
+    except (OSError, ValueError) as e:
+        print(f"Error scanning file: {e}")
+
+
+if __name__ == "__main__":
+    main()
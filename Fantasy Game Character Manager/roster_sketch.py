@@ -0,0 +1,541 @@
+# roster_sketch.py
+
+"""
+Streaming statistics for rosters too large to hold in memory.
+
+This module defines small mergeable summaries ("sketches") of a stream
+of characters, and functions to build them in one pass over a roster
+file, in parallel over chunks of the file:
+
+- QuantileSketch estimates quantiles of wealth with the KLL algorithm
+  (Karnin, Lang and Liberty, "Optimal Quantile Approximation in
+  Streams", FOCS 2016). It keeps about 3 * k values however long the
+  stream; with the default k = 200 a quantile query is within about
+  1.7% of the true rank with 99% confidence (the figure published for
+  KLL by Apache DataSketches), and merging sketches keeps that bound.
+- ValueCounts counts each value exactly. Skill levels (1-5) and mana
+  points (0-100) have so few possible values that exact counts take
+  less memory than a sketch and have no error at all.
+- DistinctCounter estimates the number of distinct names with
+  HyperLogLog (Flajolet et al., 2007). With the default 16384 one-byte
+  registers the standard error is 1.04 / sqrt(16384), about 0.8%.
+
+RosterSketch combines them, and sketch_file builds one per chunk of a
+CSV or JSON Lines file in worker processes and merges the results.
+Totals, minimums and maximums are exact.
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from mage import Mage
+from file_manager import split_file, iter_characters_from_range
+
+# Default KLL accuracy parameter: larger is more accurate and bigger
+QUANTILE_SKETCH_K = 200
+
+# Default HyperLogLog precision: 2 ** precision one-byte registers
+DISTINCT_PRECISION = 14
+
+# Files smaller than this are sketched in the calling process
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+# Quantiles shown in sketch reports
+REPORT_QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch over numbers.
+    Values are kept in a stack of compactors; a value at level h stands
+    for 2 ** h original values. When a level fills up it is sorted and
+    every other value, starting at a random offset, is promoted to the
+    level above, halving its size while keeping ranks unbiased. Lower
+    levels get geometrically smaller capacities, so the total size stays
+    near 3 * k.
+    """
+
+    def __init__(self, k=QUANTILE_SKETCH_K, seed=None):
+        """
+        Initialize an empty QuantileSketch.
+        :param k: int, capacity of the top level; the rank error is
+        roughly proportional to 1 / k
+        :param seed: int or None, seed for the compaction coin flips
+        """
+        self._k = k
+        self._random = random.Random(seed)
+        self._levels = [[]]
+        self._count = 0
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level):
+        """
+        Get the capacity of a level: k at the top, shrinking by a factor
+        of 2/3 per level below it, but never below 2.
+        :param level: int, the level number, 0 at the bottom
+        :return: int, the number of values the level may hold
+        """
+        depth = len(self._levels) - level - 1
+        return max(2, math.ceil(self._k * (2 / 3) ** depth))
+
+    def _grow(self):
+        """
+        Add a level on top of the stack.
+        :return: None
+        """
+        self._levels.append([])
+        self._max_size = sum(
+            self._capacity(level) for level in range(len(self._levels)))
+
+    def add(self, value):
+        """
+        Add a value to the sketch.
+        :param value: int or float, the value
+        :return: None
+        """
+        self._levels[0].append(value)
+        self._count += 1
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        """
+        Compact full levels from the bottom up until the sketch fits.
+        :return: None
+        """
+        for level in range(len(self._levels)):
+            values = self._levels[level]
+            if len(values) < self._capacity(level):
+                continue
+            if level + 1 == len(self._levels):
+                self._grow()
+            values.sort()
+            # Keep one value back if the count is odd
+            kept = [values.pop()] if len(values) % 2 else []
+            offset = self._random.randint(0, 1)
+            self._levels[level + 1].extend(values[offset::2])
+            self._levels[level] = kept
+            self._size = sum(len(values) for values in self._levels)
+            if self._size < self._max_size:
+                break
+
+    def merge(self, other):
+        """
+        Add the values summarized by another sketch to this one.
+        :param other: QuantileSketch, the sketch to merge in
+        :return: None
+        """
+        while len(self._levels) < len(other._levels):
+            self._grow()
+        for level, values in enumerate(other._levels):
+            self._levels[level].extend(values)
+        self._count += other._count
+        self._size = sum(len(values) for values in self._levels)
+        while self._size >= self._max_size:
+            before = self._size
+            self._compress()
+            if self._size == before:
+                break
+
+    def _weighted_values(self):
+        """
+        List the retained values with their weights in value order.
+        :return: list, of (value, weight) tuples
+        """
+        weighted = [(value, 1 << level)
+                    for level, values in enumerate(self._levels)
+                    for value in values]
+        weighted.sort()
+        return weighted
+
+    def quantile(self, fraction):
+        """
+        Estimate the value below which the given fraction of the values
+        fall. Raises ValueError if the sketch is empty or the fraction
+        is outside 0-1.
+        :param fraction: float, the quantile from 0 to 1
+        :return: int or float, the estimated value
+        """
+        return self.quantiles([fraction])[0]
+
+    def quantiles(self, fractions):
+        """
+        Estimate several quantiles at once.
+        Raises ValueError if the sketch is empty or a fraction is
+        outside 0-1.
+        :param fractions: iterable, quantiles from 0 to 1
+        :return: list, the estimated values in the same order
+        """
+        if not self._count:
+            raise ValueError("The sketch is empty.")
+        weighted = self._weighted_values()
+        total = sum(weight for _, weight in weighted)
+        estimates = []
+        for fraction in fractions:
+            if not 0 <= fraction <= 1:
+                raise ValueError("Quantile must be between 0 and 1.")
+            target = fraction * total
+            seen = 0
+            for value, weight in weighted:
+                seen += weight
+                if seen >= target:
+                    break
+            estimates.append(value)
+        return estimates
+
+    def rank(self, value):
+        """
+        Estimate the fraction of values smaller than the given value.
+        :param value: int or float, the value to compare against
+        :return: float, from 0 to 1
+        """
+        weighted = self._weighted_values()
+        total = sum(weight for _, weight in weighted)
+        if not total:
+            return 0.0
+        return sum(weight for item, weight in weighted
+                   if item < value) / total
+
+    def retained(self):
+        """
+        Number of values currently stored, a measure of memory use.
+        :return: int, the number of retained values
+        """
+        return self._size
+
+    def __len__(self):
+        """
+        Number of values added to the sketch.
+        :return: int, the number of values summarized
+        """
+        return self._count
+
+
+class ValueCounts:
+    """
+    Exact counts of a small set of values, with the same query methods
+    as QuantileSketch.
+    """
+
+    def __init__(self):
+        """
+        Initialize empty ValueCounts.
+        """
+        self._counts = {}
+
+    def add(self, value):
+        """
+        Count one occurrence of a value.
+        :param value: int, the value
+        :return: None
+        """
+        self._counts[value] = self._counts.get(value, 0) + 1
+
+    def merge(self, other):
+        """
+        Add the counts of another ValueCounts to these.
+        :param other: ValueCounts, the counts to merge in
+        :return: None
+        """
+        for value, count in other._counts.items():
+            self._counts[value] = self._counts.get(value, 0) + count
+
+    def quantiles(self, fractions):
+        """
+        Get several quantiles exactly.
+        Raises ValueError if no values were counted or a fraction is
+        outside 0-1.
+        :param fractions: iterable, quantiles from 0 to 1
+        :return: list, the values at the quantiles in the same order
+        """
+        if not self._counts:
+            raise ValueError("No values have been counted.")
+        total = len(self)
+        estimates = []
+        for fraction in fractions:
+            if not 0 <= fraction <= 1:
+                raise ValueError("Quantile must be between 0 and 1.")
+            seen = 0
+            for value in sorted(self._counts):
+                seen += self._counts[value]
+                if seen >= fraction * total:
+                    break
+            estimates.append(value)
+        return estimates
+
+    def quantile(self, fraction):
+        """
+        Get a quantile exactly.
+        Raises ValueError if no values were counted or the fraction is
+        outside 0-1.
+        :param fraction: float, the quantile from 0 to 1
+        :return: int, the value at the quantile
+        """
+        return self.quantiles([fraction])[0]
+
+    def counts(self):
+        """
+        Get the count of each value.
+        :return: dict, value -> number of occurrences, in value order
+        """
+        return dict(sorted(self._counts.items()))
+
+    def __len__(self):
+        """
+        Number of values counted.
+        :return: int, the total count
+        """
+        return sum(self._counts.values())
+
+
+class DistinctCounter:
+    """
+    HyperLogLog estimate of the number of distinct names.
+    Names are hashed with BLAKE2b rather than hash(), which is salted
+    per process, so counters built in different processes can be merged.
+    Names are counted case-insensitively, like the name index.
+    """
+
+    def __init__(self, precision=DISTINCT_PRECISION):
+        """
+        Initialize an empty DistinctCounter.
+        :param precision: int, log2 of the number of registers; the
+        standard error is 1.04 / sqrt(2 ** precision)
+        """
+        self._precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add(self, name):
+        """
+        Count a name.
+        :param name: str, the name
+        :return: None
+        """
+        digest = hashlib.blake2b(
+            name.lower().encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        register = hashed >> (64 - self._precision)
+        rest_bits = 64 - self._precision
+        rest = hashed & ((1 << rest_bits) - 1)
+        # Position of the first 1 bit among the remaining bits
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self._registers[register]:
+            self._registers[register] = rank
+
+    def merge(self, other):
+        """
+        Add the names counted by another counter to this one.
+        Raises ValueError if the counters have different precisions.
+        :param other: DistinctCounter, the counter to merge in
+        :return: None
+        """
+        if other._precision != self._precision:
+            raise ValueError("Cannot merge counters of different precision.")
+        self._registers = bytearray(
+            map(max, self._registers, other._registers))
+
+    def estimate(self):
+        """
+        Estimate the number of distinct names counted.
+        Small counts use linear counting of the empty registers, which
+        is more accurate while many registers are still zero.
+        :return: int, the estimated number of distinct names
+        """
+        registers = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / registers)
+        estimate = alpha * registers * registers / sum(
+            2.0 ** -value for value in self._registers)
+        empty = self._registers.count(0)
+        if estimate <= 2.5 * registers and empty:
+            estimate = registers * math.log(registers / empty)
+        return round(estimate)
+
+
+class RosterSketch:
+    """
+    Bounded-memory summary of a stream of characters: exact count,
+    total, minimum and maximum wealth, a wealth QuantileSketch, exact
+    skill level and mana point counts, and a distinct name estimate.
+    """
+
+    def __init__(self, k=QUANTILE_SKETCH_K, seed=None):
+        """
+        Initialize an empty RosterSketch.
+        :param k: int, accuracy parameter of the wealth QuantileSketch
+        :param seed: int or None, seed for the wealth sketch
+        """
+        self.count = 0
+        self.total_wealth = 0
+        self.min_wealth = None
+        self.max_wealth = None
+        self.wealth = QuantileSketch(k, seed)
+        self.skill_levels = ValueCounts()
+        self.mana_points = ValueCounts()
+        self.names = DistinctCounter()
+
+    def add(self, character):
+        """
+        Add a character to the summary.
+        :param character: Character, the character
+        :return: None
+        """
+        wealth = character.get_wealth()
+        self.count += 1
+        self.total_wealth += wealth
+        if self.min_wealth is None or wealth < self.min_wealth:
+            self.min_wealth = wealth
+        if self.max_wealth is None or wealth > self.max_wealth:
+            self.max_wealth = wealth
+        self.wealth.add(wealth)
+        self.skill_levels.add(int(character.get_skill_level()))
+        if isinstance(character, Mage):
+            self.mana_points.add(character.get_mana_points())
+        self.names.add(character.get_name())
+
+    def add_characters(self, characters):
+        """
+        Add several characters to the summary.
+        :param characters: iterable, Character objects
+        :return: RosterSketch, this sketch
+        """
+        for character in characters:
+            self.add(character)
+        return self
+
+    def merge(self, other):
+        """
+        Add the characters summarized by another sketch to this one.
+        :param other: RosterSketch, the sketch to merge in
+        :return: RosterSketch, this sketch
+        """
+        self.count += other.count
+        self.total_wealth += other.total_wealth
+        for wealth in (other.min_wealth, other.max_wealth):
+            if wealth is None:
+                continue
+            if self.min_wealth is None or wealth < self.min_wealth:
+                self.min_wealth = wealth
+            if self.max_wealth is None or wealth > self.max_wealth:
+                self.max_wealth = wealth
+        self.wealth.merge(other.wealth)
+        self.skill_levels.merge(other.skill_levels)
+        self.mana_points.merge(other.mana_points)
+        self.names.merge(other.names)
+        return self
+
+
+def _sketch_range(filename, start, end, k, seed):
+    """
+    Sketch the characters in one byte range of a roster file.
+    Runs in a worker process.
+    :param filename: str, path of the roster file
+    :param start: int, offset of the first line of the range
+    :param end: int, offset just past the last line of the range
+    :param k: int, accuracy parameter of the wealth sketch
+    :param seed: int or None, seed for the wealth sketch
+    :return: RosterSketch, the summary of the range
+    """
+    return RosterSketch(k, seed).add_characters(
+        iter_characters_from_range(filename, start, end))
+
+
+def sketch_file(filename, workers=None, k=QUANTILE_SKETCH_K, seed=None):
+    """
+    Summarize a CSV or JSON Lines roster file in one pass.
+    Large files are split into one chunk per worker, each chunk is
+    sketched in its own process and the sketches are merged.
+    Raises OSError if the file cannot be read.
+    :param filename: str, path of the roster file
+    :param workers: int or None, number of worker processes; defaults to
+    the number of CPUs
+    :param k: int, accuracy parameter of the wealth sketch
+    :param seed: int or None, seed for the wealth sketches
+    :return: RosterSketch, the summary of the whole file
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or os.path.getsize(filename) < PARALLEL_MIN_BYTES:
+        ranges = split_file(filename, 1)
+        sketch = RosterSketch(k, seed)
+        for start, end in ranges:
+            sketch.merge(_sketch_range(filename, start, end, k, seed))
+        return sketch
+
+    ranges = split_file(filename, workers)
+    seeds = [None if seed is None else seed + i
+             for i in range(len(ranges))]
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        parts = executor.map(
+            _sketch_range, [filename] * len(ranges),
+            [start for start, _ in ranges], [end for _, end in ranges],
+            [k] * len(ranges), seeds)
+        sketch = RosterSketch(k, seed)
+        for part in parts:
+            sketch.merge(part)
+    return sketch
+
+
+def display_sketch(sketch):
+    """
+    Display the statistics summarized by a RosterSketch.
+    :param sketch: RosterSketch, the summary to display
+    :return: None
+    """
+    if not sketch.count:
+        print("\nNo characters found.")
+        print()
+        return
+
+    labels = [f"{fraction:.0%}" for fraction in REPORT_QUANTILES]
+    print(f"\n{'='*15} ROSTER STATISTICS {'='*15}")
+    print(f"Total Characters      : {sketch.count:,}")
+    print(f"Distinct Names        : ~{sketch.names.estimate():,} "
+          f"(within about 0.8%)")
+    print(f"Total Wealth          : {sketch.total_wealth:,} Gold coins")
+    print(f"Average Wealth        : "
+          f"{sketch.total_wealth / sketch.count:,.2f} Gold coins")
+    print(f"Wealth Range          : {sketch.min_wealth:,} - "
+          f"{sketch.max_wealth:,} Gold coins")
+    print("Wealth Quantiles (within about 1.7% of rank):")
+    for label, value in zip(
+            labels, sketch.wealth.quantiles(REPORT_QUANTILES)):
+        print(f"    {label:>4}: {value:,} Gold coins")
+    print("Skill Levels:")
+    for level, count in sketch.skill_levels.counts().items():
+        print(f"    {level}: {count:,} character(s)")
+    if len(sketch.mana_points):
+        quantiles = sketch.mana_points.quantiles(REPORT_QUANTILES)
+        print("Mana Point Quantiles (exact):")
+        for label, value in zip(labels, quantiles):
+            print(f"    {label:>4}: {value} MP")
+    print("="*50)
+    print()
+
+
+def main():
+    """
+    Parse command line arguments and display statistics for a file.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Streaming statistics for a large roster file.")
+    parser.add_argument('filename', help="CSV or JSON Lines roster file")
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help="number of worker processes (default: one per CPU)")
+    parser.add_argument(
+        '--k', type=int, default=QUANTILE_SKETCH_K,
+        help="wealth sketch accuracy parameter")
+    args = parser.parse_args()
+    try:
+        display_sketch(sketch_file(args.filename, args.workers, args.k))
+    except OSError as e:
+        print(f"Error reading file: {e}")
+
+
+if __name__ == "__main__":
+    main()
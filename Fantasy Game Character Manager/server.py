@@ -0,0 +1,295 @@
+# server.py
+
+"""
+HTTP/JSON service for the character management system.
+
+This module exposes a Roster over a local HTTP server built on the
+standard library, so other services can create and query characters.
+Connections are kept alive between requests, large exports and search
+results are streamed with chunked transfer encoding, and request
+bodies larger than MAX_BODY_BYTES are refused.
+
+Endpoints:
+    POST /characters          create one character, or a list of them
+    POST /characters/bulk     create a list of characters in one write
+    GET  /characters/search   search by name, e.g. ?name=gan
+    GET  /characters/wealth   wealth statistics of the roster
+    GET  /characters/export   stream every character as a JSON array
+"""
+
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from file_manager import (
+    character_to_json, json_to_character, iter_characters
+)
+from roster import Roster
+
+
+# Number of characters encoded per chunk of a streamed response
+EXPORT_CHUNK_SIZE = 1000
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class BodyTooLargeError(ValueError):
+    """
+    Error raised when a request body is larger than MAX_BODY_BYTES.
+    """
+
+
+class CharacterRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler serving the character endpoints.
+    The roster is read from the server object so every handler thread
+    shares the same Roster.
+    """
+
+    # HTTP/1.1 keeps connections open between requests
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body are written separately, so send small packets
+    # immediately instead of waiting on delayed acknowledgements
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        """
+        Dispatch GET requests to the query endpoints.
+        :return: None
+        """
+        url = urlsplit(self.path)
+        if url.path == '/characters/search':
+            self.search(parse_qs(url.query))
+        elif url.path == '/characters/wealth':
+            self.wealth()
+        elif url.path == '/characters/export':
+            self.export()
+        else:
+            self.send_json(404, {'error': f"Unknown path '{url.path}'."})
+
+    def do_POST(self):
+        """
+        Dispatch POST requests to the create endpoints.
+        :return: None
+        """
+        url = urlsplit(self.path)
+        try:
+            body = self.read_body()
+        except ValueError as e:
+            self.send_json(413 if isinstance(e, BodyTooLargeError) else 400,
+                           {'error': str(e)})
+            return
+        if url.path not in ('/characters', '/characters/bulk'):
+            self.send_json(404, {'error': f"Unknown path '{url.path}'."})
+            return
+
+        try:
+            data = json.loads(body or b'null')
+        except ValueError:
+            self.send_json(400, {'error': "Request body must be JSON."})
+            return
+
+        if url.path == '/characters/bulk' and not isinstance(data, list):
+            self.send_json(
+                400, {'error': "Bulk request body must be a JSON array."})
+            return
+        self.create(data)
+
+    def create(self, data):
+        """
+        Validate and add one character or a batch of characters.
+        A batch is validated in full before any character is added, so
+        either every character in the batch is added or none are.
+        :param data: dict or list, the decoded request body
+        :return: None
+        """
+        batch = data if isinstance(data, list) else [data]
+        created = []
+        errors = []
+        for index, item in enumerate(batch):
+            try:
+                created.append(json_to_character(item))
+            except ValueError as e:
+                errors.append({'index': index, 'error': str(e)})
+
+        if errors:
+            self.send_json(400, {'errors': errors})
+            return
+
+        self.server.roster.extend(created)
+        if isinstance(data, list):
+            self.send_json(201, {'created': len(created)})
+        else:
+            self.send_json(201, character_to_json(created[0]))
+
+    def search(self, query):
+        """
+        Return characters whose name contains the 'name' parameter.
+        Results larger than one chunk are streamed like an export.
+        :param query: dict, the parsed query string
+        :return: None
+        """
+        search_name = query.get('name', [''])[0].strip()
+        if not search_name:
+            self.send_json(
+                400, {'error': "Search name cannot be empty."})
+            return
+        found = self.server.roster.search_by_name(search_name)
+        if len(found) > EXPORT_CHUNK_SIZE:
+            self.send_json_array(found)
+        else:
+            self.send_json(200, [character_to_json(char) for char in found])
+
+    def wealth(self):
+        """
+        Return the wealth statistics of the roster.
+        :return: None
+        """
+        count, total = self.server.roster.wealth_statistics()
+        self.send_json(200, {
+            'count': count,
+            'total': total,
+            'average': total / count if count else 0
+        })
+
+    def export(self):
+        """
+        Stream every character as a JSON array in chunks.
+        :return: None
+        """
+        self.send_json_array(self.server.roster.snapshot())
+
+    def send_json_array(self, characters):
+        """
+        Stream characters as a JSON array with chunked transfer encoding.
+        They are encoded a chunk at a time so memory use stays bounded
+        by the chunk size rather than the number of characters.
+        :param characters: list, the Character objects to send
+        :return: None
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        self.write_chunk(b'[')
+        for start in range(0, len(characters), EXPORT_CHUNK_SIZE):
+            chunk = characters[start:start + EXPORT_CHUNK_SIZE]
+            text = ','.join(
+                json.dumps(character_to_json(char)) for char in chunk)
+            if start:
+                text = ',' + text
+            self.write_chunk(text.encode())
+        self.write_chunk(b']')
+        self.write_chunk(b'')
+
+    def read_body(self):
+        """
+        Read the request body using the Content-Length header. The body
+        is read even when it is not wanted, so the connection can be
+        reused.
+        Raises ValueError if the header is not a number and
+        BodyTooLargeError if it is above MAX_BODY_BYTES; the connection
+        is then closed after the response, as the body is not read.
+        :return: bytes, the request body
+        """
+        length = (self.headers.get('Content-Length') or '0').strip()
+        if not (length.isascii() and length.isdigit()):
+            self.close_connection = True
+            raise ValueError("Content-Length must be a non-negative "
+                             "number.")
+        if int(length) > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise BodyTooLargeError(f"Request body cannot be larger than "
+                                    f"{MAX_BODY_BYTES:,} bytes.")
+        return self.rfile.read(int(length))
+
+    def write_chunk(self, data):
+        """
+        Write one chunk of a chunked response; empty data ends the body.
+        :param data: bytes, the chunk contents
+        :return: None
+        """
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+    def send_json(self, status, data):
+        """
+        Send a complete JSON response with a Content-Length header.
+        :param status: int, the HTTP status code
+        :param data: object, JSON-serializable response body
+        :return: None
+        """
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """
+        Silence the default per-request logging to stderr.
+        :return: None
+        """
+
+
+class CharacterServer(ThreadingHTTPServer):
+    """
+    Threading HTTP server holding the shared Roster.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, roster):
+        """
+        Initialize the server and bind it to an address.
+        :param address: tuple, (host, port) to listen on
+        :param roster: Roster, the characters served by every handler
+        """
+        super().__init__(address, CharacterRequestHandler)
+        self.roster = roster
+
+
+def serve(roster, host='127.0.0.1', port=8000):
+    """
+    Serve the roster over HTTP until interrupted.
+    :param roster: Roster, the characters to serve
+    :param host: str, the address to listen on
+    :param port: int, the port to listen on
+    :return: None
+    """
+    server = CharacterServer((host, port), roster)
+    print(f"Serving characters on http://{host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+    finally:
+        server.server_close()
+
+
+def main():
+    """
+    Parse command line arguments and start the server.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Serve the character roster over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument(
+        '--load', metavar='FILE',
+        help="CSV or JSON Lines file to load before serving")
+    args = parser.parse_args()
+
+    roster = Roster()
+    if args.load:
+        roster.extend(iter_characters(args.load))
+        print(f"Loaded {len(roster)} characters from {args.load}")
+    serve(roster, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
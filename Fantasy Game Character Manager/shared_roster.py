@@ -0,0 +1,341 @@
+# shared_roster.py
+
+"""
+Parallel queries over a roster held in shared memory.
+
+This module defines the SharedRoster class, which copies a snapshot of
+a roster into one multiprocessing.shared_memory block as columns (roster
+positions, wealth and mana points as arrays of machine integers, and
+a text buffer of lowercase names, each followed by its roster position)
+split into shards, one per worker process. A query is
+scattered to the workers, each of which attaches the block by name and
+answers for its shard straight from the shared bytes, and the small
+per-shard answers are gathered and combined. No Character objects are
+copied or pickled: only row positions and totals travel between the
+processes.
+
+Within a shard, rows are ordered by race and role, and within each
+group the mages with mana points come last, so the wealth and mana
+points of a group are contiguous slices summed in C. Names are searched
+with one compiled regular expression run directly over the name buffer,
+which captures the position written after every matching name, so the
+matching rows are found without a Python loop.
+
+The shared roster is a snapshot: it does not see characters added to the
+roster after it was built. Close it (or use it in a with statement) to
+stop the workers and free the block.
+"""
+
+import argparse
+import os
+import re
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from file_manager import load_characters_from_file
+from roster_scan import GROUP_COLUMNS, ScanResult, display_scan
+
+# Rosters smaller than this are queried in the calling process
+PARALLEL_MIN_CHARACTERS = 50000
+
+# Shared memory blocks attached by this process, by name
+_attached = {}
+
+
+def _attach(name):
+    """
+    Attach a shared memory block, once per process.
+    :param name: str, the block's name
+    :return: SharedMemory, the attached block
+    """
+    block = _attached.get(name)
+    if block is None:
+        block = _attached[name] = shared_memory.SharedMemory(name=name)
+    return block
+
+
+def _column(buffer, span, format):
+    """
+    View a column of a shard without copying it.
+    :param buffer: memoryview, the shared block's bytes
+    :param span: tuple, (start, end) byte offsets of the column
+    :param format: str, the array type code of the column
+    :return: memoryview, the column's values
+    """
+    start, end = span
+    return buffer[start:end].cast(format)
+
+
+def _search_shard(buffer, layout, text):
+    """
+    Find the rows of a shard whose name contains the text.
+    :param buffer: memoryview, the shared block's bytes
+    :param layout: dict, the byte spans of the shard's columns
+    :param text: str, the lowercase text to look for
+    :return: array, the roster positions of the matching rows
+    """
+    positions = _column(buffer, layout['positions'], 'q')
+    if not text:
+        return array('q', positions)
+    start, end = layout['names']
+    # Each name line is followed by a line holding its position; the
+    # match runs on to the position, so a name matches at most once
+    pattern = re.compile(re.escape(text.encode('ascii')) +
+                         rb'[a-z]*\n(\d+)\n')
+    return array('q', map(int, pattern.findall(buffer, start, end)))
+
+
+def _aggregate_shard(buffer, layout):
+    """
+    Total the wealth and mana points of each race and role in a shard.
+    :param buffer: memoryview, the shared block's bytes
+    :param layout: dict, the byte spans of the shard's columns
+    :return: ScanResult, the shard's statistics grouped by race and role
+    """
+    wealth = _column(buffer, layout['wealth'], 'q')
+    mana = _column(buffer, layout['mana_points'], 'q')
+    result = ScanResult(GROUP_COLUMNS)
+    for key, start, mana_start, end in layout['groups']:
+        stats = result.group(key)
+        stats['wealth'].add_values(wealth[start:end])
+        stats['mana_points'].add_values(mana[mana_start:end])
+    return result
+
+
+def _answer(buffer, layout, query, argument):
+    """
+    Answer a query for one shard.
+    :param buffer: memoryview, the shared block's bytes
+    :param layout: dict, the byte spans of the shard's columns
+    :param query: str, 'search' or 'aggregate'
+    :param argument: the query's argument
+    :return: the shard's answer
+    """
+    if query == 'search':
+        return _search_shard(buffer, layout, argument)
+    return _aggregate_shard(buffer, layout)
+
+
+def _query_shard(name, layout, query, argument):
+    """
+    Answer a query for one shard in a worker process.
+    :param name: str, the name of the shared memory block
+    :param layout: dict, the byte spans of the shard's columns
+    :param query: str, 'search' or 'aggregate'
+    :param argument: the query's argument
+    :return: the shard's answer
+    """
+    return _answer(_attach(name).buf, layout, query, argument)
+
+
+def _shard_columns(characters, positions):
+    """
+    Build the columns of one shard, ordered by race, role and whether
+    the character has mana points.
+    :param characters: sequence, the roster's Character objects
+    :param positions: range, the roster positions in the shard
+    :return: tuple, (positions, wealth, mana points, name bytes, groups)
+    where groups lists (key, start, mana start, end)
+    """
+    rows = []
+    for position in positions:
+        character = characters[position]
+        mana = getattr(character, 'get_mana_points', None)
+        rows.append((character.get_race(), character.get_role(),
+                     mana is not None, position,
+                     mana() if mana is not None else 0))
+    rows.sort()
+
+    order = array('q', [row[3] for row in rows])
+    wealth = array('q', [characters[position].get_wealth()
+                         for position in order])
+    mana_points = array('q', [row[4] for row in rows])
+    name_bytes = ''.join([
+        f"{characters[position].get_name().lower()}\n{position}\n"
+        for position in order]).encode('ascii')
+
+    groups = []
+    for number, (race, role, has_mana, _, _) in enumerate(rows):
+        if not groups or groups[-1][0] != (race, role):
+            groups.append([(race, role), number, number, number])
+        group = groups[-1]
+        group[3] = number + 1
+        if not has_mana:
+            group[2] = number + 1
+    return (order, wealth, mana_points, name_bytes,
+            [tuple(group) for group in groups])
+
+
+class SharedRoster:
+    """
+    Snapshot of a roster in shared memory, queried in parallel by a pool
+    of worker processes.
+    """
+
+    def __init__(self, characters, workers=None):
+        """
+        Initialize a SharedRoster, copying the characters into a new
+        shared memory block and starting the worker processes.
+        :param characters: iterable, Character objects, such as a
+        Roster or a Roster snapshot
+        :param workers: int or None, number of worker processes and
+        shards; defaults to the number of CPUs
+        """
+        self._characters = tuple(characters)
+        count = len(self._characters)
+        workers = workers or os.cpu_count() or 1
+        if count < PARALLEL_MIN_CHARACTERS:
+            workers = 1
+        self._workers = workers
+
+        size = -(-count // workers) if count else 0
+        shards = [_shard_columns(self._characters,
+                                 range(start, min(start + size, count)))
+                  for start in range(0, count, size or 1)]
+        total = sum(len(column) * column.itemsize
+                    for shard in shards for column in shard[:3])
+        total += sum(len(shard[3]) for shard in shards)
+        self._block = shared_memory.SharedMemory(create=True,
+                                                 size=max(total, 1))
+        self._layouts = []
+        at = 0
+        for shard in shards:
+            layout = {'groups': shard[4]}
+            for key, column in zip(('positions', 'wealth', 'mana_points',
+                                    'names'), shard):
+                data = memoryview(column).cast('B')
+                self._block.buf[at:at + len(data)] = data
+                layout[key] = (at, at + len(data))
+                at += len(data)
+            self._layouts.append(layout)
+        self._executor = ProcessPoolExecutor(max_workers=workers) \
+            if workers > 1 else None
+
+    def _scatter(self, query, argument=None):
+        """
+        Run a query on every shard, in the worker processes if there are
+        several.
+        :param query: str, 'search' or 'aggregate'
+        :param argument: the query's argument
+        :return: list, the shards' answers
+        """
+        if self._executor is None:
+            return [_answer(self._block.buf, layout, query, argument)
+                    for layout in self._layouts]
+        name = self._block.name
+        return list(self._executor.map(
+            _query_shard, [name] * len(self._layouts), self._layouts,
+            [query] * len(self._layouts), [argument] * len(self._layouts)))
+
+    def search_by_name(self, search_name):
+        """
+        Find characters whose name contains the given text.
+        Matching is case-insensitive.
+        :param search_name: str, the text to look for in names
+        :return: list, matching Character objects in roster order
+        """
+        search_name = search_name.lower()
+        if search_name and not (search_name.isascii() and
+                                search_name.isalpha()):
+            # Names are letters only, so nothing else can match
+            return []
+        positions = []
+        for found in self._scatter('search', search_name):
+            positions.extend(found)
+        positions.sort()
+        return [self._characters[position] for position in positions]
+
+    def aggregate(self, group_by=()):
+        """
+        Count, total and find the range of wealth and mana points,
+        optionally grouped by race and/or role.
+        Raises ValueError if a group column is not race or role.
+        :param group_by: tuple, the columns to group by
+        :return: ScanResult, the statistics per group
+        """
+        for column in group_by:
+            if column not in GROUP_COLUMNS:
+                raise ValueError(f"Cannot group by '{column}'.")
+        result = ScanResult(group_by)
+        for part in self._scatter('aggregate'):
+            for key, stats in part.groups.items():
+                values = dict(zip(GROUP_COLUMNS, key))
+                target = result.group(tuple(values[column]
+                                            for column in group_by))
+                for column, column_stats in stats.items():
+                    target[column].merge(column_stats)
+        return result
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared memory block.
+        :return: None
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    def __enter__(self):
+        """
+        Use the SharedRoster in a with statement.
+        :return: SharedRoster, this roster
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Close the SharedRoster at the end of a with statement.
+        :return: None
+        """
+        self.close()
+
+    def __len__(self):
+        """
+        Number of characters in the snapshot.
+        :return: int, the number of characters
+        """
+        return len(self._characters)
+
+
+def main():
+    """
+    Parse command line arguments, load a roster file into shared memory
+    and run a query on it in parallel.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Query a roster in parallel from shared memory.")
+    parser.add_argument('filename', help="the CSV or JSON Lines file")
+    parser.add_argument('--workers', type=int,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--search', metavar='TEXT',
+                        help="list the characters whose name contains "
+                             "TEXT instead of totalling wealth")
+    parser.add_argument('--group-by', nargs='+', default=[],
+                        choices=GROUP_COLUMNS)
+    args = parser.parse_args()
+
+    try:
+        characters = load_characters_from_file(args.filename)
+    except OSError as e:
+        print(f"Error loading characters from file: {e}")
+        return
+    with SharedRoster(characters, args.workers) as roster:
+        start = time.perf_counter()
+        if args.search is not None:
+            found = roster.search_by_name(args.search)
+            for character in found:
+                print(character)
+            print(f"{len(found):,} character(s) found.")
+        else:
+            display_scan(roster.aggregate(tuple(args.group_by)))
+        print(f"Query took {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
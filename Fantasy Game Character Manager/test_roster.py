@@ -0,0 +1,96 @@
+# test_roster.py
+
+"""
+Regression tests for the Roster class.
+
+Run with: python -m unittest test_roster
+"""
+
+import unittest
+from character import Character
+from roster import Roster
+
+
+def make_characters(count):
+    """
+    Create plain characters with distinct names and wealth.
+    :param count: int, the number of characters
+    :return: list, Character objects
+    """
+    names = "abcdefghijklmnopqrstuvwxyz"
+    return [Character(names[number].upper() + 'x', 'Elf', 'Warrior', '1',
+                      str(10 * (number + 1)))
+            for number in range(count)]
+
+
+class RosterDuplicateUndoTest(unittest.TestCase):
+    """
+    Undo of characters that are also held at earlier positions.
+    """
+
+    def assert_indexes_match(self, roster):
+        """
+        Check the wealth indexes agree with the characters' wealth.
+        :param roster: Roster, the roster to check
+        :return: None
+        """
+        snapshot = roster.snapshot()
+        self.assertEqual(roster.wealth_statistics(),
+                         (len(snapshot),
+                          sum(character.get_wealth()
+                              for character in snapshot)))
+        richest = max(snapshot, key=lambda character: character.get_wealth())
+        self.assertEqual(roster.richest(1)[0].get_wealth(),
+                         richest.get_wealth())
+
+    def test_undo_keeps_earlier_position_observed(self):
+        """
+        Undoing positions 9 and 10 of a character also at 8 keeps it
+        indexed and observed at 8.
+        """
+        roster = Roster()
+        characters = make_characters(9)
+        roster.extend(characters)
+        repeated = characters[8]
+        roster.extend([repeated, repeated])
+        roster.undo()
+        self.assert_indexes_match(roster)
+
+        repeated.set_wealth(17)
+        self.assert_indexes_match(roster)
+        repeated.set_wealth(5000)
+        self.assertIs(roster.richest(1)[0], repeated)
+
+    def test_redo_after_undo_of_repeated_character(self):
+        """
+        Redo indexes the repeated character at every position again.
+        """
+        roster = Roster()
+        characters = make_characters(9)
+        roster.extend(characters)
+        repeated = characters[8]
+        roster.extend([repeated, repeated])
+        roster.undo()
+        roster.wealth_statistics()
+        roster.redo()
+        repeated.set_wealth(17)
+        self.assert_indexes_match(roster)
+
+    def test_undo_of_only_position_stops_observing(self):
+        """
+        A character cut from all of its positions is no longer observed.
+        """
+        roster = Roster()
+        characters = make_characters(3)
+        roster.extend(characters[:2])
+        roster.extend([characters[2], characters[2]])
+        roster.undo()
+        self.assert_indexes_match(roster)
+        self.assertNotIn(roster, [reference() for reference
+                                  in characters[2]._wealth_observers])
+        characters[2].set_wealth(9999)
+        self.assert_indexes_match(roster)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,68 @@ the character management application to ensure data integrity.
 """
 
 import re
+from character_registry import is_registered_role, registered_roles
+
+# Error codes carried by ValidationError
+EMPTY = 'empty'
+NOT_LETTERS = 'not_letters'
+NOT_ALLOWED = 'not_allowed'
+NOT_NUMBER = 'not_number'
+OUT_OF_RANGE = 'out_of_range'
+
+# Names and choices are made of letters only; compiled once, as most
+# fields of every loaded row are checked against it
+_LETTERS = re.compile("^[a-zA-Z]+$")
+
+# Allowed values of the fields with a fixed set of choices; roles are
+# those of the registered character classes instead
+RACES = ('Elf', 'Dwarf', 'Human')
+WEAPONS = ('Sword', 'Axe')
+ARMOURS = ('Chainmail', 'Plate')
+SPELLS = ('Fireball', 'Lightning')
+FIELD_CHOICES = {
+    'race': RACES,
+    'weapon': WEAPONS,
+    'armour': ARMOURS,
+    'spell': SPELLS,
+    }
+
+# Lowest and highest values of the bounded numeric fields
+FIELD_RANGES = {
+    'skill_level': (1, 5),
+    'mana_points': (0, 100),
+    }
+
+
+class ValidationError(ValueError):
+    """
+    Error raised when a character field fails validation.
+    Besides the message it names the field and gives a short error
+    code, so bulk loads can count failures by kind.
+    """
+
+    def __init__(self, message, field, code):
+        """
+        Initialize a ValidationError.
+        :param message: str, the message shown to the user
+        :param field: str, the name of the field that failed
+        :param code: str, one of the error codes above
+        """
+        super().__init__(message)
+        self.field = field
+        self.code = code
+
+
+def describe_choices(choices):
+    """
+    List allowed values for a message, such as "Sword or Axe" or
+    "Elf, Dwarf, or Human".
+    :param choices: sequence, the allowed values
+    :return: str, the values joined with commas and "or"
+    """
+    if len(choices) < 3:
+        return " or ".join(choices)
+    return ", ".join(choices[:-1]) + ", or " + choices[-1]
 
 
 def validate_name(name):
@@ -17,10 +79,13 @@ def validate_name(name):
     :return: str, the capitalized valid name
     """
     if not name or not isinstance(name, str):
-        raise ValueError(
-            "Character name cannot be empty and must be a string.")
-    if not re.match("^[a-zA-Z]+$", name):
-        raise ValueError("Character name can only contain letters.")
+        raise ValidationError(
+            "Character name cannot be empty and must be a string.",
+            'name', EMPTY)
+    if not _LETTERS.match(name):
+        raise ValidationError(
+            "Character name can only contain letters.",
+            'name', NOT_LETTERS)
     return name.capitalize()
 
 
@@ -30,31 +95,40 @@ def validate_race(race):
     :param race: str, the race to validate (Elf, Dwarf, or Human)
     :return: str, the capitalized valid race
     """
-    valid_races = ['elf', 'dwarf', 'human']
     if not race or not isinstance(race, str):
-        raise ValueError(
-            "Character race cannot be empty and must be a string.")
-    if not re.match("^[a-zA-Z]+$", race):
-        raise ValueError("Character race can only contain letters.")
-    if race.lower() not in valid_races:
-        raise ValueError("Race must be Elf, Dwarf, or Human.")
+        raise ValidationError(
+            "Character race cannot be empty and must be a string.",
+            'race', EMPTY)
+    if not _LETTERS.match(race):
+        raise ValidationError(
+            "Character race can only contain letters.",
+            'race', NOT_LETTERS)
+    if race.capitalize() not in RACES:
+        raise ValidationError(
+            f"Race must be {describe_choices(RACES)}.",
+            'race', NOT_ALLOWED)
     return race.capitalize()
 
 
 def validate_role(role):
     """
-    Validate character role ensuring it's one of the allowed roles.
+    Validate character role ensuring it's the role of a registered
+    character class.
     :param role: str, the role to validate (Warrior or Mage)
     :return: str, the capitalized valid role
     """
-    valid_roles = ['warrior', 'mage']
     if not role or not isinstance(role, str):
-        raise ValueError(
-            "Character role cannot be empty and must be a string.")
-    if not re.match("^[a-zA-Z]+$", role):
-        raise ValueError("Character role can only contain letters.")
-    if role.lower() not in valid_roles:
-        raise ValueError("Role must be Warrior or Mage.")
+        raise ValidationError(
+            "Character role cannot be empty and must be a string.",
+            'role', EMPTY)
+    if not _LETTERS.match(role):
+        raise ValidationError(
+            "Character role can only contain letters.",
+            'role', NOT_LETTERS)
+    if not is_registered_role(role):
+        raise ValidationError(
+            f"Role must be {describe_choices(registered_roles())}.",
+            'role', NOT_ALLOWED)
     return role.capitalize()
 
 
@@ -66,14 +140,21 @@ def validate_skill_level(skill_level):
     """
     if isinstance(skill_level, str):
         if skill_level not in ['1', '2', '3', '4', '5']:
-            raise ValueError("Skill level must be between 1 and 5.")
+            raise ValidationError(
+                "Skill level must be between 1 and 5.",
+                'skill_level', OUT_OF_RANGE)
         return skill_level
-    elif isinstance(skill_level, int):
-        if skill_level < 1 or skill_level > 5:
-            raise ValueError("Skill level must be between 1 and 5.")
+    elif type(skill_level) is int:
+        low, high = FIELD_RANGES['skill_level']
+        if skill_level < low or skill_level > high:
+            raise ValidationError(
+                "Skill level must be between 1 and 5.",
+                'skill_level', OUT_OF_RANGE)
         return str(skill_level)
     else:
-        raise ValueError("Skill level must be a number between 1 and 5.")
+        raise ValidationError(
+            "Skill level must be a number between 1 and 5.",
+            'skill_level', NOT_NUMBER)
 
 
 def validate_wealth(wealth):
@@ -84,10 +165,14 @@ def validate_wealth(wealth):
     """
     if isinstance(wealth, str):
         if not wealth.isdigit():
-            raise ValueError("Wealth must be a valid positive number.")
+            raise ValidationError(
+                "Wealth must be a valid positive number.",
+                'wealth', NOT_NUMBER)
         wealth = int(wealth)
-    if not isinstance(wealth, int) or wealth < 0:
-        raise ValueError("Wealth cannot be negative and must be a number.")
+    if type(wealth) is not int or wealth < 0:
+        raise ValidationError(
+            "Wealth cannot be negative and must be a number.",
+            'wealth', OUT_OF_RANGE)
     return wealth
 
 
@@ -97,13 +182,18 @@ def validate_weapon(weapon):
     :param weapon: str, the weapon to validate (Sword or Axe)
     :return: str, the capitalized valid weapon
     """
-    valid_weapons = ['sword', 'axe']
     if not weapon or not isinstance(weapon, str):
-        raise ValueError("Weapon cannot be empty and must be a string.")
-    if not re.match("^[a-zA-Z]+$", weapon):
-        raise ValueError("Weapon can only contain letters.")
-    if weapon.lower() not in valid_weapons:
-        raise ValueError("Weapon must be Sword or Axe.")
+        raise ValidationError(
+            "Weapon cannot be empty and must be a string.",
+            'weapon', EMPTY)
+    if not _LETTERS.match(weapon):
+        raise ValidationError(
+            "Weapon can only contain letters.",
+            'weapon', NOT_LETTERS)
+    if weapon.capitalize() not in WEAPONS:
+        raise ValidationError(
+            f"Weapon must be {describe_choices(WEAPONS)}.",
+            'weapon', NOT_ALLOWED)
     return weapon.capitalize()
 
 
@@ -113,13 +203,18 @@ def validate_armour(armour):
     :param armour: str, the armour to validate (Chainmail or Plate)
     :return: str, the capitalized valid armour
     """
-    valid_armour = ['chainmail', 'plate']
     if not armour or not isinstance(armour, str):
-        raise ValueError("Armour cannot be empty and must be a string.")
-    if not re.match("^[a-zA-Z]+$", armour):
-        raise ValueError("Armour can only contain letters.")
-    if armour.lower() not in valid_armour:
-        raise ValueError("Armour must be Chainmail or Plate.")
+        raise ValidationError(
+            "Armour cannot be empty and must be a string.",
+            'armour', EMPTY)
+    if not _LETTERS.match(armour):
+        raise ValidationError(
+            "Armour can only contain letters.",
+            'armour', NOT_LETTERS)
+    if armour.capitalize() not in ARMOURS:
+        raise ValidationError(
+            f"Armour must be {describe_choices(ARMOURS)}.",
+            'armour', NOT_ALLOWED)
     return armour.capitalize()
 
 
@@ -129,13 +224,18 @@ def validate_spell(spell):
     :param spell: str, the spell to validate (Fireball or Lightning)
     :return: str, the capitalized valid spell
     """
-    valid_spells = ['fireball', 'lightning']
     if not spell or not isinstance(spell, str):
-        raise ValueError("Spell cannot be empty and must be a string.")
-    if not re.match("^[a-zA-Z]+$", spell):
-        raise ValueError("Spell can only contain letters.")
-    if spell.lower() not in valid_spells:
-        raise ValueError("Spell must be Fireball or Lightning.")
+        raise ValidationError(
+            "Spell cannot be empty and must be a string.",
+            'spell', EMPTY)
+    if not _LETTERS.match(spell):
+        raise ValidationError(
+            "Spell can only contain letters.",
+            'spell', NOT_LETTERS)
+    if spell.capitalize() not in SPELLS:
+        raise ValidationError(
+            f"Spell must be {describe_choices(SPELLS)}.",
+            'spell', NOT_ALLOWED)
     return spell.capitalize()
 
 
@@ -147,9 +247,14 @@ def validate_mana_points(mana_points):
     """
     if isinstance(mana_points, str):
         if not mana_points.isdigit():
-            raise ValueError("Mana points must be a valid number.")
+            raise ValidationError(
+                "Mana points must be a valid number.",
+                'mana_points', NOT_NUMBER)
         mana_points = int(mana_points)
-    if not isinstance(mana_points, int) or \
-       mana_points < 0 or mana_points > 100:
-        raise ValueError("Mana points must be between 0 and 100.")
+    low, high = FIELD_RANGES['mana_points']
+    if type(mana_points) is not int or \
+       mana_points < low or mana_points > high:
+        raise ValidationError(
+            "Mana points must be between 0 and 100.",
+            'mana_points', OUT_OF_RANGE)
     return mana_points
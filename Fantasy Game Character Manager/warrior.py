@@ -8,6 +8,7 @@ and adds warrior-specific attributes like weapon and armour.
 """
 
 from character import Character
+from character_registry import register_character_class
 from validators import validate_weapon, validate_armour
 
 
@@ -79,3 +80,8 @@ class Warrior(Character):
         return (f"{base_str}\n"
                 f"Weapon         : {self._weapon}\n"
                 f"Armour         : {self._armour}")
+
+
+register_character_class(
+    Warrior, 'Warrior',
+    ['name', 'race', 'skill_level', 'wealth', 'weapon', 'armour'])
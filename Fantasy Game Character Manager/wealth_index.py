@@ -0,0 +1,333 @@
+# wealth_index.py
+
+"""
+Wealth index for the character management system.
+
+This module defines the WealthIndex class, a sorted multiset of
+(wealth, position) entries answering top-N, bottom-N, rank and
+percentile queries without sorting the roster. Entries are kept in a
+list of sorted blocks of a few hundred entries each, with a Fenwick
+(binary indexed) tree over the block lengths. Finding the block for a
+wealth is a binary search over the block maxima, finding the block
+holding the k-th entry is a walk down the Fenwick tree, and both are
+O(log n); inserting or removing inside a block only moves a few hundred
+references.
+"""
+
+import bisect
+
+# Target number of entries per block; blocks split at twice this size
+WEALTH_BLOCK_SIZE = 512
+
+
+class WealthIndex:
+    """
+    Sorted index of (wealth, position) entries, where position is the
+    character's place in its roster. Ties in wealth are ordered by
+    position, so every entry is unique and can be removed exactly.
+    A running total of the indexed wealth is also kept.
+    """
+
+    def __init__(self, entries=()):
+        """
+        Initialize a WealthIndex, optionally with existing entries.
+        :param entries: iterable, initial (wealth, position) tuples
+        """
+        self._blocks = []
+        self._maxes = []
+        self._tree = [0]
+        self._size = 0
+        self._total = 0
+        self.add_many(entries)
+
+    def add(self, wealth, position):
+        """
+        Add an entry to the index.
+        :param wealth: int, the character's wealth
+        :param position: int, the character's position in its roster
+        :return: None
+        """
+        entry = (wealth, position)
+        self._size += 1
+        self._total += wealth
+        if not self._blocks:
+            self._blocks.append([entry])
+            self._maxes.append(entry)
+            self._rebuild_tree()
+            return
+
+        block_number = bisect.bisect_left(self._maxes, entry)
+        if block_number == len(self._blocks):
+            block_number -= 1
+        block = self._blocks[block_number]
+        bisect.insort(block, entry)
+        self._maxes[block_number] = block[-1]
+        if len(block) > 2 * WEALTH_BLOCK_SIZE:
+            self._blocks[block_number:block_number + 1] = [
+                block[:WEALTH_BLOCK_SIZE], block[WEALTH_BLOCK_SIZE:]]
+            self._maxes[block_number:block_number + 1] = [
+                block[WEALTH_BLOCK_SIZE - 1], block[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(block_number, 1)
+
+    def add_many(self, entries):
+        """
+        Add many entries at once. Large batches re-sort the whole index,
+        which is linear when the index already holds one sorted run;
+        small ones are inserted one by one.
+        :param entries: iterable, (wealth, position) tuples
+        :return: None
+        """
+        entries = list(entries)
+        if len(entries) * WEALTH_BLOCK_SIZE < self._size:
+            for wealth, position in entries:
+                self.add(wealth, position)
+            return
+        merged = [entry for block in self._blocks for entry in block]
+        merged.extend(entries)
+        merged.sort()
+        self._size = len(merged)
+        self._total += sum(wealth for wealth, _ in entries)
+        self._blocks = [merged[start:start + WEALTH_BLOCK_SIZE]
+                        for start in range(0, len(merged),
+                                           WEALTH_BLOCK_SIZE)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._rebuild_tree()
+
+    def remove(self, wealth, position):
+        """
+        Remove an entry from the index.
+        Raises ValueError if the entry is not in the index.
+        :param wealth: int, the wealth the entry was added with
+        :param position: int, the position the entry was added with
+        :return: None
+        """
+        entry = (wealth, position)
+        block_number = bisect.bisect_left(self._maxes, entry)
+        if block_number == len(self._blocks):
+            raise ValueError(f"{entry} is not in the wealth index.")
+        block = self._blocks[block_number]
+        i = bisect.bisect_left(block, entry)
+        if block[i] != entry:
+            raise ValueError(f"{entry} is not in the wealth index.")
+
+        del block[i]
+        self._size -= 1
+        self._total -= wealth
+        if block:
+            self._maxes[block_number] = block[-1]
+            self._tree_add(block_number, -1)
+        else:
+            del self._blocks[block_number]
+            del self._maxes[block_number]
+            self._rebuild_tree()
+
+    def move(self, old_wealth, new_wealth, position):
+        """
+        Change the wealth of an entry. An entry whose new wealth still
+        sorts inside its block is moved within the block, leaving the
+        block lengths and the Fenwick tree alone.
+        Raises ValueError if the entry is not in the index.
+        :param old_wealth: int, the wealth the entry was added with
+        :param new_wealth: int, the new wealth
+        :param position: int, the position the entry was added with
+        :return: None
+        """
+        entry = (old_wealth, position)
+        moved = (new_wealth, position)
+        block_number = bisect.bisect_left(self._maxes, entry)
+        if block_number < len(self._blocks) and \
+                (not block_number or
+                 self._maxes[block_number - 1] < moved) and \
+                (block_number == len(self._blocks) - 1 or
+                 moved < self._blocks[block_number + 1][0]):
+            block = self._blocks[block_number]
+            i = bisect.bisect_left(block, entry)
+            if block[i] != entry:
+                raise ValueError(f"{entry} is not in the wealth index.")
+            del block[i]
+            bisect.insort(block, moved)
+            self._maxes[block_number] = block[-1]
+            self._total += new_wealth - old_wealth
+            return
+        self.remove(old_wealth, position)
+        self.add(new_wealth, position)
+
+    def remove_many(self, entries):
+        """
+        Remove many entries at once. Small batches are removed one by
+        one; large ones filter every block in a single pass.
+        Raises ValueError if an entry of a small batch is not in the
+        index; entries of a large batch that are not in it are ignored.
+        :param entries: iterable, (wealth, position) tuples
+        :return: None
+        """
+        entries = list(entries)
+        if len(entries) * WEALTH_BLOCK_SIZE < self._size:
+            for wealth, position in entries:
+                self.remove(wealth, position)
+            return
+        removed = set(entries)
+        kept = [entry for block in self._blocks for entry in block
+                if entry not in removed]
+        self._size = len(kept)
+        self._total = sum(wealth for wealth, _ in kept)
+        self._blocks = [kept[start:start + WEALTH_BLOCK_SIZE]
+                        for start in range(0, len(kept), WEALTH_BLOCK_SIZE)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._rebuild_tree()
+
+    def clear(self):
+        """
+        Remove every entry from the index.
+        :return: None
+        """
+        self._blocks = []
+        self._maxes = []
+        self._tree = [0]
+        self._size = 0
+        self._total = 0
+
+    def _rebuild_tree(self):
+        """
+        Rebuild the Fenwick tree of block lengths in linear time.
+        The tree is 1-based: tree[i] holds the total length of the
+        blocks i - lowbit(i) to i - 1.
+        :return: None
+        """
+        tree = [0] + [len(block) for block in self._blocks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, block_number, delta):
+        """
+        Record a change in the length of one block.
+        :param block_number: int, the 0-based block number
+        :param delta: int, the change in length
+        :return: None
+        """
+        i = block_number + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _entries_before(self, block_number):
+        """
+        Count the entries in the blocks before the given block.
+        :param block_number: int, the 0-based block number
+        :return: int, the number of entries before the block
+        """
+        count = 0
+        i = block_number
+        while i:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+    def _locate(self, rank):
+        """
+        Find the block and offset of the entry with the given rank.
+        :param rank: int, the 0-based rank, smallest wealth first
+        :return: tuple, (block number, offset within the block)
+        """
+        block_number = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            following = block_number + step
+            if following < len(self._tree) and \
+                    self._tree[following] <= rank:
+                block_number = following
+                rank -= self._tree[following]
+            step >>= 1
+        return block_number, rank
+
+    def select(self, rank):
+        """
+        Get the entry with the given rank.
+        Raises IndexError if the rank is out of range.
+        :param rank: int, the 0-based rank, smallest wealth first
+        :return: tuple, the (wealth, position) entry
+        """
+        if not 0 <= rank < self._size:
+            raise IndexError("Wealth rank out of range.")
+        block_number, offset = self._locate(rank)
+        return self._blocks[block_number][offset]
+
+    def rank(self, wealth):
+        """
+        Count the entries with less than the given wealth.
+        :param wealth: int, the wealth to compare against
+        :return: int, the number of poorer entries
+        """
+        entry = (wealth, -1)
+        block_number = bisect.bisect_left(self._maxes, entry)
+        if block_number == len(self._blocks):
+            return self._size
+        return (self._entries_before(block_number) +
+                bisect.bisect_left(self._blocks[block_number], entry))
+
+    def smallest(self, count):
+        """
+        Get the entries with the least wealth.
+        :param count: int, the maximum number of entries
+        :return: list, (wealth, position) tuples, poorest first
+        """
+        if count <= 0 or not self._size:
+            return []
+        entries = []
+        for block in self._blocks:
+            entries.extend(block[:count - len(entries)])
+            if len(entries) == count:
+                break
+        return entries
+
+    def largest(self, count):
+        """
+        Get the entries with the most wealth.
+        :param count: int, the maximum number of entries
+        :return: list, (wealth, position) tuples, richest first
+        """
+        if count <= 0 or not self._size:
+            return []
+        entries = []
+        for block in reversed(self._blocks):
+            needed = count - len(entries)
+            entries.extend(reversed(block[-needed:]))
+            if len(entries) == count:
+                break
+        return entries
+
+    def percentile(self, percent):
+        """
+        Get the wealth at a percentile by the nearest-rank method: the
+        smallest wealth at least percent % of the entries do not exceed.
+        Raises ValueError if percent is outside 0-100 or the index is
+        empty.
+        :param percent: float, the percentile from 0 to 100
+        :return: int, the wealth at the percentile
+        """
+        if not 0 <= percent <= 100:
+            raise ValueError("Percentile must be between 0 and 100.")
+        if not self._size:
+            raise ValueError("The wealth index is empty.")
+        # Nearest rank is ceil(percent / 100 * size), 1-based
+        rank = max(1, -(-percent * self._size // 100))
+        return self.select(int(rank) - 1)[0]
+
+    def total(self):
+        """
+        Get the total wealth of every entry.
+        :return: int, the total wealth
+        """
+        return self._total
+
+    def __len__(self):
+        """
+        Number of entries in the index.
+        :return: int, the number of entries
+        """
+        return self._size